@@ -1,5 +1,21 @@
-import streamlit as st
+import io
+import json
+import os
+
+import pandas as pd
 import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+
+API_URL = os.getenv("API_URL", "http://localhost:8000").rstrip("/")
+HEALTH_TTL_SECONDS = 15
+BATCH_CHUNK_SIZE = 200
+# The API's request limits (same variables and defaults as main.py); the
+# server's own values from /ready take precedence when it reports them
+MAX_BATCH_REVIEWS = int(os.getenv("MAX_BATCH_REVIEWS", "1000"))
+MAX_REQUEST_BYTES = int(os.getenv("MAX_REQUEST_BYTES", str(1 << 20)))
+# Column names tried, in order, when a CSV upload has several columns
+TEXT_COLUMNS = ("review", "text_", "text", "content")
 
 # Page configuration
 st.set_page_config(
@@ -79,122 +95,209 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+# ---- API CLIENT ----
+@st.cache_resource
+def get_session():
+    """One pooled HTTP session shared by every rerun and browser tab"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=8)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+@st.cache_data(ttl=HEALTH_TTL_SECONDS, show_spinner=False)
+def fetch_server_status():
+    """(reachable, /ready payload); cached so reruns do not wait on the server"""
+    try:
+        return True, get_session().get(f"{API_URL}/ready", timeout=2).json()
+    except (requests.exceptions.RequestException, ValueError):
+        return False, None
+
+def show_result(result):
+    if "error" in result:
+        st.markdown(
+            f'<div class="result-box error">❌ {result["error"]}</div>',
+            unsafe_allow_html=True
+        )
+    elif result["prediction"] == "Fake Review":
+        st.markdown(
+            f'<div class="result-box fake">🚨 FAKE REVIEW</div>'
+            f'<div class="confidence">Confidence: {result["confidence"]*100:.1f}%</div>',
+            unsafe_allow_html=True
+        )
+    else:
+        st.markdown(
+            f'<div class="result-box real">✅ GENUINE REVIEW</div>'
+            f'<div class="confidence">Confidence: {result["confidence"]*100:.1f}%</div>',
+            unsafe_allow_html=True
+        )
+
+class RequestTooLarge(Exception):
+    """The API refused a batch with 413"""
+
+def server_limits():
+    """(max reviews, max body bytes) per /predict/batch request"""
+    reachable, status = fetch_server_status()
+    limits = (status or {}).get("limits", {}) if reachable else {}
+    return (limits.get("max_batch_reviews", MAX_BATCH_REVIEWS),
+            limits.get("max_request_bytes", MAX_REQUEST_BYTES))
+
+def read_reviews(uploaded):
+    """Review texts from an uploaded CSV, JSONL (strings or {"review": ...}) or text file
+
+    Raises ValueError naming the first JSONL line that is not such a record.
+    """
+    name = uploaded.name.lower()
+    data = uploaded.getvalue().decode("utf-8", errors="replace")
+    if name.endswith(".csv"):
+        frame = pd.read_csv(io.StringIO(data))
+        column = next((c for c in TEXT_COLUMNS if c in frame.columns), frame.columns[0])
+        return frame[column].fillna("").astype(str).tolist()
+    if name.endswith((".jsonl", ".ndjson")):
+        reviews = []
+        for number, line in enumerate(data.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"line {number} is not valid JSON ({e})") from None
+            if isinstance(record, dict):
+                record = record.get("review")
+            if not isinstance(record, str):
+                raise ValueError(f'line {number} must be a string or an object with a "review" string')
+            reviews.append(record)
+        return reviews
+    return [line for line in data.splitlines() if line.strip()]
+
+def iter_chunks(reviews, chunk_size, max_bytes):
+    """Yield (start, chunk) runs of at most ``chunk_size`` reviews whose JSON body stays under ``max_bytes``"""
+    budget = max_bytes - len('{"reviews": []}')
+    start, size = 0, 0
+    for i, review in enumerate(reviews):
+        # Encoded as requests does it, plus the ", " separator
+        review_bytes = len(json.dumps(review).encode("utf-8")) + 2
+        if i > start and (i - start >= chunk_size or size + review_bytes > budget):
+            yield start, reviews[start:i]
+            start, size = i, 0
+        size += review_bytes
+    if start < len(reviews):
+        yield start, reviews[start:]
+
+def score_in_chunks(reviews, chunk_size=BATCH_CHUNK_SIZE):
+    """Score reviews through /predict/batch chunk by chunk, updating a progress bar"""
+    session = get_session()
+    max_reviews, max_bytes = server_limits()
+    progress = st.progress(0.0, text=f"Scoring {len(reviews):,} reviews...")
+    results = []
+    for start, chunk in iter_chunks(reviews, min(chunk_size, max_reviews), max_bytes):
+        response = session.post(f"{API_URL}/predict/batch", json={"reviews": chunk}, timeout=60)
+        if response.status_code == 413:
+            try:
+                detail = response.json().get("detail", response.text)
+            except ValueError:
+                detail = response.text
+            raise RequestTooLarge(f"reviews {start + 1:,}-{start + len(chunk):,}: {detail}")
+        response.raise_for_status()
+        results.extend(response.json()["results"])
+        progress.progress(len(results) / len(reviews), text=f"Scored {len(results):,} / {len(reviews):,} reviews")
+    progress.empty()
+    return results
+
+def results_frame(results):
+    return pd.DataFrame([{
+        "review": r["input"],
+        "prediction": r.get("prediction", "Invalid"),
+        "confidence": r.get("confidence"),
+        "error": r.get("error", ""),
+    } for r in results])
+
 # Header
 st.markdown('<div class="main-title">🕵️ Fake Review Detector</div>', unsafe_allow_html=True)
 st.markdown('<div class="subtitle">Detect AI-generated fake product reviews</div>', unsafe_allow_html=True)
 
-# Input area
-review = st.text_area("📝 Enter product review", height=150, 
-                     placeholder="Paste a product review here...",
-                     help="Minimum 10 characters. Avoid code-like text")
+single_tab, bulk_tab = st.tabs(["📝 Single review", "📦 Bulk upload"])
 
-# Prediction button
-if st.button("🔍 Analyze Review", use_container_width=True):
-    if not review.strip():
-        st.warning("⚠️ Please enter a review")
-    else:
-        try:
-            # Send request to FastAPI
-            response = requests.post(
-                "http://localhost:8000/predict", 
-                json={"review": review},
-                timeout=10
-            )
-            
-            # Handle response
-            if response.status_code == 200:
-                result = response.json()
-                
-                if "prediction" in result:
-                    if result["prediction"] == "Fake Review":
-                        st.markdown(
-                            f'<div class="result-box fake">🚨 FAKE REVIEW</div>'
-                            f'<div class="confidence">Confidence: {result["confidence"]*100:.1f}%</div>',
-                            unsafe_allow_html=True
-                        )
-                    else:
-                        st.markdown(
-                            f'<div class="result-box real">✅ GENUINE REVIEW</div>'
-                            f'<div class="confidence">Confidence: {result["confidence"]*100:.1f}%</div>',
-                            unsafe_allow_html=True
-                        )
+with single_tab:
+    # Input area
+    review = st.text_area("📝 Enter product review", height=150, 
+                         placeholder="Paste a product review here...",
+                         help="Minimum 10 characters. Avoid code-like text")
+
+    # Prediction button
+    if st.button("🔍 Analyze Review", use_container_width=True):
+        if not review.strip():
+            st.warning("⚠️ Please enter a review")
+        else:
+            try:
+                response = get_session().post(f"{API_URL}/predict", json={"review": review}, timeout=10)
+                if response.status_code == 200:
+                    show_result(response.json())
                 else:
-                    st.error(f"Unexpected response: {result}")
+                    st.error(f"Server error ({response.status_code}): {response.text[:200]}")
                     
-            elif response.status_code == 400:
-                error_msg = response.json().get('error', 'Unknown error')
-                st.markdown(
-                    f'<div class="result-box error">❌ {error_msg}</div>',
-                    unsafe_allow_html=True
-                )
-            else:
-                st.error(f"Server error ({response.status_code}): {response.text[:200]}")
-                
-        except requests.exceptions.ConnectionError:
-            st.error("🔌 Could not connect to server. Please make sure the API server is running.")
-        except requests.exceptions.Timeout:
-            st.error("⌛ Request timed out. Please try again.")
-        except Exception as e:
-            st.error(f"❌ Unexpected error: {str(e)}")
+            except requests.exceptions.ConnectionError:
+                st.error("🔌 Could not connect to server. Please make sure the API server is running.")
+            except requests.exceptions.Timeout:
+                st.error("⌛ Request timed out. Please try again.")
+            except Exception as e:
+                st.error(f"❌ Unexpected error: {str(e)}")
 
-# Health check and server info
-st.markdown("---")
-with st.expander("Server Information"):
-    try:
-        health_response = requests.get("http://localhost:8000/health", timeout=3)
-        if health_response.status_code == 200:
-            health_data = health_response.json()
-            st.success("✅ API server is running")
-            st.json(health_data)
-        else:
-            st.error(f"API server error: {health_response.text}")
-    except:
-        st.error("❌ API server is not reachable")
+with bulk_tab:
+    uploaded = st.file_uploader("Upload reviews", type=["csv", "jsonl", "ndjson", "txt"],
+                                help="CSV (a review, text_ or text column), JSONL or one review per line")
+    pasted = st.text_area("...or paste reviews, one per line", height=150)
+    max_reviews, max_bytes = server_limits()
+    chunk_size = st.number_input("Reviews per request", min_value=1, max_value=max_reviews,
+                                 value=min(BATCH_CHUNK_SIZE, max_reviews),
+                                 help=f"The server accepts up to {max_reviews:,} reviews and "
+                                      f"{max_bytes / 1024:,.0f} KB per request; longer reviews are sent in smaller chunks")
 
-st.caption("Note: Make sure the FastAPI server is running at http://localhost:8000")
-# ... [previous Streamlit code] ...
+    if st.button("🔍 Analyze All", use_container_width=True):
+        try:
+            reviews = read_reviews(uploaded) if uploaded else [l for l in pasted.splitlines() if l.strip()]
+        except (ValueError, pd.errors.ParserError) as e:
+            st.error(f"❌ Could not read {uploaded.name}: {str(e)}")
+            reviews = None
+        if reviews == []:
+            st.warning("⚠️ Please upload or paste some reviews")
+        elif reviews:
+            try:
+                st.session_state["bulk_results"] = results_frame(score_in_chunks(reviews, int(chunk_size)))
+            except RequestTooLarge as e:
+                st.error(f"📏 The server refused a batch as too large ({str(e)}). "
+                         f"Try fewer reviews per request.")
+            except requests.exceptions.ConnectionError:
+                st.error("🔌 Could not connect to server. Please make sure the API server is running.")
+            except requests.exceptions.RequestException as e:
+                st.error(f"❌ Batch request failed: {str(e)}")
+
+    # Kept across reruns, so downloading does not rescore
+    frame = st.session_state.get("bulk_results")
+    if frame is not None:
+        counts = frame["prediction"].value_counts()
+        cols = st.columns(3)
+        cols[0].metric("Fake", int(counts.get("Fake Review", 0)))
+        cols[1].metric("Genuine", int(counts.get("Real Review", 0)))
+        cols[2].metric("Invalid", int(counts.get("Invalid", 0)))
+        st.dataframe(frame, use_container_width=True)
+        st.download_button("⬇️ Download results (CSV)", frame.to_csv(index=False).encode("utf-8"),
+                           file_name="review_predictions.csv", mime="text/csv")
 
 # Health check and server info
 st.markdown("---")
 with st.expander("Server Information"):
-    try:
-        health_response = requests.get("http://localhost:8000/health", timeout=3)
-        if health_response.status_code == 200:
-            health_data = health_response.json()
-            st.success("✅ API server is running")
-            
-            # Display critical info
-            cols = st.columns(2)
-            cols[0].metric("Model Loaded", "Yes" if health_data["model_loaded"] else "No")
-            cols[1].metric("Punkt Status", health_data["punkt_status"])
-            
-            st.write("NLTK Paths:")
-            for path in health_data["nltk_paths"]:
-                st.code(path)
-        else:
-            st.error(f"API server error: {health_response.text}")
-    except:
+    reachable, status = fetch_server_status()
+    if not reachable:
         st.error("❌ API server is not reachable")
+    elif status.get("status") == "READY":
+        st.success("✅ API server is running")
+        cols = st.columns(2)
+        cols[0].metric("Model Version", status["model_version"])
+        cols[1].metric("Features", f"{status['n_features']:,}")
+        st.json(status)
+    else:
+        st.warning("⏳ API server is starting up")
+    st.caption(f"Status is refreshed every {HEALTH_TTL_SECONDS} s")
 
-# Add resource verification
-st.markdown("---")
-st.subheader("Resource Verification")
-if st.button("Verify NLTK Resources"):
-    try:
-        nltk_dir = os.path.join(os.getcwd(), "nltk_resources")
-        punkt_path = os.path.join(nltk_dir, "tokenizers", "punkt", "PY3", "english.pickle")
-        
-        if os.path.exists(punkt_path):
-            st.success(f"✅ Punkt found at: {punkt_path}")
-            st.code(f"File size: {os.path.getsize(punkt_path) / 1024:.1f} KB")
-        else:
-            st.error(f"❌ Punkt not found at: {punkt_path}")
-            
-        # Show directory structure
-        with st.expander("Show nltk_resources directory"):
-            for root, dirs, files in os.walk(nltk_dir):
-                st.write(f"📂 {root}")
-                for file in files:
-                    st.code(f"  - {file}")
-    except Exception as e:
-        st.error(f"Verification failed: {str(e)}")
\ No newline at end of file
+st.caption(f"Note: Make sure the FastAPI server is running at {API_URL}")
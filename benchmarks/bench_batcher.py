@@ -0,0 +1,81 @@
+"""Latency/throughput benchmark: micro-batched vs per-request threadpool scoring.
+
+Drives the predict pipeline in-process from ``--concurrency`` asyncio clients.
+The baseline runs every request on the FastAPI threadpool, as a sync ``def``
+endpoint does. The micro-batched path queues requests on a ``MicroBatcher``.
+The prediction cache is disabled so every request is really scored.
+
+    python -m benchmarks.bench_batcher --model-dir model --concurrency 64
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+
+from benchmarks.bench_clean import build_corpus
+from serving import MicroBatcher
+from serving.compiled import load_model
+from serving.pipeline import predict_reviews
+
+
+async def drive(call, reviews, concurrency):
+    """Send every review through ``call`` from ``concurrency`` clients"""
+    latencies = []
+    pending = iter(reviews)
+
+    async def client():
+        for review in pending:
+            start = time.perf_counter()
+            await call(review)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return latencies, len(reviews) / elapsed
+
+
+def report(name, latencies, rate):
+    ms = np.array(latencies) * 1e3
+    print(f"{name:>24}: {rate:9.0f} req/s  p50 {np.percentile(ms, 50):7.2f} ms  "
+          f"p99 {np.percentile(ms, 99):7.2f} ms")
+
+
+async def run(args):
+    scorer = load_model(args.model_dir)
+    reviews = build_corpus(args.requests)
+
+    def predict_one(review):
+        return predict_reviews([review], scorer)[0]
+
+    async def threadpool_call(review):
+        return await run_in_threadpool(predict_one, review)
+
+    report("threadpool per request", *await drive(threadpool_call, reviews, args.concurrency))
+
+    batcher = MicroBatcher(
+        lambda batch: predict_reviews(batch, scorer),
+        max_batch_size=args.max_batch_size,
+        max_wait_ms=args.max_wait_ms,
+    )
+    name = f"micro-batch ({args.max_batch_size}, {args.max_wait_ms:g} ms)"
+    report(name, *await drive(batcher.submit, reviews, args.concurrency))
+    stats = batcher.stats()
+    print(f"{'':>24}  {stats['batches']} batches, mean size {stats['mean_batch_size']:.1f}")
+    await batcher.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model-dir", default="model")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=0.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""One pickled pipeline per category versus the stacked compiled model.
+
+Builds ``--categories`` per-category classifiers on the vectorizer in
+``--model-dir`` (the global model with perturbed coefficients, or the real
+``category_models.pkl`` if the model was trained with ``--category-column``)
+and compares serving them as separately pickled vectorizer + classifier pairs
+with one ``CompiledModel`` holding the stacked coefficient matrix: bytes on
+disk, load time, memory held after loading and per-review latency when
+scoring every category or a single one.
+
+    python -m benchmarks.bench_categories --model-dir model --categories 20
+"""
+import argparse
+import copy
+import os
+import pickle
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.bench_clean import build_corpus
+from benchmarks.bench_compiled import load_pipeline, percentile_us, time_single
+from preprocessing import clean_text
+from serving import CompiledModel
+from serving.compiled import current_version
+
+
+def build_category_models(model_dir, model, n, seed=42):
+    path = os.path.join(model_dir, "category_models.pkl")
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            # Categories mapped to None are served by the global model
+            return {name: m for name, m in pickle.load(f).items() if m is not None}
+    rng = np.random.default_rng(seed)
+    models = {}
+    for i in range(n):
+        category_model = copy.deepcopy(model)
+        category_model.coef_ = model.coef_ + rng.normal(0, 0.5, model.coef_.shape)
+        category_model.intercept_ = model.intercept_ + rng.normal(0, 0.5)
+        models[f"category_{i}"] = category_model
+    return models
+
+
+def measure_load(load):
+    """(loaded object, best ms of three loads, bytes still allocated after one load)"""
+    times = []
+    for _ in range(3):
+        start = time.perf_counter()
+        load()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    loaded = load()
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return loaded, min(times) * 1e3, held
+
+
+def directory_bytes(path):
+    """Bytes of the files in ``path``, or in its current version for a compiled artifact"""
+    return sum(entry.stat().st_size for entry in os.scandir(current_version(path)) if entry.is_file())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model-dir", default="model")
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--size", type=int, default=2000)
+    args = parser.parse_args()
+
+    model, vectorizer = load_pipeline(args.model_dir)
+    category_models = build_category_models(args.model_dir, model, args.categories)
+    names = list(category_models)
+    texts = [t for t in map(clean_text, build_corpus(args.size)) if t]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pickle_dir = os.path.join(tmp, "pickles")
+        os.makedirs(pickle_dir)
+        for name, category_model in category_models.items():
+            with open(os.path.join(pickle_dir, f"{name}.pkl"), "wb") as f:
+                pickle.dump((vectorizer, category_model), f)
+        compiled_dir = os.path.join(tmp, "compiled")
+        CompiledModel.from_sklearn(vectorizer, model, category_models).save(compiled_dir)
+
+        def load_pickles():
+            pipelines = {}
+            for name in names:
+                with open(os.path.join(pickle_dir, f"{name}.pkl"), "rb") as f:
+                    pipelines[name] = pickle.load(f)
+            return pipelines
+
+        pipelines, pickle_ms, pickle_held = measure_load(load_pickles)
+        compiled, compiled_ms, compiled_held = measure_load(lambda: CompiledModel.load(compiled_dir))
+        print(f"{len(names)} categories, {compiled.n_features} features, {len(texts)} cleaned reviews")
+        print(f"{'':>10} {'disk':>12} {'load':>10} {'memory':>12}")
+        print(f"{'pickles':>10} {directory_bytes(pickle_dir):>12,} {pickle_ms:8.1f}ms {pickle_held:>12,}")
+        print(f"{'compiled':>10} {directory_bytes(compiled_dir):>12,} {compiled_ms:8.1f}ms {compiled_held:>12,}")
+
+        def score_pickles(text, selected):
+            return [pipelines[name][1].predict_proba(pipelines[name][0].transform([text])) for name in selected]
+
+        one = names[:1]
+        for label, selected in [("all categories", None), ("one category", one)]:
+            pickled = time_single(lambda t: score_pickles(t, selected or names), texts)
+            stacked = time_single(lambda t: compiled.predict_categories(t, selected), texts)
+            for name, samples in [("pickles", pickled), ("compiled", stacked)]:
+                print(f"{label:>15} {name:>9}: p50 {percentile_us(samples, 50):9.1f} µs  "
+                      f"p99 {percentile_us(samples, 99):9.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
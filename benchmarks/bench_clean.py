@@ -0,0 +1,161 @@
+"""Regression check and throughput benchmark for the fast review cleaner.
+
+Compares ``preprocessing.clean_text`` against the original NLTK based cleaner
+on a corpus of reviews, checks that the training path
+(``preprocessing.dataset.preprocess_frame``) produces the same features as the
+per-request serving path, and reports the docs/sec of both cleaners.
+
+    python -m benchmarks.bench_clean
+    python -m benchmarks.bench_clean --csv data/fake_review.csv --column text_
+    python -m benchmarks.bench_clean --vectorizer model/vectorizer.pkl
+"""
+import argparse
+import pickle
+import random
+import re
+import time
+
+import nltk
+import pandas as pd
+
+from preprocessing import clean_text
+from preprocessing.dataset import preprocess_frame
+from preprocessing.stopwords import load_stopwords
+
+SAMPLE_REVIEWS = [
+    "This product is great! I love it.",
+    "Love this!  Well made, sturdy, and very comfortable.  I love it!Very pretty",
+    "I cannot believe how fast it arrived... gonna buy another one, wanna try the blue",
+    "Gotta say: lemme tell you, it's the BEST purchase I've made in 2023 (so far).",
+    "Don't waste your money -- it broke after 2 days; the seller wouldn't refund.",
+    "Five stars!!! Exactly as described, fits perfectly & looks amazing :)",
+    "Meh. It's OK I guess, nothing special for $29.99 but does the job.",
+    "The café's crème brûlée maker works well — naïve me expected less.",
+    "Gimme a break, this thing is junk. Returned it. #fail @seller",
+    "if you want quality, look elsewhere. for the price it's fine though",
+    "We bought this for our son's room and he loves it; assembly took 20 min.",
+    "def main(): print('this is code, not a review')",
+    "import os; this should be filtered as code",
+    "Short one",
+    "Works as advertised.\nBattery lasts all day.\tCharger is slow though.",
+    "snake_case_words and under_scores stay as one token, 1st 2nd 3rd",
+]
+
+
+# The installed NLTK list, so parity also covers the bundled stopwords
+NLTK_STOPWORDS = load_stopwords()
+
+
+def nltk_clean_text(text, stop_words=NLTK_STOPWORDS):
+    """The original NLTK based cleaner from main.py, kept as the reference"""
+    if not isinstance(text, str) or len(text.strip()) < 10:
+        return ""
+
+    if re.search(r'\b(import|def|function|class|return|\.py|print|for |if )\b', text):
+        return ""
+
+    text = text.lower()
+    text = re.sub(r'[^\w\s]', '', text)
+
+    try:
+        words = nltk.word_tokenize(text)
+    except LookupError:
+        # Punkt is only used to split sentences, and without punctuation
+        # there are no sentence boundaries left to find
+        words = nltk.word_tokenize(text, preserve_line=True)
+
+    words = [w for w in words if w not in stop_words and len(w) > 2]
+    return ' '.join(words)
+
+
+def build_corpus(size, seed=42):
+    """Build a synthetic corpus of short, medium and long reviews"""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        n = rng.choice([1, 1, 2, 4, 16])
+        corpus.append(' '.join(rng.choice(SAMPLE_REVIEWS) for _ in range(n)))
+    return corpus
+
+
+def load_corpus(path, column):
+    df = pd.read_csv(path, usecols=[column])
+    return df[column].dropna().astype(str).tolist()
+
+
+def check_parity(corpus):
+    """Return (index, expected, actual) for every review where the cleaners disagree"""
+    mismatches = []
+    for i, text in enumerate(corpus):
+        expected = nltk_clean_text(text)
+        actual = clean_text(text)
+        if expected != actual:
+            mismatches.append((i, expected, actual))
+    return mismatches
+
+
+def check_train_serve_parity(corpus, vectorizer=None):
+    """Return the number of reviews whose training and serving features differ"""
+    df = pd.DataFrame({'text_': corpus, 'label': 'CG'})
+    train_df = preprocess_frame(df)
+    train_texts = train_df['clean_text'].tolist()
+    serve_texts = [clean_text(text) for text in train_df['text_']]
+
+    if vectorizer is None:
+        return sum(a != b for a, b in zip(train_texts, serve_texts))
+
+    diff = vectorizer.transform(train_texts) != vectorizer.transform(serve_texts)
+    return len(set(diff.nonzero()[0]))
+
+
+def throughput(fn, corpus, repeat=3):
+    """Best docs/sec over ``repeat`` passes of ``fn`` over the corpus"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in corpus:
+            fn(text)
+        best = min(best, time.perf_counter() - start)
+    return len(corpus) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--csv", help="CSV file with reviews (defaults to a synthetic corpus)")
+    parser.add_argument("--column", default="text_", help="Review text column in the CSV")
+    parser.add_argument("--size", type=int, default=20000, help="Synthetic corpus size")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--vectorizer", help="Pickled vectorizer to compare TF-IDF features with")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.csv, args.column) if args.csv else build_corpus(args.size)
+    print(f"Corpus: {len(corpus)} reviews")
+
+    mismatches = check_parity(corpus)
+    if mismatches:
+        print(f"❌ {len(mismatches)} mismatching reviews, first few:")
+        for i, expected, actual in mismatches[:5]:
+            print(f"  #{i}\n    nltk: {expected!r}\n    fast: {actual!r}")
+    else:
+        print("✅ Fast cleaner matches the NLTK cleaner on every review")
+
+    vectorizer = None
+    if args.vectorizer:
+        with open(args.vectorizer, "rb") as f:
+            vectorizer = pickle.load(f)
+    skewed = check_train_serve_parity(corpus, vectorizer)
+    if skewed:
+        print(f"❌ {skewed} reviews get different features in training and serving")
+    else:
+        print("✅ Training and serving produce identical features")
+
+    nltk_rate = throughput(nltk_clean_text, corpus, args.repeat)
+    fast_rate = throughput(clean_text, corpus, args.repeat)
+    print(f"nltk clean_text: {nltk_rate:10.0f} docs/sec")
+    print(f"fast clean_text: {fast_rate:10.0f} docs/sec ({fast_rate / nltk_rate:.1f}x)")
+
+    return 1 if mismatches or skewed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
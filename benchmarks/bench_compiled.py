@@ -0,0 +1,124 @@
+"""Parity check and latency benchmark for the compiled scorer.
+
+Scores the same cleaned reviews with the sklearn pipeline
+(``vectorizer.transform`` + ``model.predict_proba``) and with
+``serving.CompiledModel``, reports the largest probability difference, any
+label disagreements, per-review latency for single and batched scoring, and
+the load time of the pickles versus the memory-mapped compiled artifact.
+
+    python -m benchmarks.bench_compiled --model-dir model
+"""
+import argparse
+import os
+import pickle
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.bench_clean import build_corpus, load_corpus
+from preprocessing import clean_text
+from serving import CompiledModel
+
+
+def load_pipeline(model_dir):
+    with open(os.path.join(model_dir, "fake_review_model.pkl"), "rb") as f:
+        model = pickle.load(f)
+    with open(os.path.join(model_dir, "vectorizer.pkl"), "rb") as f:
+        vectorizer = pickle.load(f)
+    return model, vectorizer
+
+
+def check_parity(model, vectorizer, compiled, texts, tolerance=1e-5):
+    """Return (max probability difference, number of label disagreements)"""
+    expected = model.predict_proba(vectorizer.transform(texts))[:, 1]
+    expected_labels = model.predict(vectorizer.transform(texts))
+    actual = np.array([compiled.predict_proba(t) for t in texts])
+    actual_labels = np.array([compiled.predict(t)[0] for t in texts])
+
+    max_diff = float(np.abs(expected - actual).max()) if len(texts) else 0.0
+    # Reviews sitting right on the decision boundary may flip within float32 error
+    ambiguous = np.abs(expected - 0.5) < tolerance
+    disagreements = int(((expected_labels != actual_labels) & ~ambiguous).sum())
+    return max_diff, disagreements
+
+
+def percentile_us(samples, q):
+    return float(np.percentile(samples, q)) * 1e6
+
+
+def time_single(fn, texts):
+    samples = []
+    for text in texts:
+        start = time.perf_counter()
+        fn(text)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def time_loads(model_dir, compiled, repeat=5):
+    """Best load time in ms of the two pickles and of the compiled artifact"""
+    pickle_times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        load_pipeline(model_dir)
+        pickle_times.append(time.perf_counter() - start)
+
+    compiled_times = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "compiled")
+        compiled.save(path)
+        for _ in range(repeat):
+            start = time.perf_counter()
+            CompiledModel.load(path)
+            compiled_times.append(time.perf_counter() - start)
+
+    return min(pickle_times) * 1e3, min(compiled_times) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model-dir", default="model")
+    parser.add_argument("--csv", help="CSV file with reviews (defaults to a synthetic corpus)")
+    parser.add_argument("--column", default="text_")
+    parser.add_argument("--size", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    model, vectorizer = load_pipeline(args.model_dir)
+    compiled = CompiledModel.from_sklearn(vectorizer, model)
+
+    corpus = load_corpus(args.csv, args.column) if args.csv else build_corpus(args.size)
+    texts = [t for t in map(clean_text, corpus) if t]
+    print(f"Corpus: {len(texts)} cleaned reviews, {compiled.n_features} features")
+
+    max_diff, disagreements = check_parity(model, vectorizer, compiled, texts)
+    status = "✅" if disagreements == 0 and max_diff < 1e-4 else "❌"
+    print(f"{status} max |Δp| = {max_diff:.2e}, label disagreements = {disagreements}")
+
+    sklearn_single = time_single(lambda t: model.predict_proba(vectorizer.transform([t])), texts)
+    compiled_single = time_single(compiled.predict_proba, texts)
+    for name, samples in [("sklearn", sklearn_single), ("compiled", compiled_single)]:
+        print(f"{name:>9} single: p50 {percentile_us(samples, 50):8.1f} µs  "
+              f"p99 {percentile_us(samples, 99):8.1f} µs")
+
+    batches = [texts[i:i + args.batch_size] for i in range(0, len(texts), args.batch_size)]
+    start = time.perf_counter()
+    for batch in batches:
+        model.predict_proba(vectorizer.transform(batch))
+    sklearn_batch = (time.perf_counter() - start) / len(texts)
+    start = time.perf_counter()
+    for batch in batches:
+        [compiled.predict_proba(t) for t in batch]
+    compiled_batch = (time.perf_counter() - start) / len(texts)
+    print(f"  sklearn batch({args.batch_size}): {sklearn_batch * 1e6:8.1f} µs/review")
+    print(f" compiled batch({args.batch_size}): {compiled_batch * 1e6:8.1f} µs/review")
+
+    pickle_ms, compiled_ms = time_loads(args.model_dir, compiled)
+    print(f"load: pickles {pickle_ms:.1f} ms, compiled (mmap) {compiled_ms:.1f} ms")
+
+    return 0 if status == "✅" else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,81 @@
+"""Worst-case latency of the /predict pipeline on adversarial reviews.
+
+Scores each payload below through ``predict_reviews`` as-is and behind
+``InputGuard`` (what main.py does before cleaning), and reports the slowest of
+``--repeat`` runs for both, plus the size of what was actually scored.
+
+    python -m benchmarks.bench_input_guards --model-dir model --size-mb 2
+"""
+import argparse
+import random
+import time
+
+from serving.compiled import load_model
+from serving.guards import InputGuard
+from serving.pipeline import predict_reviews
+
+
+def build_payloads(size, seed=42):
+    rng = random.Random(seed)
+    words = [''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(3, 9)))
+             for _ in range(50000)]
+    distinct = []
+    total = 0
+    while total < size:
+        word = rng.choice(words)
+        distinct.append(word)
+        total += len(word) + 1
+    distinct = ' '.join(distinct)
+    return {
+        "normal review": "Great product, arrived quickly and works exactly as described. Would buy again!",
+        "random words": distinct[:size],
+        "one giant token": "a" * size,
+        "punctuation only": "!?." * (size // 3),
+        "whitespace padding": " " * size + "great product",
+        "code at the end": ("nice product " * (size // 13)) + "import os",
+        "accented text": ("crème brûlée café naïve " * (size // 24)),
+        "repeated bigrams": "love it " * (size // 8),
+    }
+
+
+def worst_case(fn, repeat):
+    worst = 0.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        worst = max(worst, time.perf_counter() - start)
+    return worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model-dir", default="model")
+    parser.add_argument("--size-mb", type=float, default=2.0, help="Size of each adversarial review")
+    parser.add_argument("--max-review-chars", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    scorer = load_model(args.model_dir)
+    guard = InputGuard(max_review_chars=args.max_review_chars)
+    payloads = build_payloads(int(args.size_mb * 1024 * 1024))
+
+    def guarded(review):
+        text, error, _ = guard.check(review)
+        if error is None:
+            predict_reviews([text], scorer)
+        return len(text) if text else 0
+
+    print(f"{'payload':>20} {'chars':>10} {'unguarded':>11} {'guarded':>9} {'scored':>8}")
+    worst = {"unguarded": 0.0, "guarded": 0.0}
+    for name, review in payloads.items():
+        unguarded = worst_case(lambda: predict_reviews([review], scorer), args.repeat)
+        protected = worst_case(lambda: guarded(review), args.repeat)
+        worst["unguarded"] = max(worst["unguarded"], unguarded)
+        worst["guarded"] = max(worst["guarded"], protected)
+        print(f"{name:>20} {len(review):>10,} {unguarded * 1e3:9.1f}ms {protected * 1e3:7.2f}ms "
+              f"{guarded(review):>8,}")
+    print(f"\n⏱️ Worst case: {worst['unguarded'] * 1e3:.1f} ms unguarded, {worst['guarded'] * 1e3:.2f} ms guarded")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Per-request cost of logging on the /predict path.
+
+Scores reviews one at a time, as /predict does, and logs them four ways:
+
+  off        no per-request log lines
+  sync       the old handler: two f-string INFO lines per request (including
+             the first 50 characters of the review) written synchronously
+  queue      one lazily formatted line per request through ``setup_logging``
+             (queue handler + background writer thread)
+  sampled    the same with ``LogSampler(--sample-rate)``
+
+and reports the request-path time per review and the overhead over ``off``.
+Logs go to ``--log-file`` (a temporary file by default); point it at a pipe or
+a slow disk to see the synchronous handler block.
+
+    python -m benchmarks.bench_logging --model-dir model --requests 20000
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from benchmarks.bench_clean import build_corpus
+from serving.compiled import load_model
+from serving.logs import LogSampler, setup_logging
+from serving.pipeline import predict_reviews
+
+logger = logging.getLogger("bench_logging")
+
+
+def use_sync_handler(stream):
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
+
+
+def run(reviews, scorer, log):
+    start = time.perf_counter()
+    for review in reviews:
+        result = predict_reviews([review], scorer)[0]
+        log(review, result)
+    return (time.perf_counter() - start) / len(reviews)
+
+
+def log_off(review, result):
+    pass
+
+
+def log_sync(review, result):
+    logger.info(f"📥 Received review: {review[:50]}...")
+    if "error" not in result:
+        logger.info(f"🔮 Prediction: {result['prediction']} (Confidence: {result['confidence']:.2f})")
+
+
+def log_queued(sample):
+    def log(review, result):
+        if "error" not in result and sample():
+            logger.info("🔮 Prediction: %s (Confidence: %.2f, %d chars)",
+                        result["prediction"], result["confidence"], len(review))
+    return log
+
+
+def wait_until_written(listener):
+    start = time.perf_counter()
+    while not listener.queue.empty():
+        time.sleep(0.001)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model-dir", default="model")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--sample-rate", type=float, default=0.1)
+    parser.add_argument("--log-file", help="Where log lines are written (default: a temporary file)")
+    args = parser.parse_args()
+
+    scorer = load_model(args.model_dir)
+    reviews = build_corpus(args.requests)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.log_file or os.path.join(tmp, "bench.log")
+        with open(path, "a", encoding="utf-8") as stream:
+            run(reviews[:1000], scorer, log_off)
+
+            timings = {"off": run(reviews, scorer, log_off)}
+            use_sync_handler(stream)
+            timings["sync"] = run(reviews, scorer, log_sync)
+
+            listener = setup_logging(stream=stream)
+            timings["queue"] = run(reviews, scorer, log_queued(LogSampler(1.0)))
+            drain = wait_until_written(listener)
+            timings[f"sampled ({args.sample_rate:g})"] = run(
+                reviews, scorer, log_queued(LogSampler(args.sample_rate)))
+            wait_until_written(listener)
+
+    baseline = timings["off"]
+    for name, per_review in timings.items():
+        print(f"{name:>16}: {per_review * 1e6:7.1f} µs/request  "
+              f"(+{(per_review - baseline) * 1e6:5.1f} µs)")
+    print(f"{'':>16}  writer thread finished the queue {drain * 1e3:.1f} ms after the last request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Lookup latency and recall of the near-duplicate index.
+
+Fills ``NearDuplicateIndex`` with ``--reviews`` synthetic reviews of which
+``--templated`` percent are noisy copies of a few fake templates (every word
+replaced with probability ``--noise``), then reports the per-review cost of
+``observe`` (signature + lookup + insert), of a read-only ``query``, how many
+templated copies were found as near-duplicates of a fake, and how many
+unrelated reviews were wrongly matched.
+
+    python -m benchmarks.bench_near_duplicates --reviews 50000 --max-entries 20000
+"""
+import argparse
+import random
+import time
+
+from preprocessing import clean_text
+from serving.near_duplicates import NearDuplicateIndex
+
+TEMPLATES = [
+    "Absolutely amazing blender, crushes ice perfectly and the motor is super quiet. Whole family loves it",
+    "Best headphones ever purchased, crystal clear sound and battery lasts forever. Highly recommend seller",
+    "Fantastic quality shoes, comfortable right out of the box and arrived quickly. Five stars",
+]
+VOCABULARY = ("good bad great product quality price shipping fast slow love hate broke works cheap value "
+              "recommend seller box color size fit battery sound comfortable sturdy flimsy").split()
+
+
+def build_traffic(n, templated, noise, seed=42):
+    """(cleaned review, is a templated copy) pairs"""
+    rng = random.Random(seed)
+    traffic = []
+    while len(traffic) < n:
+        if rng.random() < templated:
+            words = rng.choice(TEMPLATES).split()
+            text = ' '.join(w if rng.random() > noise else rng.choice(VOCABULARY) for w in words)
+            copy = True
+        else:
+            text = ' '.join(rng.choice(VOCABULARY) for _ in range(rng.randint(6, 60)))
+            copy = False
+        cleaned = clean_text(text)
+        if cleaned:
+            traffic.append((cleaned, copy))
+    return traffic
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reviews", type=int, default=50000)
+    parser.add_argument("--max-entries", type=int, default=20000)
+    parser.add_argument("--templated", type=float, default=0.2, help="Share of templated copies")
+    parser.add_argument("--noise", type=float, default=0.1, help="Chance each template word is replaced")
+    parser.add_argument("--threshold", type=float, default=0.6)
+    args = parser.parse_args()
+
+    traffic = build_traffic(args.reviews, args.templated, args.noise)
+    index = NearDuplicateIndex(max_entries=args.max_entries, threshold=args.threshold)
+    # The templates themselves were scored as fake
+    for template in TEMPLATES:
+        index.observe(clean_text(template), True)
+
+    found = false_matches = copies = 0
+    start = time.perf_counter()
+    for cleaned, copy in traffic:
+        _, _, near_fake = index.observe(cleaned, copy)
+        copies += copy
+        found += copy and near_fake
+        false_matches += near_fake and not copy
+    observe = (time.perf_counter() - start) / len(traffic)
+
+    sample = [cleaned for cleaned, _ in traffic[-5000:]]
+    start = time.perf_counter()
+    for cleaned in sample:
+        index.query(cleaned)
+    query = (time.perf_counter() - start) / len(sample)
+
+    stats = index.stats()
+    print(f"📇 {len(traffic):,} reviews, index holds {stats['size']:,} in {stats['clusters']:,} clusters "
+          f"({stats['evictions']:,} evicted)")
+    print(f"  observe: {observe * 1e6:7.1f} µs/review")
+    print(f"  query:   {query * 1e6:7.1f} µs/review")
+    print(f"  templated copies flagged as near a fake: {found:,}/{copies:,} ({found / max(copies, 1):.1%})")
+    print(f"  unrelated reviews flagged: {false_matches:,}/{len(traffic) - copies:,}")
+
+
+if __name__ == "__main__":
+    main()
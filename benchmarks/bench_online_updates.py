@@ -0,0 +1,73 @@
+"""Cost and effect of online updates from feedback.
+
+Replays ``--feedback`` labelled reviews from ``--data`` as moderator feedback
+in updates of ``--min-batch`` records onto the model in ``--model-dir``, and
+reports how long each update takes (vectorize + SGD + save + reload) and the
+F1 on ``--test`` other held-out reviews before and after. Everything is
+written to a temporary directory; ``--model-dir`` is not modified.
+
+    python -m benchmarks.bench_online_updates --model-dir model --data data/fake_review.csv
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import f1_score
+
+from preprocessing import clean_text
+from preprocessing.dataset import LABEL_MAP
+from serving.feedback import FeedbackLog, OnlineUpdater
+from serving.registry import ModelRegistry
+
+
+def held_out_f1(model, texts, labels):
+    return f1_score(labels, [model.predict(text)[0] for text in texts])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model-dir", default="model")
+    parser.add_argument("--data", required=True, help="Labelled CSV (label column CG/OR)")
+    parser.add_argument("--column", default="text_")
+    parser.add_argument("--feedback", type=int, default=2000)
+    parser.add_argument("--test", type=int, default=2000)
+    parser.add_argument("--min-batch", type=int, default=100)
+    parser.add_argument("--learning-rate", type=float, default=0.5)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.data, usecols=[args.column, "label"]).dropna()
+    df = df.sample(min(len(df), args.feedback + args.test), random_state=42)
+    df["label"] = df["label"].map(LABEL_MAP)
+    feedback, test = df.iloc[:args.feedback], df.iloc[args.feedback:]
+    test = test.assign(clean=test[args.column].map(clean_text))
+    test = test[test["clean"] != ""]
+
+    registry = ModelRegistry(args.model_dir)
+    registry.reload()
+    before = held_out_f1(registry.active.model, test["clean"], test["label"])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log = FeedbackLog(os.path.join(tmp, "feedback.jsonl"))
+        updater = OnlineUpdater(registry, log, os.path.join(tmp, "model"),
+                                min_batch=args.min_batch, learning_rate=args.learning_rate)
+        timings = []
+        for start in range(0, len(feedback), args.min_batch):
+            batch = feedback.iloc[start:start + args.min_batch]
+            for review, label in zip(batch[args.column], batch["label"]):
+                log.append(review, int(label))
+            started = time.perf_counter()
+            updater.update(force=True)
+            timings.append(time.perf_counter() - started)
+        after = held_out_f1(registry.active.model, test["clean"], test["label"])
+
+    print(f"🧠 {len(timings)} updates of {args.min_batch} feedback reviews "
+          f"({registry.active.model.n_features:,} features)")
+    print(f"  update: p50 {np.percentile(timings, 50) * 1e3:.1f} ms, max {max(timings) * 1e3:.1f} ms")
+    print(f"  held-out F1 on {len(test):,} reviews: {before:.4f} -> {after:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Scaling curve of the process-pool inference mode.
+
+Scores the same corpus in-process and through ``InferencePool`` with 1, 2,
+4, ... workers (up to ``--max-workers``, default all cores). For each setting
+it reports throughput and speedup over the in-process baseline. Worker
+caches are disabled so every review is really scored.
+
+    python -m benchmarks.bench_process_pool --model-dir model
+"""
+import argparse
+import os
+import time
+
+from benchmarks.bench_clean import build_corpus
+from serving.compiled import load_model
+from serving.pipeline import predict_reviews
+from serving.process_pool import InferencePool
+
+
+def worker_counts(max_workers):
+    n = 1
+    while n < max_workers:
+        yield n
+        n *= 2
+    yield max_workers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model-dir", default="model")
+    parser.add_argument("--reviews", type=int, default=100000)
+    parser.add_argument("--chunk-size", type=int, default=256)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    reviews = build_corpus(args.reviews)
+    scorer = load_model(args.model_dir)
+
+    start = time.perf_counter()
+    predict_reviews(reviews, scorer)
+    baseline = len(reviews) / (time.perf_counter() - start)
+    print(f"{'in-process':>12}: {baseline:9.0f} reviews/s")
+
+    for n in worker_counts(args.max_workers):
+        with InferencePool(args.model_dir, size=n, cache_size=0) as pool:
+            start = time.perf_counter()
+            pool.score_many(reviews, chunk_size=args.chunk_size)
+            rate = len(reviews) / (time.perf_counter() - start)
+        print(f"{n:>4} workers: {rate:9.0f} reviews/s  ({rate / baseline:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
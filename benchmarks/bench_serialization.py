@@ -0,0 +1,89 @@
+"""Encoding cost and size of prediction responses.
+
+Builds responses like the API does (one result for /predict, ``--batch-size``
+results for /predict/batch) from synthetic reviews and times encoding them:
+
+  fastapi       returning the dict: jsonable_encoder + JSONResponse.render
+  json          json.dumps(separators=(",", ":"))
+  orjson        serving.wire.dumps_json
+  msgpack       serving.wire.dumps_msgpack
+  ... lean      the same with serving.wire.lean_result (no echoed review)
+
+and what gzip adds on top of the batch body at a few levels.
+
+    python -m benchmarks.bench_serialization --batch-size 256
+"""
+import argparse
+import gzip
+import json
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from benchmarks.bench_clean import build_corpus
+from serving import wire
+
+
+def build_results(n, seed=42):
+    results = []
+    for i, review in enumerate(build_corpus(n, seed)):
+        if i % 10 == 9:
+            results.append({"input": review, "error": "Invalid review. Too short or contains code patterns."})
+        else:
+            results.append({"input": review, "prediction": "Fake Review" if i % 2 else "Real Review",
+                            "confidence": 0.5 + (i % 50) / 100})
+    return results
+
+
+def per_call(fn, payload, min_seconds=0.5):
+    """Seconds per call of ``fn(payload)`` and its output size"""
+    body = fn(payload)
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        for _ in range(100):
+            fn(payload)
+        calls += 100
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return elapsed / calls, len(body)
+
+
+def encoders():
+    yield "fastapi", lambda p: JSONResponse(jsonable_encoder(p)).body
+    yield "json", lambda p: json.dumps(p, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if wire.orjson is not None:
+        yield "orjson", wire.dumps_json
+    if wire.msgpack is not None:
+        yield "msgpack", wire.dumps_msgpack
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    results = build_results(args.batch_size)
+    payloads = {
+        "/predict": results[0],
+        "/predict lean": wire.lean_result(results[0]),
+        "/predict/batch": {"results": results},
+        "/predict/batch lean": {"results": [wire.lean_result(r) for r in results]},
+    }
+
+    print(f"{'response':>20} {'encoder':>8} {'µs/request':>11} {'bytes':>9}")
+    for name, payload in payloads.items():
+        for encoder, fn in encoders():
+            seconds, size = per_call(fn, payload)
+            print(f"{name:>20} {encoder:>8} {seconds * 1e6:11.1f} {size:>9,}")
+
+    body = wire.dumps_json(payloads["/predict/batch"])
+    print(f"\ngzip of the {len(body):,} byte batch body:")
+    for level in (1, 5, 9):
+        seconds, size = per_call(lambda b: gzip.compress(b, compresslevel=level), body)
+        print(f"  level {level}: {seconds * 1e6:8.1f} µs, {size:,} bytes ({size / len(body):.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""Pruned and quantized exports of the compiled model for edge scoring nodes.
+
+For every ``--thresholds`` x ``--dtypes`` combination the compiled model in
+``--model-dir`` is pruned (terms whose coefficients are all below the
+threshold in magnitude are dropped from the vocabulary and the weights) and
+saved with float32, float16 or int8 coefficients. Each export is loaded back
+the way the API loads it and reported with its artifact size, load time,
+per-review scoring latency and F1 on the reviews ``train_model.py`` held
+out, next to the change from the unpruned float32 model. The held-out split
+is redrawn the way the compiled manifest records it (``train_test_split``
+for the tfidf learner, the per-row mask of the streaming sgd learner); if
+the artifact does not record one and it is not a tfidf model, F1 is not
+reported.
+
+    python export_model.py --data data/fake_review.csv --thresholds 0,0.05,0.1,0.2
+    python export_model.py --data data/fake_review.csv --threshold 0.1 --dtype int8 --output model-edge/compiled
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+from sklearn.metrics import f1_score
+from sklearn.model_selection import train_test_split
+
+from preprocessing.corpus import DEFAULT_CACHE_DIR
+from serving.compiled import (COEF_DTYPES, CompiledModel, artifact_path, current_version, load_model,
+                              read_manifest)
+from train_model import (DEFAULT_DATA_PATH, TFIDF_HOLDOUT, load_training_frame, split_batches,
+                         training_batches)
+
+
+def recorded_holdout(model_dir, compiled):
+    """How train_model.py drew the held-out split of the model in ``model_dir``, or None if unknown"""
+    path = artifact_path(model_dir)
+    holdout = read_manifest(path).get("training", {}).get("holdout") if path is not None else None
+    if holdout is None and compiled.vectorizer == "tfidf":
+        # Trained before the split was recorded; the tfidf learner always used this one
+        return dict(TFIDF_HOLDOUT)
+    return holdout
+
+
+def held_out_reviews(holdout, data_path, text_column="text_", cache_dir=DEFAULT_CACHE_DIR, processes=1):
+    """The cleaned reviews and labels train_model.py held out, redrawn as ``holdout`` records"""
+    if holdout["method"] == "train_test_split":
+        df = load_training_frame(data_path, text_column, processes=processes, cache_dir=cache_dir)
+        _, X_test, _, y_test = train_test_split(
+            df['clean_text'], df['label'].to_numpy(),
+            test_size=holdout["test_size"], random_state=holdout["random_state"]
+        )
+        return X_test.tolist(), y_test
+    if holdout["method"] == "row_mask":
+        texts, labels = [], []
+        batches = training_batches(data_path, text_column, processes=processes, cache_dir=cache_dir)
+        for batch_texts, batch_labels, held_out in split_batches(batches, holdout["test_size"], holdout["seed"]):
+            room = holdout["max_test_rows"] - len(texts)
+            texts.extend(batch_texts[held_out][:room])
+            labels.extend(batch_labels[held_out][:room])
+        return texts, np.asarray(labels)
+    raise ValueError(f"Unknown hold-out method: {holdout['method']}")
+
+
+def sample_reviews(data_path, n, text_column="text_", cache_dir=DEFAULT_CACHE_DIR, processes=1):
+    """The first ``n`` cleaned reviews, for timing when there is no known held-out split"""
+    texts = []
+    for batch_texts, _ in training_batches(data_path, text_column, processes=processes, cache_dir=cache_dir)():
+        texts.extend(batch_texts[:n - len(texts)])
+        if len(texts) >= n:
+            break
+    return texts
+
+
+def directory_size(path):
+    """Bytes of the artifact version current in ``path``"""
+    return sum(entry.stat().st_size for entry in os.scandir(current_version(path)) if entry.is_file())
+
+
+def export(compiled, threshold, coef_dtype, path):
+    """Prune ``compiled`` at ``threshold`` and save it to ``path`` with ``coef_dtype`` weights"""
+    if threshold > 0:
+        compiled = compiled.prune(threshold)
+    compiled.save(path, coef_dtype=coef_dtype)
+    return compiled
+
+
+def measure(path, texts, labels, n_latency=1000):
+    """Size, load time, latency and F1 (None without ``labels``) of the artifact at ``path``"""
+    load_times = []
+    for _ in range(3):
+        start = time.perf_counter()
+        loaded = CompiledModel.load(path)
+        load_times.append(time.perf_counter() - start)
+
+    sample = texts[:n_latency]
+    samples = []
+    for text in sample:
+        start = time.perf_counter()
+        loaded.predict(text)
+        samples.append(time.perf_counter() - start)
+    return {
+        "n_features": loaded.n_features,
+        "artifact_bytes": directory_size(path),
+        "load_ms": min(load_times) * 1e3,
+        "latency_us": float(np.median(samples)) * 1e6,
+        "f1": f1_score(labels, [loaded.predict(text)[0] for text in texts]) if labels is not None else None,
+    }
+
+
+def print_report(rows):
+    print(f"\n{'threshold':>9} {'dtype':>7} {'features':>8} {'artifact':>9} {'load':>8} "
+          f"{'latency':>9} {'f1':>7} {'ΔF1':>8}")
+    for row in rows:
+        f1 = f"{row['f1']:7.4f} {row['delta_f1']:+8.4f}" if row["f1"] is not None else f"{'n/a':>7} {'n/a':>8}"
+        print(f"{row['threshold']:>9g} {row['coef_dtype']:>7} {row['n_features']:>8} "
+              f"{row['artifact_bytes'] / 1024:7.0f}KB {row['load_ms']:6.2f}ms {row['latency_us']:7.1f}µs {f1}")
+
+
+def parse_list(kind):
+    return lambda value: [kind(v) for v in value.split(",")]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model-dir", default="model")
+    parser.add_argument("--data", default=DEFAULT_DATA_PATH, help="The labelled CSV the model was trained on")
+    parser.add_argument("--text-column", default="text_")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--thresholds", type=parse_list(float), default=[0, 0.01, 0.05, 0.1, 0.2, 0.5])
+    parser.add_argument("--dtypes", type=parse_list(str), default=list(COEF_DTYPES))
+    parser.add_argument("--latency-reviews", type=int, default=1000)
+    parser.add_argument("--threshold", type=float, help="Prune threshold of the artifact written to --output")
+    parser.add_argument("--dtype", choices=COEF_DTYPES, default="int8")
+    parser.add_argument("--output", help="Write the --threshold/--dtype export here")
+    parser.add_argument("-o", "--report", help="Write the report as JSON here")
+    args = parser.parse_args(argv)
+
+    compiled = load_model(args.model_dir)
+    if compiled.vectorizer == "hashing" and any(t > 0 for t in args.thresholds):
+        print("⚠️ Hashed models cannot be pruned, only quantized")
+        args.thresholds = [0]
+    holdout = recorded_holdout(args.model_dir, compiled)
+    if holdout is None:
+        print("⚠️ The artifact does not record its held-out split; reporting size and latency without F1")
+        texts = sample_reviews(args.data, args.latency_reviews, args.text_column, args.cache_dir, args.processes)
+        labels = None
+    else:
+        texts, labels = held_out_reviews(holdout, args.data, args.text_column, args.cache_dir, args.processes)
+    print(f"📦 {compiled.n_features} features, {len(texts):,} {'held-out' if labels is not None else 'sample'} reviews")
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        baseline_path = os.path.join(tmp, "baseline")
+        compiled.save(baseline_path)
+        baseline = measure(baseline_path, texts, labels, args.latency_reviews)
+        for threshold in args.thresholds:
+            for coef_dtype in args.dtypes:
+                path = os.path.join(tmp, f"{threshold:g}-{coef_dtype}")
+                export(compiled, threshold, coef_dtype, path)
+                row = {"threshold": threshold, "coef_dtype": coef_dtype,
+                       **measure(path, texts, labels, args.latency_reviews)}
+                row["delta_f1"] = row["f1"] - baseline["f1"] if labels is not None else None
+                rows.append(row)
+    print_report(rows)
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(rows, f, indent=2)
+        print(f"✅ Report written to {args.report}")
+
+    if args.output:
+        exported = export(compiled, args.threshold or 0, args.dtype, args.output)
+        print(f"✅ {exported.n_features} features with {args.dtype} weights "
+              f"({directory_size(args.output) / 1024:.0f} KB) exported to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,232 @@
+"""Benchmark suite for the review scoring hot path.
+
+Stages (``--mode``):
+
+  micro      microbenchmarks of clean_text, vectorizer.transform,
+             model.predict_proba and the compiled scorer, one review at a
+             time, on short/medium/long review corpora
+  inprocess  drives the FastAPI app in-process (httpx + ASGI transport)
+  http       drives a running server, e.g. a local uvicorn, over HTTP
+  all        micro + inprocess
+
+Requests for the API stages come from a JSONL file (``--requests-file``,
+default benchmarks/sample_requests.jsonl, a small sample of real-world style
+reviews of mixed length). Each line is a JSON string or an object with a
+``review`` field, as in POST /predict/stream. A synthetic corpus is used when
+the file is missing or holds no reviews. The in-process stage serves
+``--model-dir``. The report is JSON with throughput,
+p50/p95/p99 latency and RSS for every stage.
+
+    python load_test.py --mode all -o report.json
+    python load_test.py --mode http --url http://localhost:8000 --concurrency 64 --server-pid 1234
+"""
+import argparse
+import asyncio
+import json
+import os
 import pickle
+import random
+import resource
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.bench_clean import SAMPLE_REVIEWS, build_corpus
+from preprocessing import clean_text
+from serving.compiled import load_model
+
+CORPUS_LENGTHS = {"short": 1, "medium": 4, "long": 32}
+DEFAULT_REQUESTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "sample_requests.jsonl")
+
+
+# ---- MEASUREMENT ----
+def summarize(samples, elapsed):
+    ms = np.asarray(samples) * 1e3
+    return {
+        "count": len(samples),
+        "throughput_per_s": len(samples) / elapsed if elapsed else 0.0,
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+    }
+
+
+def rss_mb(pid="self"):
+    """Current resident set size of a process in MB (Linux /proc), or None"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+def memory_report(server_pid=None):
+    report = {
+        "rss_mb": rss_mb(),
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+    if server_pid:
+        report["server_rss_mb"] = rss_mb(server_pid)
+    return report
+
+
+def time_each(fn, items):
+    samples = []
+    start = time.perf_counter()
+    for item in items:
+        t = time.perf_counter()
+        fn(item)
+        samples.append(time.perf_counter() - t)
+    return summarize(samples, time.perf_counter() - start)
+
+
+# ---- REQUEST SOURCE ----
+def load_requests(path, n):
+    """Up to ``n`` reviews from a JSONL file, cycled if shorter; synthetic if unusable"""
+    reviews = []
+    if path and os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict):
+                    record = record.get("review")
+                if isinstance(record, str):
+                    reviews.append(record)
+    if not reviews:
+        return build_corpus(n)
+    return [reviews[i % len(reviews)] for i in range(n)]
+
+
+# ---- MICROBENCHMARKS ----
+def length_corpus(n_samples, size, seed=42):
+    """``size`` reviews, each ``n_samples`` valid sample reviews long"""
+    rng = random.Random(seed)
+    samples = [r for r in SAMPLE_REVIEWS if clean_text(r)]
+    return [" ".join(rng.choice(samples) for _ in range(n_samples)) for _ in range(size)]
+
+
+def run_micro(model_dir, size):
+    scorer = load_model(model_dir)
+    model = vectorizer = None
+    model_path = os.path.join(model_dir, "fake_review_model.pkl")
+    vectorizer_path = os.path.join(model_dir, "vectorizer.pkl")
+    if os.path.exists(model_path) and os.path.exists(vectorizer_path):
+        with open(model_path, "rb") as f:
+            model = pickle.load(f)
+        with open(vectorizer_path, "rb") as f:
+            vectorizer = pickle.load(f)
+
+    report = {}
+    for name, n_reviews in CORPUS_LENGTHS.items():
+        raw = length_corpus(n_reviews, size)
+        cleaned = [clean_text(t) for t in raw]
+        stages = {
+            "mean_chars": float(np.mean([len(t) for t in raw])),
+            "clean_text": time_each(clean_text, raw),
+            "compiled_predict_proba": time_each(scorer.predict_proba, cleaned),
+        }
+        if vectorizer is not None:
+            stages["vectorizer_transform"] = time_each(lambda t: vectorizer.transform([t]), cleaned)
+            matrices = [vectorizer.transform([t]) for t in cleaned]
+            stages["model_predict_proba"] = time_each(model.predict_proba, matrices)
+        report[name] = stages
+    return report
+
+
+# ---- API LOAD ----
+async def drive_api(client, reviews, concurrency, batch_size):
+    latencies = []
+    errors = 0
+    if batch_size > 1:
+        payloads = [("/predict/batch", {"reviews": reviews[i:i + batch_size]})
+                    for i in range(0, len(reviews), batch_size)]
+    else:
+        payloads = [("/predict", {"review": review}) for review in reviews]
+    pending = iter(payloads)
+
+    async def worker():
+        nonlocal errors
+        for path, payload in pending:
+            t = time.perf_counter()
+            response = await client.post(path, json=payload)
+            latencies.append(time.perf_counter() - t)
+            if response.status_code != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    report = summarize(latencies, elapsed)
+    report["reviews_per_s"] = len(reviews) / elapsed
+    report["errors"] = errors
+    report["concurrency"] = concurrency
+    report["batch_size"] = batch_size
+    return report
+
+
+async def run_inprocess(model_dir, reviews, concurrency, batch_size):
+    import httpx
+
+    # main reads MODEL_DIR at import time
+    os.environ["MODEL_DIR"] = model_dir
+    import main
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with main.app.router.lifespan_context(main.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://inprocess") as client:
+            return await drive_api(client, reviews, concurrency, batch_size)
+
+
+async def run_http(url, reviews, concurrency, batch_size):
+    import httpx
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        return await drive_api(client, reviews, concurrency, batch_size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=["micro", "inprocess", "http", "all"], default="all")
+    parser.add_argument("--model-dir", default=os.path.join(os.getcwd(), "model"))
+    parser.add_argument("--requests-file", default=DEFAULT_REQUESTS_FILE)
+    parser.add_argument("--requests", type=int, default=5000, help="Reviews to send per API stage")
+    parser.add_argument("--micro-size", type=int, default=2000, help="Reviews per micro corpus")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--batch-size", type=int, default=1, help=">1 sends /predict/batch requests")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--server-pid", type=int, help="PID of the server, to report its RSS")
+    parser.add_argument("-o", "--output", help="Write the JSON report here (default: stdout)")
+    args = parser.parse_args()
+
+    report = {"mode": args.mode, "started_at": time.time(), "python": sys.version.split()[0]}
+    if args.mode in ("micro", "all"):
+        report["micro"] = run_micro(args.model_dir, args.micro_size)
+    if args.mode in ("inprocess", "all", "http"):
+        reviews = load_requests(args.requests_file, args.requests)
+        if args.mode == "http":
+            report["http"] = asyncio.run(run_http(args.url, reviews, args.concurrency, args.batch_size))
+        else:
+            report["inprocess"] = asyncio.run(run_inprocess(args.model_dir, reviews, args.concurrency,
+                                                            args.batch_size))
+    report["memory"] = memory_report(args.server_pid)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+        print(f"✅ Report written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
 
-# Load the saved model and vectorizer
-model = pickle.load(open("model/fake_review_model.pkl", "rb"))
-vectorizer = pickle.load(open("model/vectorizer.pkl", "rb"))
 
-print("✅ Model and vectorizer successfully loaded.")
+if __name__ == "__main__":
+    main()
@@ -1,94 +1,345 @@
+import hmac
 import os
-import re
-import pickle
+import time
 import logging
-import nltk
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager, contextmanager
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-import shutil
-import requests
-import zipfile
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from serving import MicroBatcher, PredictionCache
+from serving.compiled import MANIFEST_FILE, artifact_path
+from serving.feedback import FEEDBACK_LABELS, FeedbackLog, OnlineUpdater
+from serving.guards import BodySizeLimitMiddleware, InputGuard
+from serving.logs import LogSampler, setup_logging
+from serving.metrics import MetricsMiddleware, PipelineMetrics, stats_collector
+from serving.near_duplicates import NearDuplicateIndex
+from serving.pipeline import SIGNATURE_FIELD, category_reviews, explain_reviews, predict_reviews
+from serving.process_pool import InferencePool
+from serving.profiler import render_collapsed, sample_stacks
+from serving.registry import ModelRegistry, ShadowScorer
+from serving.streaming import aiter_lines, score_lines
+from serving.wire import dumps_json, encode, encode_stream_chunk, lean_result, maybe_gzip, wants_msgpack
 
 # Set up logging
-logging.basicConfig(level=logging.INFO)
+# The lifespan installs the handlers (importing main changes no global state).
+# Records are written by a background thread; LOG_SAMPLE_RATE (0-1) keeps
+# that fraction of the per-request lines and LOG_FORMAT=json emits JSON lines
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_JSON = os.getenv("LOG_FORMAT", "text") == "json"
+log_listener = None
 logger = logging.getLogger(__name__)
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+sample_request_log = LogSampler(LOG_SAMPLE_RATE)
 
-# ---- NLTK RESOURCE SETUP ----
-def ensure_punkt_resources():
-    """Ensure all Punkt resources are available with multiple fallback strategies"""
-    try:
-        # First try standard method
-        nltk.data.find('tokenizers/punkt')
-        logger.info("✅ Punkt resources found via standard nltk.data")
-        return True
-    except LookupError:
-        logger.warning("⚠️ Punkt not found via standard method")
-    
-    # Create a dedicated directory for NLTK resources
-    nltk_dir = os.path.join(os.getcwd(), "nltk_data")
-    os.makedirs(nltk_dir, exist_ok=True)
-    nltk.data.path.append(nltk_dir)
-    logger.info(f"➕ Added custom NLTK path: {nltk_dir}")
-    
-    # Define resource locations
-    punkt_path = os.path.join(nltk_dir, "tokenizers", "punkt")
-    
-    # Check if punkt exists in our custom directory
-    if os.path.exists(os.path.join(punkt_path, "PY3", "english.pickle")):
-        logger.info("✅ Punkt found in custom directory")
-        return True
+# ---- MODEL STATE ----
+# Nothing is loaded at import time: the lifespan below loads the model from
+# local files only (cleaning needs no NLTK data, so nothing is downloaded).
+# models.active is swapped in one assignment on reload, see serving.registry
+MODEL_DIR = os.getenv("MODEL_DIR", os.path.join(os.getcwd(), "model"))
+models = ModelRegistry(MODEL_DIR)
+startup_timings = {}
+ready = False
+
+# ---- PREDICTION CACHE ----
+# Duplicate and templated reviews are common; PREDICTION_CACHE_SIZE=0 disables the cache
+CACHE_MAX_ENTRIES = int(os.getenv("PREDICTION_CACHE_SIZE", "10000"))
+CACHE_TTL_SECONDS = float(os.getenv("PREDICTION_CACHE_TTL", "3600"))
+prediction_cache = PredictionCache(max_entries=CACHE_MAX_ENTRIES, ttl_seconds=CACHE_TTL_SECONDS)
+
+# ---- METRICS ----
+# Request and cache counters are always collected for GET /metrics;
+# PIPELINE_METRICS=0 skips the per-review stage timings and distributions
+PIPELINE_METRICS_ENABLED = os.getenv("PIPELINE_METRICS", "1") == "1"
+metrics = PipelineMetrics()
+pipeline_metrics = metrics if PIPELINE_METRICS_ENABLED else None
+prediction_errors = metrics.counter(
+    "prediction_errors_total", "Requests that failed with an internal error", ("endpoint",))
+model_latency = metrics.histogram(
+    "model_scoring_duration_seconds", "Per-review scoring time by model version",
+    labelnames=("version", "role"))
+
+# ---- PROCESS POOL ----
+# INFERENCE_PROCESSES=N moves cleaning and scoring into N pre-warmed worker
+# processes (each with its own prediction cache, reported summed by
+# /cache/stats and /metrics); 0 scores in this process
+INFERENCE_PROCESSES = int(os.getenv("INFERENCE_PROCESSES", "0"))
+inference_pool = None
+
+def cache_stats_now():
+    """The inference workers' caches (summed) when they score, else this process's"""
+    if inference_pool is not None:
+        return inference_pool.cache_stats()
+    return prediction_cache.stats()
+
+metrics.add_collector(stats_collector(
+    "prediction_cache", cache_stats_now,
+    counters=("hits", "misses", "evictions", "expirations", "invalidations"),
+    gauges=("size",),
+))
+
+# ---- SHADOW SCORING ----
+# With a shadow model loaded (SHADOW_MODEL_DIR or POST /admin/shadow) every
+# batch is also scored by it from a background thread, off the response path,
+# in the inference workers when INFERENCE_PROCESSES is set
+def score_shadow(reviews, shadow):
+    if inference_pool is not None:
+        return inference_pool.score_shadow(reviews, (shadow.source, shadow.model.fingerprint))
+    return predict_reviews(reviews, shadow.model)
+
+shadow_scorer = ShadowScorer(
+    model_latency,
+    metrics.counter("shadow_predictions_total", "Shadow predictions by agreement with the active model",
+                    ("agreement",)),
+    max_pending=int(os.getenv("SHADOW_MAX_PENDING", "8")),
+    score=score_shadow,
+)
+metrics.add_collector(stats_collector(
+    "shadow", shadow_scorer.stats, counters=("scored", "dropped"), gauges=("pending",),
+))
+
+# ---- NEAR-DUPLICATES ----
+# NEAR_DUPLICATE_INDEX=1 indexes every scored review (MinHash LSH) and tags
+# results with a cluster id and whether they nearly copy a known fake
+NEAR_DUPLICATE_ENABLED = os.getenv("NEAR_DUPLICATE_INDEX", "0") == "1"
+NEAR_DUPLICATE_MAX_ENTRIES = int(os.getenv("NEAR_DUPLICATE_MAX_ENTRIES", "20000"))
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.6"))
+NEAR_DUPLICATE_SNAPSHOT = os.getenv("NEAR_DUPLICATE_SNAPSHOT")
+near_duplicates = None
+if NEAR_DUPLICATE_ENABLED:
+    metrics.add_collector(stats_collector(
+        "near_duplicates", lambda: near_duplicates.stats(),
+        counters=("lookups", "matches", "fake_matches", "evictions"), gauges=("size", "clusters"),
+    ))
+
+def load_near_duplicates():
+    """Empty index, or the one saved at NEAR_DUPLICATE_SNAPSHOT"""
+    if NEAR_DUPLICATE_SNAPSHOT and os.path.exists(NEAR_DUPLICATE_SNAPSHOT):
+        index = NearDuplicateIndex.load(NEAR_DUPLICATE_SNAPSHOT, max_entries=NEAR_DUPLICATE_MAX_ENTRIES,
+                                        threshold=NEAR_DUPLICATE_THRESHOLD)
+        logger.info(f"🧬 Loaded {index.stats()['size']} near-duplicate signatures from {NEAR_DUPLICATE_SNAPSHOT}")
+        return index
+    return NearDuplicateIndex(max_entries=NEAR_DUPLICATE_MAX_ENTRIES, threshold=NEAR_DUPLICATE_THRESHOLD)
+
+def tag_near_duplicates(results):
+    """Index the signatures the scoring pipeline attached and tag each result"""
+    for result in results:
+        if "error" in result:
+            continue
+        cluster, similarity, near_fake = near_duplicates.observe_signature(
+            result.pop(SIGNATURE_FIELD), result["prediction"] == "Fake Review")
+        result["cluster_id"] = cluster
+        result["duplicate_similarity"] = similarity
+        result["near_duplicate_of_fake"] = near_fake
+
+# ---- INPUT GUARDS ----
+# Checked on len() alone before any cleaning: reviews over MAX_REVIEW_CHARS are
+# cut to that many characters (REVIEW_OVERSIZE=reject refuses them instead),
+# request bodies over MAX_REQUEST_BYTES get a 413 and batches are capped at
+# MAX_BATCH_REVIEWS reviews
+MAX_REQUEST_BYTES = int(os.getenv("MAX_REQUEST_BYTES", str(1 << 20)))
+MAX_BATCH_REVIEWS = int(os.getenv("MAX_BATCH_REVIEWS", "1000"))
+input_guard = InputGuard(
+    max_review_chars=int(os.getenv("MAX_REVIEW_CHARS", "5000")),
+    truncate=os.getenv("REVIEW_OVERSIZE", "truncate") == "truncate",
+)
+guarded_reviews = metrics.counter(
+    "guarded_reviews_total", "Reviews rejected or truncated before cleaning", ("reason",))
+
+# ---- FEEDBACK ----
+# FEEDBACK_LOG=path enables POST /feedback: moderator-confirmed labels are
+# appended to that file, and every FEEDBACK_INTERVAL seconds a background
+# updater applies at least FEEDBACK_MIN_BATCH new ones to the active model's
+# weights (same features) and publishes the result to FEEDBACK_MODEL_DIR
+FEEDBACK_LOG = os.getenv("FEEDBACK_LOG")
+FEEDBACK_MODEL_DIR = os.getenv("FEEDBACK_MODEL_DIR", MODEL_DIR.rstrip(os.sep) + "-online")
+# Both opened by the lifespan
+feedback_log = None
+online_updater = None
+feedback_received = metrics.counter(
+    "feedback_received_total", "Moderator labels appended to the feedback log", ("label", "agreed"))
+if FEEDBACK_LOG:
+    metrics.add_collector(stats_collector(
+        "online_updates", lambda: online_updater.stats(),
+        counters=("applied", "skipped", "updates"), gauges=("pending_bytes",),
+    ))
+
+def start_online_updater():
+    return OnlineUpdater(
+        models, feedback_log, FEEDBACK_MODEL_DIR,
+        min_batch=int(os.getenv("FEEDBACK_MIN_BATCH", "32")),
+        batch_size=int(os.getenv("FEEDBACK_BATCH_SIZE", "32")),
+        epochs=int(os.getenv("FEEDBACK_EPOCHS", "1")),
+        learning_rate=float(os.getenv("FEEDBACK_LEARNING_RATE", "0.5")),
+        alpha=float(os.getenv("FEEDBACK_ALPHA", "0.0001")),
+        interval=float(os.getenv("FEEDBACK_INTERVAL", "30")),
+    ).start()
+
+def guard_reviews(reviews):
+    """Input-guard raw reviews: (results with the rejected ones filled in, [(index, text, truncated)] to score)"""
+    results = [None] * len(reviews)
+    pending = []
+    for i, review in enumerate(reviews):
+        if pipeline_metrics is not None and isinstance(review, str):
+            # The length as sent, before the guard rejects or truncates it
+            pipeline_metrics.input_chars.observe(len(review))
+        text, error, reason = input_guard.check(review)
+        if reason is not None:
+            guarded_reviews.inc(labels=(reason,))
+        if error is not None:
+            results[i] = {"input": input_guard.preview(review), "error": error}
+        else:
+            pending.append((i, text, reason == "truncated"))
+    return results, pending
+
+def merge_scored(results, pending, scored):
+    """Put the results of scoring ``pending`` back in input order"""
+    for (i, _, truncated), result in zip(pending, scored):
+        if truncated:
+            result["truncated"] = True
+        results[i] = result
+    return results
+
+def predict_many(reviews):
+    """Guard, clean and score a list of raw reviews with the active model"""
+    results, pending = guard_reviews(reviews)
+    return merge_scored(results, pending, score_reviews([text for _, text, _ in pending]))
+
+def score_reviews(reviews):
+    """Clean and score reviews that passed the input guard"""
+    if not reviews:
+        return []
+    # Read the active version once so the whole batch uses the same model
+    active = models.active
+    start = time.perf_counter()
+    if inference_pool is not None:
+        results = inference_pool.score_many(reviews, version=(active.source, active.model.fingerprint))
+    else:
+        results = predict_reviews(reviews, active.model, prediction_cache, pipeline_metrics,
+                                  near_duplicates.hasher if near_duplicates is not None else None)
+    model_latency.observe((time.perf_counter() - start) / len(reviews), (active.model.fingerprint, "active"))
     
-    # Download punkt if still missing
-    logger.warning("⬇️ Downloading punkt resources...")
+    shadow = models.shadow
+    if shadow is not None:
+        shadow_scorer.submit(reviews, results, shadow)
+    if near_duplicates is not None:
+        tag_near_duplicates(results)
+    return results
+
+# ---- MICRO-BATCHING ----
+# Concurrent /predict calls are queued and scored together; MICROBATCH_ENABLED=0
+# falls back to scoring each request on its own. With the default max wait of
+# 0 ms a batch is whatever queued up while the previous batch was scored.
+MICROBATCH_ENABLED = os.getenv("MICROBATCH_ENABLED", "1") == "1"
+batcher = MicroBatcher(
+    predict_many,
+    max_batch_size=int(os.getenv("MICROBATCH_MAX_SIZE", "64")),
+    max_wait_ms=float(os.getenv("MICROBATCH_MAX_WAIT_MS", "0")),
+    # Keep every inference worker busy with its own batch
+    max_concurrent_batches=max(INFERENCE_PROCESSES, 1),
+)
+metrics.add_collector(stats_collector(
+    "microbatch", batcher.stats, counters=("batches", "items"), gauges=("queued",),
+))
+
+# ---- STARTUP ----
+def check_local_resources(model_dir):
+    """Make sure the model is bundled in ``model_dir``; never downloads anything
+
+    Looks where ``load_model`` will: the compiled artifact if there is one
+    (which must then be complete), else the pickles.
+    """
+    path = artifact_path(model_dir)
+    if path is not None:
+        if not os.path.isfile(os.path.join(path, MANIFEST_FILE)):
+            raise RuntimeError(f"Incomplete compiled model at {path}: {MANIFEST_FILE} is missing")
+        return path
+    pickles = [os.path.join(model_dir, name) for name in ("fake_review_model.pkl", "vectorizer.pkl")]
+    missing = [path for path in pickles if not os.path.isfile(path)]
+    if missing:
+        raise RuntimeError(f"No compiled model in {model_dir} and missing {', '.join(missing)}")
+    logger.warning(f"⚠️ No compiled model in {model_dir}, compiling from pickles")
+    return model_dir
+
+@contextmanager
+def startup_stage(name):
+    start = time.perf_counter()
+    yield
+    startup_timings[name] = (time.perf_counter() - start) * 1e3
+    logger.info(f"⏱️ Startup stage {name}: {startup_timings[name]:.1f} ms")
+
+# MODEL_WATCH_INTERVAL seconds between checks of MODEL_DIR for a new artifact (0 disables)
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", "0"))
+SHADOW_MODEL_DIR = os.getenv("SHADOW_MODEL_DIR")
+
+@asynccontextmanager
+async def lifespan(app):
+    global feedback_log, inference_pool, log_listener, near_duplicates, online_updater, ready
+    if log_listener is None:
+        log_listener = setup_logging(level=LOG_LEVEL, json_format=LOG_JSON)
+    start = time.perf_counter()
     try:
-        nltk.download('punkt', download_dir=nltk_dir)
-        logger.info("✅ Punkt downloaded to custom directory")
-        return True
+        with startup_stage("resources"):
+            source = check_local_resources(MODEL_DIR)
+        with startup_stage("model"):
+            logger.info(f"🔍 Loading model from {source}")
+            models.reload(MODEL_DIR)
+        if SHADOW_MODEL_DIR:
+            with startup_stage("shadow_model"):
+                logger.info(f"👥 Loading shadow model from {SHADOW_MODEL_DIR}")
+                models.set_shadow(SHADOW_MODEL_DIR)
+        if NEAR_DUPLICATE_ENABLED:
+            with startup_stage("near_duplicates"):
+                near_duplicates = load_near_duplicates()
+        if INFERENCE_PROCESSES > 0:
+            with startup_stage("inference_pool"):
+                logger.info(f"🚀 Starting {INFERENCE_PROCESSES} inference worker processes")
+                inference_pool = InferencePool(
+                    MODEL_DIR,
+                    size=INFERENCE_PROCESSES,
+                    cache_size=CACHE_MAX_ENTRIES,
+                    cache_ttl=CACHE_TTL_SECONDS,
+                    metrics=pipeline_metrics,
+                    hasher=near_duplicates.hasher if near_duplicates is not None else None,
+                ).start()
+                logger.info(f"✅ Inference workers ready: {inference_pool.worker_pids}")
+        if FEEDBACK_LOG:
+            with startup_stage("online_updater"):
+                feedback_log = FeedbackLog(FEEDBACK_LOG)
+                online_updater = start_online_updater()
+                logger.info(f"🧠 Learning from feedback in {FEEDBACK_LOG}, publishing to {FEEDBACK_MODEL_DIR}")
     except Exception as e:
-        logger.error(f"❌ Punkt download failed: {str(e)}")
+        logger.error(f"❌ Model loading failed: {str(e)}")
+        raise RuntimeError(f"Model loading failed: {str(e)}")
+    startup_timings["total"] = (time.perf_counter() - start) * 1e3
+    logger.info(f"✅ Model {models.active.model.fingerprint} loaded successfully "
+                f"({models.active.model.n_features} features), ready in {startup_timings['total']:.1f} ms")
+    if MODEL_WATCH_INTERVAL > 0:
+        logger.info(f"👀 Watching {MODEL_DIR} for new models every {MODEL_WATCH_INTERVAL:g}s")
+        models.watch(MODEL_WATCH_INTERVAL)
+    ready = True
     
-    # Ultimate fallback: manually download from GitHub
-    logger.warning("⬇️ Attempting manual download from GitHub...")
-    try:
-        # Create necessary directories
-        os.makedirs(punkt_path, exist_ok=True)
-        
-        # Download punkt resources
-        url = "https://github.com/nltk/nltk_data/raw/gh-pages/packages/tokenizers/punkt.zip"
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        
-        # Save and extract
-        zip_path = os.path.join(punkt_path, "punkt.zip")
-        with open(zip_path, 'wb') as f:
-            f.write(response.content)
-        
-        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            zip_ref.extractall(punkt_path)
-        
-        os.remove(zip_path)
-        logger.info("✅ Punkt downloaded manually from GitHub")
-        return True
-    except Exception as e:
-        logger.error(f"❌ Manual download failed: {str(e)}")
-        return False
-
-# Initialize NLTK resources
-if not ensure_punkt_resources():
-    logger.critical("❌ CRITICAL: Failed to load Punkt resources after all attempts")
-    raise RuntimeError("Punkt tokenizer not available")
-
-# Verify punkt is loaded
-try:
-    nltk.data.find('tokenizers/punkt')
-    logger.info("✅ Punkt tokenizer ready")
-except LookupError as e:
-    logger.critical(f"❌ CRITICAL: Punkt not found after all attempts: {str(e)}")
-    raise RuntimeError("Punkt tokenizer not available")
+    yield
+    
+    # Report not ready first so load balancers stop routing here while we drain
+    ready = False
+    models.stop_watching()
+    if online_updater is not None:
+        online_updater.stop()
+    shadow_scorer.close()
+    await batcher.close()
+    if inference_pool is not None:
+        logger.info("🛑 Waiting for inference workers to finish")
+        inference_pool.close(wait=True)
+        inference_pool = None
+    if near_duplicates is not None and NEAR_DUPLICATE_SNAPSHOT:
+        n = near_duplicates.save(NEAR_DUPLICATE_SNAPSHOT)
+        logger.info(f"💾 Saved {n} near-duplicate signatures to {NEAR_DUPLICATE_SNAPSHOT}")
 
 # ---- FASTAPI APP ----
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -98,118 +349,346 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(BodySizeLimitMiddleware, max_bytes=MAX_REQUEST_BYTES, exempt=("/predict/stream",))
+app.add_middleware(MetricsMiddleware, registry=metrics)
 
-# ---- MODEL LOADING ----
-try:
-    model_path = os.path.join(os.getcwd(), "model", "fake_review_model.pkl")
-    vectorizer_path = os.path.join(os.getcwd(), "model", "vectorizer.pkl")
-    
-    logger.info(f"🔍 Loading model from {model_path}")
-    with open(model_path, "rb") as f:
-        model = pickle.load(f)
-    
-    logger.info(f"🔍 Loading vectorizer from {vectorizer_path}")
-    with open(vectorizer_path, "rb") as f:
-        vectorizer = pickle.load(f)
-    
-    logger.info("✅ Model loaded successfully")
-except Exception as e:
-    logger.error(f"❌ Model loading failed: {str(e)}")
-    raise RuntimeError(f"Model loading failed: {str(e)}")
-
-# ---- TEXT PROCESSING ----
-try:
-    nltk.download('stopwords', quiet=True)
-    stopwords_set = set(nltk.corpus.stopwords.words('english'))
-    logger.info("✅ Stopwords loaded successfully")
-except LookupError:
-    logger.warning("⚠️ Stopwords not found, using minimal set")
-    stopwords_set = {'i', 'me', 'my', 'myself', 'we', 'our', 'ours', 'ourselves', 'you', 
-                    "you're", "you've", "you'll", "you'd", 'your', 'yours', 'yourself', 
-                    'yourselves', 'he', 'him', 'his', 'himself', 'she', "she's", 'her', 
-                    'hers', 'herself', 'it', "it's", 'its', 'itself', 'they', 'them', 
-                    'their', 'theirs', 'themselves'}
-
-def clean_text(text):
-    """Clean and preprocess review text"""
-    if not isinstance(text, str) or len(text.strip()) < 10:
-        return ""
-    
-    # Filter code-like patterns
-    if re.search(r'\b(import|def|function|class|return|\.py|print|for |if )\b', text):
-        return ""
-    
-    text = text.lower()
-    text = re.sub(r'[^\w\s]', '', text)  # Remove punctuation
-    
-    # Use nltk word tokenization
-    try:
-        words = nltk.word_tokenize(text)
-    except Exception as e:
-        logger.error(f"⚠️ Tokenization failed: {str(e)}")
-        # Fallback to simple tokenization
-        words = text.split()
-    
-    words = [w for w in words if w not in stopwords_set and len(w) > 2]
-    return ' '.join(words)
+# ---- RESPONSE ENCODING ----
+# ?lean=1 returns only the label and confidence (no echoed review). Batch and
+# stream responses are MessagePack for Accept: application/msgpack, and batch
+# bodies of at least GZIP_MIN_BYTES are gzipped for clients that accept it
+GZIP_MIN_BYTES = int(os.getenv("GZIP_MIN_BYTES", "65536"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "1"))
 
 # ---- API ENDPOINTS ----
 class ReviewInput(BaseModel):
     review: str
 
+class BatchReviewInput(BaseModel):
+    reviews: List[str]
+
 @app.post("/predict")
-def predict_review(input: ReviewInput):
+async def predict_review(input: ReviewInput, lean: bool = False):
     try:
         review = input.review
-        logger.info(f"📥 Received review: {review[:50]}...")
-        
-        cleaned = clean_text(review)
-        if not cleaned:
-            return {"error": "Invalid review. Too short or contains code patterns."}
         
-        vect = vectorizer.transform([cleaned])
-        pred = model.predict(vect)[0]
-        proba = model.predict_proba(vect)[0]
-        confidence = max(proba)
+        if MICROBATCH_ENABLED:
+            result = await batcher.submit(review)
+        else:
+            result = await run_in_threadpool(predict_many, [review])
+            result = result[0]
         
-        result = "Fake Review" if pred == 1 else "Real Review"
-        logger.info(f"🔮 Prediction: {result} (Confidence: {confidence:.2f})")
+        if "error" in result:
+            return {"error": result["error"]}
         
-        return {
-            "input": review,
-            "prediction": result,
-            "confidence": float(confidence)
-        }
+        if sample_request_log():
+            # Never log the review itself, only its size
+            logger.info("🔮 Prediction: %s (Confidence: %.2f, %d chars)",
+                        result["prediction"], result["confidence"], len(review),
+                        extra={"prediction": result["prediction"],
+                               "confidence": result["confidence"], "chars": len(review)})
+        if lean:
+            return Response(dumps_json(lean_result(result)), media_type="application/json")
+        return result
         
     except Exception as e:
+        prediction_errors.inc(labels=("/predict",))
         logger.error(f"❌ Prediction error: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/health")
-def health_check():
-    punkt_status = "Available"
+@app.post("/predict/batch")
+def predict_batch(input: BatchReviewInput, request: Request, lean: bool = False):
+    """Score many reviews in one request with the compiled model"""
+    if len(input.reviews) > MAX_BATCH_REVIEWS:
+        raise HTTPException(status_code=413, detail=f"Too many reviews, the limit is {MAX_BATCH_REVIEWS} per request")
     try:
-        nltk.data.find('tokenizers/punkt')
-    except LookupError:
-        punkt_status = "Not Available"
+        reviews = input.reviews
+        results = predict_many(reviews)
+        
+        if sample_request_log():
+            n_valid = sum("error" not in r for r in results)
+            logger.info("🔮 Batch scored: %d valid, %d invalid", n_valid, len(reviews) - n_valid,
+                        extra={"batch_size": len(reviews), "valid": n_valid})
+        if lean:
+            results = [lean_result(r) for r in results]
+        body, media_type = encode({"results": results}, request.headers.get("accept"))
+        body, headers = maybe_gzip(body, request.headers.get("accept-encoding"), GZIP_MIN_BYTES, GZIP_LEVEL)
+        return Response(body, media_type=media_type, headers=headers)
+        
+    except Exception as e:
+        prediction_errors.inc(labels=("/predict/batch",))
+        logger.error(f"❌ Batch prediction error: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", "256"))
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """StreamingResponse that leaves ``receive`` to the request body reader.
+    
+    The stock response listens for client disconnects on ``receive`` while it
+    streams, which would swallow request body chunks we have not read yet. A
+    disconnect still ends the stream, through ClientDisconnect from the body.
+    """
+    media_type = "application/x-ndjson"
+    
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+@app.post("/predict/stream")
+async def predict_stream(request: Request, lean: bool = False):
+    """Score an NDJSON request body, streaming NDJSON (or MessagePack) results back chunk by chunk"""
+    msgpack_format = wants_msgpack(request.headers.get("accept"))
     
+    def encode_chunk(scored):
+        if lean:
+            scored = [lean_result(r) for r in scored]
+        return encode_stream_chunk(scored, msgpack_format)
+    
+    async def results():
+        chunk = []
+        first_line = 1
+        async for line in aiter_lines(request.stream(), max_line_bytes=MAX_REQUEST_BYTES):
+            chunk.append(line)
+            if len(chunk) >= STREAM_CHUNK_SIZE:
+                scored = await run_in_threadpool(score_lines, chunk, predict_many, first_line)
+                yield encode_chunk(scored)
+                first_line += len(chunk)
+                chunk = []
+        if chunk:
+            scored = await run_in_threadpool(score_lines, chunk, predict_many, first_line)
+            yield encode_chunk(scored)
+    
+    if sample_request_log():
+        logger.info("📥 Streaming NDJSON scoring request")
+    if msgpack_format:
+        return NDJSONStreamingResponse(results(), media_type="application/msgpack")
+    return NDJSONStreamingResponse(results())
+
+class ExplainInput(BaseModel):
+    review: str
+    top_k: int = Field(10, ge=1, le=100)
+
+@app.post("/explain")
+def explain_review(input: ExplainInput):
+    """Prediction plus the n-grams that contributed most to it (tf-idf value x coefficient)"""
+    try:
+        review, error, _ = input_guard.check(input.review)
+        if error is not None:
+            return {"error": error}
+        result = explain_reviews([review], models.active.model, input.top_k)[0]
+        if "error" in result:
+            return {"error": result["error"]}
+        return result
+        
+    except Exception as e:
+        prediction_errors.inc(labels=("/explain",))
+        logger.error(f"❌ Explanation error: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+class CategoryBatchInput(BaseModel):
+    reviews: List[str]
+    categories: Optional[List[str]] = None
+
+@app.post("/predict/categories")
+def predict_categories(input: CategoryBatchInput, request: Request, lean: bool = False):
+    """Score reviews with the per-category models stacked into the compiled model"""
+    if len(input.reviews) > MAX_BATCH_REVIEWS:
+        raise HTTPException(status_code=413, detail=f"Too many reviews, the limit is {MAX_BATCH_REVIEWS} per request")
+    scorer = models.active.model
+    if not scorer.all_categories:
+        raise HTTPException(status_code=400, detail="The active model has no per-category models")
+    unknown = sorted(set(input.categories or ()) - set(scorer.all_categories))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown categories: {unknown}, the model has {scorer.all_categories}")
+    try:
+        results, pending = guard_reviews(input.reviews)
+        scored = category_reviews([text for _, text, _ in pending], scorer, input.categories)
+        results = merge_scored(results, pending, scored)
+        if lean:
+            results = [lean_result(r) for r in results]
+        body, media_type = encode({"results": results}, request.headers.get("accept"))
+        body, headers = maybe_gzip(body, request.headers.get("accept-encoding"), GZIP_MIN_BYTES, GZIP_LEVEL)
+        return Response(body, media_type=media_type, headers=headers)
+        
+    except Exception as e:
+        prediction_errors.inc(labels=("/predict/categories",))
+        logger.error(f"❌ Category prediction error: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+class FeedbackInput(BaseModel):
+    review: str
+    label: str = Field(..., description="The confirmed label: " + " or ".join(FEEDBACK_LABELS))
+    prediction: Optional[str] = None
+
+@app.post("/feedback")
+def record_feedback(input: FeedbackInput):
+    """Append a moderator-confirmed label to the feedback log for the online updater"""
+    if feedback_log is None:
+        raise HTTPException(status_code=404, detail="Feedback disabled, set FEEDBACK_LOG")
+    if input.label not in FEEDBACK_LABELS:
+        raise HTTPException(status_code=400, detail=f"label must be one of {list(FEEDBACK_LABELS)}")
+    review, error, _ = input_guard.check(input.review)
+    if error is not None:
+        return {"error": error}
+    try:
+        feedback_log.append(review, FEEDBACK_LABELS[input.label], models.active.model.fingerprint)
+    except OSError as e:
+        prediction_errors.inc(labels=("/feedback",))
+        logger.error(f"❌ Feedback write error: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+    agreed = "unknown" if input.prediction is None else str(input.prediction == input.label).lower()
+    feedback_received.inc(labels=(input.label, agreed))
+    return {"status": "recorded", "pending_bytes": online_updater.pending_bytes() if online_updater else None}
+
+@app.get("/feedback/stats")
+def feedback_stats():
+    """Feedback log and online update counters"""
+    if online_updater is None:
+        raise HTTPException(status_code=404, detail="Feedback disabled, set FEEDBACK_LOG")
+    return online_updater.stats()
+
+@app.get("/health")
+def health_check():
+    """Liveness: the process is up and serving requests"""
     return {
         "status": "OK", 
-        "model_loaded": model is not None,
-        "punkt_status": punkt_status,
-        "nltk_paths": nltk.data.path
+        "model_loaded": models.active is not None,
+    }
+
+@app.get("/ready")
+def readiness_check():
+    """Readiness: the model (and any inference workers) loaded; 503 until then and while draining"""
+    if not ready:
+        return JSONResponse(status_code=503, content={"status": "NOT_READY"})
+    return {
+        "status": "READY",
+        "model_dir": models.model_dir,
+        "model_version": models.active.model.fingerprint,
+        "n_features": models.active.model.n_features,
+        "categories": models.active.model.all_categories,
+        "inference_workers": inference_pool.worker_pids if inference_pool is not None else [],
+        "limits": {"max_batch_reviews": MAX_BATCH_REVIEWS, "max_request_bytes": MAX_REQUEST_BYTES},
+        "startup_ms": {stage: round(ms, 2) for stage, ms in startup_timings.items()},
     }
 
-@app.get("/debug/punkt")
-def debug_punkt():
-    """Endpoint to debug punkt resource issues"""
-    results = []
-    for path in nltk.data.path:
-        punkt_dir = os.path.join(path, "tokenizers", "punkt")
-        exists = os.path.exists(punkt_dir)
-        results.append({
-            "path": punkt_dir,
-            "exists": exists,
-            "contents": os.listdir(punkt_dir) if exists else []
-        })
-    return results
\ No newline at end of file
+@app.get("/cache/stats")
+def cache_stats():
+    """Prediction cache hit, miss and eviction counters (summed over the inference workers, if any)"""
+    return cache_stats_now()
+
+@app.get("/duplicates/stats")
+def duplicates_stats():
+    """Near-duplicate index size, cluster count and match counters"""
+    if near_duplicates is None:
+        return {"enabled": False}
+    return {"enabled": True, **near_duplicates.stats()}
+
+@app.get("/batcher/stats")
+def batcher_stats():
+    """Micro-batching queue depth and batch size counters"""
+    return {"enabled": MICROBATCH_ENABLED, **batcher.stats()}
+
+@app.get("/metrics")
+def metrics_endpoint():
+    """Prometheus text exposition of request, cache and pipeline metrics"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+# ---- PROFILING ----
+# PROFILER_ENABLED=1 exposes GET /debug/profile, which samples the stacks of
+# every thread in this process and returns them as collapsed stacks
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "0") == "1"
+PROFILER_MAX_SECONDS = 60.0
+
+@app.get("/debug/profile")
+async def debug_profile(seconds: float = 5.0, interval_ms: float = 5.0):
+    """Sample hot-path stacks for ``seconds``; feed the output to flamegraph.pl or speedscope"""
+    if not PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler disabled, set PROFILER_ENABLED=1")
+    seconds = min(max(seconds, 0.0), PROFILER_MAX_SECONDS)
+    interval = max(interval_ms, 1.0) / 1000.0
+    logger.info(f"🔬 Sampling stacks for {seconds:.1f}s")
+    stacks, rounds = await run_in_threadpool(sample_stacks, seconds, interval)
+    return PlainTextResponse(render_collapsed(stacks), headers={"X-Profile-Samples": str(rounds)})
+
+# ---- MODEL ADMIN ----
+# Disabled unless ADMIN_TOKEN is set; callers send it as X-Admin-Token
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+class ModelDirInput(BaseModel):
+    model_dir: Optional[str] = None
+
+def check_admin(token):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Admin endpoints disabled, set ADMIN_TOKEN")
+    # Constant-time comparison: response timing must not reveal how much of the token matched
+    if not hmac.compare_digest((token or "").encode("utf-8"), ADMIN_TOKEN.encode("utf-8")):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.get("/admin/models")
+def admin_models(x_admin_token: Optional[str] = Header(None)):
+    """Active and shadow model versions"""
+    check_admin(x_admin_token)
+    return {**models.describe(), "shadow_scoring": shadow_scorer.stats()}
+
+@app.post("/admin/reload")
+async def admin_reload(input: ModelDirInput, x_admin_token: Optional[str] = Header(None)):
+    """Load MODEL_DIR (or ``model_dir``) off the event loop and swap it in"""
+    check_admin(x_admin_token)
+    try:
+        old, new = await run_in_threadpool(models.reload, input.model_dir)
+    except Exception as e:
+        logger.error(f"❌ Model reload failed: {str(e)}")
+        raise HTTPException(status_code=400, detail=f"Model reload failed: {str(e)}")
+    logger.info(f"🔄 Model reloaded: {old.model.fingerprint} -> {new.model.fingerprint} ({new.load_ms:.1f} ms)")
+    return {"changed": new is not old, **models.describe()}
+
+@app.post("/admin/shadow")
+async def admin_set_shadow(input: ModelDirInput, x_admin_token: Optional[str] = Header(None)):
+    """Load ``model_dir`` as the shadow model"""
+    check_admin(x_admin_token)
+    if not input.model_dir:
+        raise HTTPException(status_code=400, detail="model_dir is required")
+    try:
+        await run_in_threadpool(models.set_shadow, input.model_dir)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Shadow model load failed: {str(e)}")
+    logger.info(f"👥 Shadow model {models.shadow.model.fingerprint} loaded from {input.model_dir}")
+    return models.describe()
+
+@app.delete("/admin/shadow")
+def admin_clear_shadow(x_admin_token: Optional[str] = Header(None)):
+    check_admin(x_admin_token)
+    models.clear_shadow()
+    return models.describe()
+
+@app.post("/admin/shadow/promote")
+def admin_promote_shadow(x_admin_token: Optional[str] = Header(None)):
+    """Make the shadow model active"""
+    check_admin(x_admin_token)
+    try:
+        models.promote_shadow()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return models.describe()
+
+@app.post("/admin/feedback/apply")
+async def admin_apply_feedback(x_admin_token: Optional[str] = Header(None)):
+    """Apply all pending feedback now, however little there is"""
+    check_admin(x_admin_token)
+    if online_updater is None:
+        raise HTTPException(status_code=400, detail="Set FEEDBACK_LOG to enable online updates")
+    try:
+        version = await run_in_threadpool(online_updater.update, True)
+    except Exception as e:
+        logger.error(f"❌ Online update failed: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"published": version, **online_updater.stats()}
+
+@app.post("/admin/duplicates/snapshot")
+def admin_snapshot_duplicates(x_admin_token: Optional[str] = Header(None)):
+    """Write the near-duplicate index to NEAR_DUPLICATE_SNAPSHOT now"""
+    check_admin(x_admin_token)
+    if near_duplicates is None or not NEAR_DUPLICATE_SNAPSHOT:
+        raise HTTPException(status_code=400, detail="Set NEAR_DUPLICATE_INDEX=1 and NEAR_DUPLICATE_SNAPSHOT")
+    return {"path": NEAR_DUPLICATE_SNAPSHOT, "entries": near_duplicates.save(NEAR_DUPLICATE_SNAPSHOT)}
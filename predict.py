@@ -1,5 +1,5 @@
 import pickle
-from sklearn.feature_extraction.text import TfidfVectorizer
+from preprocessing import clean_text
 
 # Load the trained model and vectorizer
 with open('model/fake_review_model.pkl', 'rb') as f:
@@ -10,7 +10,7 @@ with open('model/vectorizer.pkl', 'rb') as f:
 
 # Function to predict review
 def predict_review(review_text):
-    cleaned_review = clean(review_text)  # Apply the same cleaning function
+    cleaned_review = clean_text(review_text)  # Apply the same cleaning function
     vect_review = vectorizer.transform([cleaned_review])
     prediction = model.predict(vect_review)[0]
     return "Fake Review" if prediction == 1 else "Real Review"
@@ -0,0 +1,9 @@
+"""Review text preprocessing shared by training, serving and offline scripts.
+
+Everything that turns raw review text into model input lives here, so the
+features seen at training time and at serving time come from the same code.
+"""
+from preprocessing.stopwords import STOPWORDS
+from preprocessing.fast_clean import fast_clean_text
+
+clean_text = fast_clean_text
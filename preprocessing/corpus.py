@@ -0,0 +1,112 @@
+"""On-disk cache of cleaned training corpora.
+
+Cleaning is the slow part of loading a dataset and its output only changes
+when the raw CSV or the preprocessing code does. ``open_corpus`` writes the
+cleaned text and labels once to an uncompressed Arrow IPC (Feather v2) file
+named after a hash of the raw file and ``preprocessing_fingerprint``, and
+memory-maps that file on every later run, so training runs and
+hyperparameter sweeps skip cleaning entirely. ``extra_columns`` (such as the
+product category) are carried along as strings and are part of the cache key.
+Requires pyarrow.
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from preprocessing.dataset import LABEL_MAP, PREPROCESSING_VERSION, iter_preprocessed_chunks
+from preprocessing.stopwords import STOPWORDS
+
+DEFAULT_CACHE_DIR = ".corpus_cache"
+
+
+def file_digest(path, block_size=1 << 20):
+    """Hex blake2b digest of a file's bytes, read in blocks"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def preprocessing_fingerprint(text_column='text_', extra_columns=()):
+    """Hash of everything that decides the cleaned output besides the raw data"""
+    settings = [PREPROCESSING_VERSION, text_column, sorted(LABEL_MAP.items()), sorted(STOPWORDS)]
+    if extra_columns:
+        settings.append(list(extra_columns))
+    return hashlib.blake2b(json.dumps(settings).encode('utf-8'), digest_size=8).hexdigest()
+
+
+def corpus_cache_path(path, text_column='text_', cache_dir=DEFAULT_CACHE_DIR, extra_columns=()):
+    key = f"{file_digest(path)}-{preprocessing_fingerprint(text_column, extra_columns)}"
+    return os.path.join(cache_dir, f"{key}.arrow")
+
+
+def build_corpus_cache(path, cache_path, text_column='text_', chunksize=100_000, processes=1,
+                       extra_columns=()):
+    """Clean ``path`` chunk by chunk into an Arrow file at ``cache_path``"""
+    import pyarrow as pa
+
+    schema = pa.schema(
+        [("clean_text", pa.large_string()), ("label", pa.int8())]
+        + [(column, pa.string()) for column in extra_columns],
+        metadata={"source": os.path.abspath(path), "text_column": text_column,
+                  "preprocessing_version": str(PREPROCESSING_VERSION)},
+    )
+    os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+    tmp_path = cache_path + ".tmp"
+    rows = 0
+    with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, schema) as writer:
+        for chunk in iter_preprocessed_chunks(path, text_column, chunksize, processes, extra_columns):
+            writer.write_batch(pa.record_batch([
+                pa.array(chunk['clean_text'].tolist(), type=pa.large_string()),
+                pa.array(chunk['label'].to_numpy(dtype=np.int8)),
+            ] + [
+                pa.array(chunk[column].fillna('').astype(str).tolist(), type=pa.string())
+                for column in extra_columns
+            ], schema=schema))
+            rows += len(chunk)
+    # Only a complete file ever appears under the cache key
+    os.replace(tmp_path, cache_path)
+    return rows
+
+
+def read_corpus(cache_path):
+    """Memory-map a cached corpus file as an Arrow table"""
+    import pyarrow as pa
+
+    return pa.ipc.open_file(pa.memory_map(cache_path, 'r')).read_all()
+
+
+def ensure_corpus_cache(path, text_column='text_', cache_dir=DEFAULT_CACHE_DIR, chunksize=100_000,
+                        processes=1, rebuild=False, extra_columns=()):
+    """Path of the cached corpus for ``path``, cleaning the CSV into it on first use"""
+    cache_path = corpus_cache_path(path, text_column, cache_dir, extra_columns)
+    if rebuild or not os.path.exists(cache_path):
+        rows = build_corpus_cache(path, cache_path, text_column, chunksize, processes, extra_columns)
+        print(f"🧹 Cleaned {rows:,} reviews into {cache_path}")
+    else:
+        print(f"♻️ Using cached cleaned corpus {cache_path}")
+    return cache_path
+
+
+def open_corpus(path, text_column='text_', cache_dir=DEFAULT_CACHE_DIR, chunksize=100_000,
+                processes=1, rebuild=False, extra_columns=()):
+    """Memory-mapped Arrow table of (clean_text, label, *extra_columns) for ``path``, cleaning it on first use"""
+    return read_corpus(ensure_corpus_cache(path, text_column, cache_dir, chunksize, processes, rebuild,
+                                           extra_columns))
+
+
+def corpus_frame(table):
+    """The corpus as a DataFrame with ``clean_text``, ``label`` and any extra columns"""
+    return table.to_pandas()
+
+
+def iter_corpus_batches(table, batch_size=100_000):
+    """Yield (texts, labels) in order, ``batch_size`` rows at a time"""
+    for batch in table.to_batches(max_chunksize=batch_size):
+        yield (
+            np.asarray(batch.column(0).to_pylist(), dtype=object),
+            batch.column(1).to_numpy().astype(np.int64),
+        )
@@ -0,0 +1,53 @@
+"""Dataset level preprocessing shared by the training and offline scripts."""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from preprocessing.fast_clean import fast_clean_text as clean_text
+
+LABEL_MAP = {'CG': 1, 'OR': 0}
+# Bump whenever cleaning or filtering changes, to invalidate cached corpora
+PREPROCESSING_VERSION = 1
+
+
+def preprocess_frame(df, text_column='text_'):
+    """Map labels, clean the review text and drop reviews that end up too short"""
+    df = df.copy()
+    df['label'] = df['label'].map(LABEL_MAP)
+    df = df.dropna(subset=['label'])
+
+    df['clean_text'] = df[text_column].map(clean_text)
+    df = df[df['clean_text'].str.len() > 10]  # Remove short reviews
+
+    return df
+
+
+def iter_preprocessed_chunks(path, text_column='text_', chunksize=100_000, processes=1, extra_columns=()):
+    """Yield ``preprocess_frame`` results for ``path`` chunk by chunk, in file order.
+
+    Only the text and label columns (plus ``extra_columns``) are read. With ``processes`` > 1 chunks
+    are cleaned in a process pool, with at most two chunks per process in
+    flight, so memory stays bounded whatever the file size.
+    """
+    reader = pd.read_csv(path, usecols=[text_column, 'label', *extra_columns], chunksize=chunksize)
+    if processes <= 1:
+        for chunk in reader:
+            yield preprocess_frame(chunk, text_column)
+        return
+
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        pending = deque()
+        for chunk in reader:
+            pending.append(pool.submit(preprocess_frame, chunk, text_column))
+            if len(pending) >= 2 * processes:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def preprocess_dataset(path, text_column='text_', chunksize=None, processes=1, extra_columns=()):
+    if chunksize is None and processes <= 1:
+        return preprocess_frame(pd.read_csv(path), text_column)
+    chunks = iter_preprocessed_chunks(path, text_column, chunksize or 100_000, processes, extra_columns)
+    return pd.concat(list(chunks), ignore_index=True)
@@ -0,0 +1,51 @@
+"""Single-pass review cleaner with no NLTK dependency at request time.
+
+``fast_clean_text`` returns exactly what the original NLTK based cleaner
+(kept as ``nltk_clean_text`` in ``benchmarks/bench_clean.py``) returns, token
+for token. Punctuation is stripped before that cleaner tokenizes, so the only thing ``nltk.word_tokenize`` can still do to
+the text (besides splitting on whitespace) is the Treebank contraction split,
+e.g. "gonna" -> "gon" "na". Those splits are applied here from a lookup table
+instead of running Punkt and the Treebank regex cascade on every call.
+"""
+import re
+
+from preprocessing.stopwords import STOPWORDS
+
+# Same code-like filter the NLTK cleaner applies to the raw text
+CODE_PATTERN = re.compile(r'\b(import|def|function|class|return|\.py|print|for |if )\b')
+
+# Everything that is neither a word character nor whitespace
+NON_WORD_PATTERN = re.compile(r'[^\w\s]+')
+
+# Treebank CONTRACTIONS2 rules that can still match once apostrophes are gone.
+# The text is already lowercased, and every token is a run of word characters
+# bounded by whitespace, so each rule reduces to a whole-token lookup.
+TREEBANK_SPLITS = {
+    'cannot': ('can', 'not'),
+    'gimme': ('gim', 'me'),
+    'gonna': ('gon', 'na'),
+    'gotta': ('got', 'ta'),
+    'lemme': ('lem', 'me'),
+    'wanna': ('wan', 'na'),
+}
+
+
+def fast_clean_text(text, stop_words=STOPWORDS):
+    """Clean and preprocess review text in a single pass over its tokens"""
+    if not isinstance(text, str) or len(text.strip()) < 10:
+        return ""
+
+    # Filter code-like patterns
+    if CODE_PATTERN.search(text):
+        return ""
+
+    words = []
+    for word in NON_WORD_PATTERN.sub('', text.lower()).split():
+        pieces = TREEBANK_SPLITS.get(word)
+        if pieces is None:
+            if len(word) > 2 and word not in stop_words:
+                words.append(word)
+        else:
+            words.extend(w for w in pieces if len(w) > 2 and w not in stop_words)
+
+    return ' '.join(words)
@@ -0,0 +1,101 @@
+"""Score a large JSONL or CSV file of reviews in constant memory.
+
+The input is read and scored in chunks and results are written as NDJSON
+as soon as each chunk is done, so files far larger than RAM can be
+re-scored. JSONL input uses the same line format as POST /predict/stream;
+for CSV input, pick the review column with --column.
+
+    python score_file.py reviews.jsonl -o scored.jsonl
+    python score_file.py data/fake_review.csv --column text_ --id-column id -o scored.jsonl
+    python score_file.py reviews.jsonl --processes 8 > scored.jsonl
+"""
+import argparse
+import csv
+import itertools
+import os
+import sys
+import time
+
+from serving.compiled import load_model
+from serving.pipeline import predict_reviews
+from serving.process_pool import InferencePool
+from serving.streaming import dumps, score_lines
+
+
+def jsonl_chunks(f, chunk_size, predict_many):
+    first_line = 1
+    while True:
+        lines = list(itertools.islice(f, chunk_size))
+        if not lines:
+            return
+        yield score_lines(lines, predict_many, first_line)
+        first_line += len(lines)
+
+
+def csv_chunks(f, chunk_size, predict_many, column, id_column=None):
+    reader = csv.DictReader(f)
+    if column not in (reader.fieldnames or []):
+        raise SystemExit(f"❌ Column {column!r} not found in CSV header: {reader.fieldnames}")
+    row_number = 1
+    while True:
+        rows = list(itertools.islice(reader, chunk_size))
+        if not rows:
+            return
+        scored = predict_many([row[column] for row in rows])
+        results = []
+        for offset, (row, result) in enumerate(zip(rows, scored)):
+            meta = {"row": row_number + offset}
+            if id_column:
+                meta["id"] = row.get(id_column)
+            results.append({**meta, **result})
+        yield results
+        row_number += len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="JSONL or CSV file of reviews")
+    parser.add_argument("-o", "--output", help="Output NDJSON file (default: stdout)")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="Input format (default: from extension)")
+    parser.add_argument("--column", default="text_", help="Review text column for CSV input")
+    parser.add_argument("--id-column", help="CSV column echoed back as the result id")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--processes", type=int, default=0, help="Score in N worker processes")
+    parser.add_argument("--model-dir", default=os.path.join(os.getcwd(), "model"))
+    args = parser.parse_args()
+
+    fmt = args.format or ("csv" if args.input.lower().endswith(".csv") else "jsonl")
+
+    pool = None
+    if args.processes > 0:
+        pool = InferencePool(args.model_dir, size=args.processes).start()
+        predict_many = pool.score_many
+    else:
+        scorer = load_model(args.model_dir)
+        predict_many = lambda reviews: predict_reviews(reviews, scorer)
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    start = time.perf_counter()
+    total = 0
+    try:
+        with open(args.input, encoding="utf-8", newline="") as f:
+            if fmt == "csv":
+                chunks = csv_chunks(f, args.chunk_size, predict_many, args.column, args.id_column)
+            else:
+                chunks = jsonl_chunks(f, args.chunk_size, predict_many)
+            for results in chunks:
+                out.write("".join(map(dumps, results)))
+                total += len(results)
+                rate = total / (time.perf_counter() - start)
+                print(f"⏳ {total} reviews scored ({rate:.0f}/s)", file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if pool is not None:
+            pool.close()
+
+    print(f"✅ Scored {total} reviews in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""Parallel hyperparameter search for the TF-IDF + LogisticRegression model.
+
+Sweeps vectorizer settings (``--ngram-max``, ``--max-features``) and
+classifier settings (``--C``) with stratified k-fold cross-validation on all
+cores. Each task fits one vectorizer configuration on one fold and reuses its
+sparse matrices for every ``C``, so vectorizing is paid once per
+configuration and fold rather than once per grid point. Workers memory-map
+the cached cleaned corpus (preprocessing.corpus) instead of receiving it, and
+take each fold's reviews from the mapped table when they fit, so no worker
+holds a copy of the whole text column.
+
+The leaderboard ranks settings by F1 of the fake class and also reports what
+each model costs to serve: feature count, compiled artifact size and measured
+per-review scoring latency of the compiled model (from fold 0). Rows marked
+``*`` are Pareto-optimal on F1, latency and artifact size.
+
+    python search_model.py --data data/fake_review.csv --max-features 2000,5000,20000 --C 0.1,0.5,1,2
+"""
+import argparse
+import itertools
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.model_selection import StratifiedKFold
+
+from preprocessing.corpus import DEFAULT_CACHE_DIR, ensure_corpus_cache, read_corpus
+from serving import CompiledModel
+from serving.compiled import current_version
+
+# Per-process corpus, set by _init_worker: the memory-mapped table, the rows
+# of it being searched (None for all) and their labels
+_table = None
+_rows = None
+_labels = None
+
+
+def _init_worker(cache_path, rows):
+    global _table, _rows, _labels
+    _table = read_corpus(cache_path)
+    _rows = rows
+    labels = _table.column('label').to_numpy()
+    _labels = (labels if rows is None else labels[rows]).astype(np.int64)
+
+
+def _texts(indices):
+    """Cleaned reviews at ``indices`` of the searched rows, copied out of the mapped table"""
+    rows = indices if _rows is None else _rows[indices]
+    return _table.column('clean_text').take(rows).to_pylist()
+
+
+def directory_size(path):
+    """Bytes of the artifact version current in ``path``"""
+    return sum(entry.stat().st_size for entry in os.scandir(current_version(path)) if entry.is_file())
+
+
+def serving_cost(vectorizer, model, texts, n_latency):
+    """(features, compiled artifact bytes, median µs per review) of a fitted pipeline"""
+    compiled = CompiledModel.from_sklearn(vectorizer, model)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "compiled")
+        compiled.save(path)
+        size = directory_size(path)
+
+    sample = texts[:n_latency]
+    for text in sample[:50]:
+        compiled.predict(text)
+    samples = []
+    for text in sample:
+        start = time.perf_counter()
+        compiled.predict(text)
+        samples.append(time.perf_counter() - start)
+    return compiled.n_features, size, float(np.median(samples)) * 1e6
+
+
+def evaluate(ngram_max, max_features, fold, train_idx, test_idx, C_values, n_latency):
+    """Fit one vectorizer on one fold and score every C on its matrices"""
+    vectorizer = TfidfVectorizer(ngram_range=(1, ngram_max), max_features=max_features,
+                                 stop_words='english')
+    X_train = vectorizer.fit_transform(_texts(train_idx))
+    test_texts = _texts(test_idx)
+    X_test = vectorizer.transform(test_texts)
+    y_train, y_test = _labels[train_idx], _labels[test_idx]
+
+    results = []
+    for C in C_values:
+        model = LogisticRegression(max_iter=1000, class_weight='balanced', C=C,
+                                   solver='liblinear', random_state=42)
+        model.fit(X_train, y_train)
+        y_pred = model.predict(X_test)
+        result = {
+            "ngram_max": ngram_max,
+            "max_features": max_features,
+            "C": C,
+            "fold": fold,
+            "accuracy": accuracy_score(y_test, y_pred),
+            "f1": f1_score(y_test, y_pred),
+        }
+        if fold == 0:
+            n_features, size, latency = serving_cost(vectorizer, model, test_texts, n_latency)
+            result.update(n_features=n_features, artifact_bytes=size, latency_us=latency)
+        results.append(result)
+    return results
+
+
+def leaderboard(fold_results):
+    """One row per grid point: fold-averaged quality plus fold 0 serving cost"""
+    grouped = {}
+    for result in fold_results:
+        grouped.setdefault((result["ngram_max"], result["max_features"], result["C"]), []).append(result)
+
+    rows = []
+    for (ngram_max, max_features, C), results in grouped.items():
+        cost = next(r for r in results if r["fold"] == 0)
+        f1 = [r["f1"] for r in results]
+        rows.append({
+            "ngram_max": ngram_max,
+            "max_features": max_features,
+            "C": C,
+            "accuracy": float(np.mean([r["accuracy"] for r in results])),
+            "f1": float(np.mean(f1)),
+            "f1_std": float(np.std(f1)),
+            "n_features": cost["n_features"],
+            "artifact_bytes": cost["artifact_bytes"],
+            "latency_us": cost["latency_us"],
+        })
+    rows.sort(key=lambda r: r["f1"], reverse=True)
+
+    for row in rows:
+        row["pareto"] = not any(
+            other["f1"] >= row["f1"] and other["latency_us"] <= row["latency_us"]
+            and other["artifact_bytes"] <= row["artifact_bytes"]
+            and (other["f1"], other["latency_us"], other["artifact_bytes"])
+            != (row["f1"], row["latency_us"], row["artifact_bytes"])
+            for other in rows
+        )
+    return rows
+
+
+def print_leaderboard(rows):
+    print(f"\n{'':1} {'ngram':>5} {'max_feat':>8} {'C':>6} {'accuracy':>8} {'f1':>13} "
+          f"{'features':>8} {'artifact':>9} {'latency':>9}")
+    for row in rows:
+        print(f"{'*' if row['pareto'] else '':1} {row['ngram_max']:>5} {row['max_features']:>8} "
+              f"{row['C']:>6g} {row['accuracy']:8.4f} {row['f1']:6.4f} ±{row['f1_std']:.4f} "
+              f"{row['n_features']:>8} {row['artifact_bytes'] / 1024:7.0f}KB {row['latency_us']:7.1f}µs")
+
+
+def parse_list(kind):
+    return lambda value: [kind(v) for v in value.split(",")]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", default=os.path.join("data", "fake_review.csv"))
+    parser.add_argument("--text-column", default="text_")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--ngram-max", type=parse_list(int), default=[1, 2])
+    parser.add_argument("--max-features", type=parse_list(int), default=[2000, 5000, 20000])
+    parser.add_argument("--C", type=parse_list(float), default=[0.1, 0.5, 1.0, 2.0])
+    parser.add_argument("--folds", type=int, default=3)
+    parser.add_argument("--sample", type=int, help="Search on a random sample of this many reviews")
+    parser.add_argument("--latency-reviews", type=int, default=1000,
+                        help="Held-out reviews timed per model")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("-o", "--output", help="Write the leaderboard as JSON here")
+    args = parser.parse_args(argv)
+
+    cache_path = ensure_corpus_cache(args.data, args.text_column, args.cache_dir, processes=args.processes)
+    labels = read_corpus(cache_path).column('label').to_numpy().astype(np.int64)
+    sample_rows = None
+    if args.sample and args.sample < len(labels):
+        sample_rows = np.sort(np.random.default_rng(42).choice(len(labels), args.sample, replace=False))
+        labels = labels[sample_rows]
+
+    folds = list(StratifiedKFold(args.folds, shuffle=True, random_state=42).split(labels, labels))
+    configs = list(itertools.product(args.ngram_max, args.max_features))
+    print(f"🔎 {len(configs)} vectorizer settings x {len(args.C)} C values x {args.folds} folds "
+          f"on {len(labels):,} reviews, {args.processes} processes")
+
+    fold_results = []
+    with ProcessPoolExecutor(max_workers=args.processes, initializer=_init_worker,
+                             initargs=(cache_path, sample_rows)) as pool:
+        # Largest vocabularies first, so the slowest tasks do not start last
+        tasks = sorted(itertools.product(configs, range(args.folds)),
+                       key=lambda task: (-task[0][0], -task[0][1]))
+        futures = [
+            pool.submit(evaluate, ngram_max, max_features, fold, *folds[fold], args.C, args.latency_reviews)
+            for (ngram_max, max_features), fold in tasks
+        ]
+        for done, future in enumerate(as_completed(futures), 1):
+            fold_results.extend(future.result())
+            print(f"  {done}/{len(futures)} vectorizer fits done")
+
+    rows = leaderboard(fold_results)
+    print_leaderboard(rows)
+    best = rows[0]
+    print(f"\n🏆 Best F1: python train_model.py --ngram-max {best['ngram_max']} "
+          f"--max-features {best['max_features']} --C {best['C']:g}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(rows, f, indent=2)
+        print(f"✅ Leaderboard written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
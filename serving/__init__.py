@@ -0,0 +1,4 @@
+"""Serving-time model runtime: compiled scorers and artifact loading."""
+from serving.compiled import CompiledModel
+from serving.cache import PredictionCache
+from serving.batcher import MicroBatcher
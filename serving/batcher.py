@@ -0,0 +1,133 @@
+"""Async micro-batching scheduler for the predict path.
+
+Requests are queued on the event loop and handed to ``process_batch`` as one
+list once ``max_batch_size`` items are waiting or ``max_wait_ms`` has passed
+since the first one arrived, whichever comes first. Batches run on dedicated
+worker threads (one by default, more when ``process_batch`` hands work to a
+process pool), so the event loop keeps accepting requests while they are
+scored and one thread hop is paid per batch instead of per request. Each
+caller awaits its own future.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+class MicroBatcher:
+    def __init__(self, process_batch, max_batch_size=64, max_wait_ms=2.0, max_concurrent_batches=1):
+        if max_batch_size < 1 or max_concurrent_batches < 1:
+            raise ValueError("max_batch_size and max_concurrent_batches must be at least 1")
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_concurrent_batches = max_concurrent_batches
+        self._slots = None
+        self._loop = None
+        self._queue = None
+        self._batch_full = None
+        self._task = None
+        self._executor = None
+        self.batches = 0
+        self.items = 0
+
+    def _start(self):
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._batch_full = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.max_concurrent_batches)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrent_batches, thread_name_prefix="microbatch"
+            )
+        self._task = self._loop.create_task(self._run())
+
+    async def submit(self, item):
+        """Queue one item and wait for its result"""
+        # (Re)start on first use and whenever we are running on a new event loop
+        if self._task is None or self._loop is not asyncio.get_running_loop():
+            self._start()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, future))
+        # The worker already holds the first item of the batch it is filling
+        if self._queue.qsize() >= self.max_batch_size - 1:
+            self._batch_full.set()
+        return await future
+
+    async def _next_batch(self):
+        batch = [await self._queue.get()]
+        if self.max_wait > 0 and self._queue.qsize() < self.max_batch_size - 1:
+            self._batch_full.clear()
+            try:
+                await asyncio.wait_for(self._batch_full.wait(), self.max_wait)
+            except asyncio.TimeoutError:
+                pass
+            except asyncio.CancelledError:
+                # Closed while filling: the first item is off the queue, fail it here
+                self._fail(batch)
+                raise
+        while len(batch) < self.max_batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self):
+        while True:
+            # Wait for a free slot first, so requests keep queueing (and the
+            # next batch keeps growing) while every slot is busy
+            await self._slots.acquire()
+            batch = await self._next_batch()
+            # Skip callers that gave up (e.g. client disconnected) while queued
+            batch = [(item, future) for item, future in batch if not future.done()]
+            if not batch:
+                self._slots.release()
+                continue
+            self._loop.create_task(self._dispatch(batch))
+
+    async def _dispatch(self, batch):
+        try:
+            results = await self._loop.run_in_executor(
+                self._executor, self.process_batch, [item for item, _ in batch]
+            )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._slots.release()
+
+        self.batches += 1
+        self.items += len(batch)
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    @staticmethod
+    def _fail(batch):
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(RuntimeError("Micro-batcher shut down"))
+
+    async def close(self):
+        """Stop the worker task and fail any requests still queued"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            while not self._queue.empty():
+                self._fail([self._queue.get_nowait()])
+            self._task = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def stats(self):
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "max_concurrent_batches": self.max_concurrent_batches,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+        }
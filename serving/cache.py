@@ -0,0 +1,96 @@
+"""Bounded LRU + TTL cache for predictions, keyed on the cleaned review text.
+
+Entries are tied to the fingerprint of the model that produced them: the
+first lookup made with a different fingerprint empties the cache, so a new
+model artifact never serves predictions from the old one.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+def text_key(cleaned):
+    """Fixed-size cache key for a cleaned review"""
+    return hashlib.blake2b(cleaned.encode('utf-8'), digest_size=16).digest()
+
+
+class PredictionCache:
+    def __init__(self, max_entries=10000, ttl_seconds=3600.0, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._model_version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def _check_version(self, model_version):
+        # Caller holds the lock
+        if model_version != self._model_version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._model_version = model_version
+
+    def get(self, cleaned, model_version):
+        """Return the cached value for ``cleaned`` or None"""
+        if not self.enabled:
+            return None
+        key = text_key(cleaned)
+        with self._lock:
+            self._check_version(model_version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, cleaned, model_version, value):
+        if not self.enabled:
+            return
+        key = text_key(cleaned)
+        with self._lock:
+            self._check_version(model_version)
+            self._entries[key] = (self._clock() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "model_version": self._model_version,
+            }
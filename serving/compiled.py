@@ -0,0 +1,726 @@
+"""Compiled TF-IDF + LogisticRegression scorer.
+
+``CompiledModel`` folds a fitted ``TfidfVectorizer`` and a binary
+``LogisticRegression`` into a handful of flat arrays: the sorted vocabulary,
+float32 ``idf`` and ``coef`` arrays and the intercept. Scoring a cleaned review
+is then a sparse dot product over the n-grams it contains, with no scipy
+matrices or sklearn input validation per request.
+
+The artifact is a pickle-free directory of versions, each written in full
+before the ``CURRENT`` pointer file is swapped to it with ``os.replace``, so
+readers always see one complete version::
+
+    CURRENT               name of the current version directory
+    v<ns>-<pid>/
+        manifest.json     format version, intercept, classes, vectorizer settings
+        terms.npy         UTF-8 string table of the vocabulary, newline separated
+        term_keys.npy     the same vocabulary as a sorted fixed-width bytes array,
+                          searched in place with ``np.searchsorted``
+        stop_words.npy    UTF-8 string table of the vectorizer stop words
+        idf.npy           float32 idf weights, one per term
+        coef.npy          float32 coefficients, one per term
+        category_coef.npy optional float32 (n_features, n_categories) matrix of
+                          per-category models sharing the vectorizer
+
+Artifacts written before versioning (the files directly in the directory)
+still load, and are replaced by the first versioned save.
+
+Models trained on a ``HashingVectorizer`` (see ``train_model.py --learner
+sgd``) compile to ``HashedCompiledModel``: there is no vocabulary or idf,
+n-grams are hashed to feature indices exactly like sklearn does, and the
+artifact is written as format version 3 (``coef.npy`` and ``stop_words.npy``
+only) so that version 2 loaders refuse it.
+
+``save(path, coef_dtype="int8")`` (or ``"float16"``) stores the coefficients
+quantized, with the scale in the manifest, as format version 4; they are
+scored in that dtype and scaled per review, never expanded.
+``prune(threshold)`` drops the terms whose coefficients are all below
+``threshold`` in magnitude. ``export_model.py`` combines the two for
+small edge artifacts and reports what they cost in F1.
+
+Per-category models (``train_model.py --category-column``) are stacked as
+columns of one coefficient matrix next to the global model, so scoring a
+review against one or every category is a single product of its sparse
+tf-idf vector with the rows of that matrix it touches. Categories that were
+too small to train are listed in the manifest and scored with the global
+weights.
+
+The arrays are opened with ``np.load(mmap_mode='r')`` and scored in place:
+vocabulary lookups are a binary search over ``term_keys`` and a review only
+gathers the idf and coefficient entries of its own n-grams. Every worker
+process therefore maps the same page-cache pages instead of holding its own
+copy, and loading takes a few milliseconds. Convert existing pickles with:
+
+    python -m serving.compiled model/fake_review_model.pkl model/vectorizer.pkl model/compiled
+"""
+import functools
+import hashlib
+import json
+import math
+import os
+import re
+import shutil
+import struct
+import sys
+import time
+
+import numpy as np
+
+FORMAT_VERSION = 2
+# Hashed artifacts have no vocabulary or idf arrays; a loader that only knows
+# version 2 would read them as an empty-vocabulary TF-IDF model
+HASHED_FORMAT_VERSION = 3
+# int8/float16 coefficients need their manifest scale; version 2 and 3 loaders
+# would score the raw stored values
+QUANTIZED_FORMAT_VERSION = 4
+SUPPORTED_FORMAT_VERSIONS = (FORMAT_VERSION, HASHED_FORMAT_VERSION, QUANTIZED_FORMAT_VERSION)
+
+MANIFEST_FILE = "manifest.json"
+CURRENT_FILE = "CURRENT"
+VERSION_PREFIX = "v"
+ARRAY_FILES = ("terms", "stop_words", "idf", "coef")
+CATEGORY_COEF_FILE = "category_coef"
+COEF_DTYPES = ("float32", "float16", "int8")
+
+
+def _pack_strings(strings):
+    """Pack strings into a newline separated UTF-8 byte array"""
+    return np.frombuffer('\n'.join(strings).encode('utf-8'), dtype=np.uint8)
+
+
+def _quantize(values, dtype):
+    """Return (stored array, scale) so that ``stored * scale`` approximates ``values``"""
+    values = np.asarray(values, dtype=np.float32)
+    if dtype == "int8":
+        peak = float(np.abs(values).max()) if values.size else 0.0
+        scale = peak / 127 if peak else 1.0
+        return np.round(values / scale).astype(np.int8), scale
+    if dtype not in COEF_DTYPES:
+        raise ValueError(f"coef_dtype must be one of {COEF_DTYPES}")
+    return values.astype(dtype), 1.0
+
+
+def _dequantize(stored, scale):
+    """float32 copy of a stored (possibly quantized) coefficient array"""
+    if stored.dtype == np.float32 and scale == 1.0:
+        return np.asarray(stored)
+    return stored.astype(np.float32) * np.float32(scale)
+
+
+def _term_keys(terms):
+    """Vocabulary as a fixed-width bytes array; UTF-8 keeps the code point order"""
+    encoded = [term.encode('utf-8') for term in terms]
+    return np.array(encoded, dtype=f"S{max(map(len, encoded), default=1)}")
+
+
+def _stored(values):
+    """``values`` as-is if it is already float32/float16/int8, else as float32"""
+    values = np.asarray(values)
+    if values.dtype.name in COEF_DTYPES:
+        return values
+    return values.astype(np.float32)
+
+
+def _unpack_strings(array):
+    data = array.tobytes().decode('utf-8')
+    return data.split('\n') if data else []
+
+
+def murmurhash3_32(data, seed=0):
+    """Signed MurmurHash3 (x86, 32-bit) of ``data`` bytes, equal to sklearn's murmurhash3_32"""
+    c1, c2, mask = 0xcc9e2d51, 0x1b873593, 0xffffffff
+    length = len(data)
+    rounded = length & ~3
+    h = seed
+    for (k,) in struct.iter_unpack('<I', data[:rounded]):
+        k = (k * c1) & mask
+        k = ((k << 15) | (k >> 17)) & mask
+        h ^= (k * c2) & mask
+        h = ((h << 13) | (h >> 19)) & mask
+        h = (h * 5 + 0xe6546b64) & mask
+    if length & 3:
+        k = (int.from_bytes(data[rounded:], 'little') * c1) & mask
+        k = ((k << 15) | (k >> 17)) & mask
+        h ^= (k * c2) & mask
+    h ^= length
+    h ^= h >> 16
+    h = (h * 0x85ebca6b) & mask
+    h ^= h >> 13
+    h = (h * 0xc2b2ae35) & mask
+    h ^= h >> 16
+    return h - 0x100000000 if h & 0x80000000 else h
+
+
+def _sigmoid(score):
+    if score >= 0:
+        return 1.0 / (1.0 + math.exp(-score))
+    z = math.exp(score)
+    return z / (1.0 + z)
+
+
+class CompiledModel:
+    vectorizer = "tfidf"
+
+    def __init__(self, terms, idf, coef, intercept, classes,
+                 ngram_range=(1, 1), token_pattern=r"(?u)\b\w\w+\b", stop_words=(),
+                 categories=(), category_coef=None, category_intercepts=(),
+                 coef_scale=1.0, category_coef_scale=1.0, fallback_categories=()):
+        """``terms`` is a list of strings, or an already sorted ``term_keys`` array (e.g. memory-mapped)
+
+        ``fallback_categories`` had too few reviews for a model of their own
+        and are scored with the global weights.
+
+        Arrays that already have a stored dtype (float32, or int8/float16 with
+        a scale) are kept as they are, so memory-mapped ones are never copied.
+        """
+        self.coef = _stored(coef)
+        self.coef_scale = float(coef_scale)
+        self.idf = None if idf is None else np.asarray(idf, dtype=np.float32)
+        self.categories = list(categories)
+        self.fallback_categories = [c for c in fallback_categories if c not in self.categories]
+        self.category_coef = None
+        self.category_coef_scale = float(category_coef_scale)
+        if self.categories:
+            self.category_coef = _stored(category_coef)
+            if self.category_coef.shape != (len(self.coef), len(self.categories)):
+                raise ValueError("category_coef must be (n_features, n_categories)")
+        if isinstance(terms, np.ndarray) and terms.dtype.kind == 'S':
+            self.term_keys = terms
+        else:
+            self._set_terms(list(terms))
+        self.intercept = float(intercept)
+        self.classes = list(classes)
+        self.ngram_range = tuple(ngram_range)
+        self.token_pattern = token_pattern
+        self.stop_words = frozenset(stop_words)
+        self.category_intercepts = np.asarray(category_intercepts, dtype=np.float64)
+        self._category_index = {category: j for j, category in enumerate(self.categories)}
+        self._token_re = re.compile(token_pattern)
+
+        self.fingerprint = self._fingerprint()
+
+    def _set_terms(self, terms):
+        """Build ``term_keys``, reordering the feature arrays if ``terms`` is not sorted"""
+        keys = _term_keys(terms)
+        if len(keys) > 1 and (keys[1:] < keys[:-1]).any():
+            order = np.argsort(keys, kind='stable')
+            keys = keys[order]
+            self.coef = self.coef[order]
+            if self.idf is not None:
+                self.idf = self.idf[order]
+            if self.categories:
+                self.category_coef = self.category_coef[order]
+        self.term_keys = keys
+
+    @property
+    def terms(self):
+        """The vocabulary as strings (a new list; not used for scoring)"""
+        return [key.decode('utf-8') for key in self.term_keys]
+
+    def dense_coef(self):
+        """float32 copy of the global coefficients, dequantized"""
+        return _dequantize(self.coef, self.coef_scale)
+
+    def dense_category_coef(self):
+        return _dequantize(self.category_coef, self.category_coef_scale) if self.categories else None
+
+    def _fingerprint(self):
+        """Short content hash identifying this exact model"""
+        digest = hashlib.sha256()
+        settings = [self.intercept, self.classes, list(self.ngram_range), self.token_pattern,
+                    str(self.coef.dtype), self.coef_scale]
+        digest.update(json.dumps(settings).encode('utf-8'))
+        # Contiguous arrays are hashed through the buffer protocol, without a copy
+        digest.update(np.ascontiguousarray(self.term_keys))
+        digest.update(_pack_strings(sorted(self.stop_words)).tobytes())
+        if self.idf is not None:
+            digest.update(np.ascontiguousarray(self.idf))
+        digest.update(np.ascontiguousarray(self.coef))
+        if self.categories:
+            digest.update(json.dumps([self.categories, self.category_intercepts.tolist(),
+                                      self.category_coef_scale]).encode('utf-8'))
+            digest.update(np.ascontiguousarray(self.category_coef))
+        if self.fallback_categories:
+            digest.update(json.dumps(self.fallback_categories).encode('utf-8'))
+        return digest.hexdigest()[:16]
+
+    @classmethod
+    def from_sklearn(cls, vectorizer, model, category_models=None):
+        """Compile a fitted TfidfVectorizer (or HashingVectorizer) and a binary linear classifier
+
+        ``category_models`` optionally maps category names to more binary
+        classifiers fitted on the same vectorizer's features; categories
+        mapped to None are scored with the global model.
+        """
+        if (vectorizer.analyzer != 'word' or vectorizer.tokenizer is not None
+                or vectorizer.preprocessor is not None or vectorizer.strip_accents is not None
+                or not vectorizer.lowercase or vectorizer.binary
+                or getattr(vectorizer, 'sublinear_tf', False) or vectorizer.norm != 'l2'):
+            raise ValueError("Only word-level, lowercased, l2-normalized TF-IDF vectorizers can be compiled")
+        fallback_categories = [c for c, m in (category_models or {}).items() if m is None]
+        category_models = {c: m for c, m in (category_models or {}).items() if m is not None}
+        for m in [model, *category_models.values()]:
+            if len(m.classes_) != 2 or list(m.classes_) != list(model.classes_):
+                raise ValueError("Only binary classifiers with the same classes can be compiled")
+
+        if not hasattr(vectorizer, 'vocabulary_'):
+            if getattr(vectorizer, 'alternate_sign', True):
+                raise ValueError("Only HashingVectorizers with alternate_sign=False can be compiled")
+            cls = HashedCompiledModel
+            terms = []
+            idf = None
+        else:
+            terms = vectorizer.get_feature_names_out().tolist()
+            idf = vectorizer.idf_ if vectorizer.use_idf else None
+
+        return cls(
+            terms=terms,
+            idf=idf,
+            coef=model.coef_[0],
+            intercept=model.intercept_[0],
+            classes=[c.item() if hasattr(c, 'item') else c for c in model.classes_],
+            ngram_range=vectorizer.ngram_range,
+            token_pattern=vectorizer.token_pattern,
+            stop_words=vectorizer.get_stop_words() or (),
+            categories=list(category_models),
+            category_coef=(np.stack([m.coef_[0] for m in category_models.values()], axis=1)
+                           if category_models else None),
+            category_intercepts=[m.intercept_[0] for m in category_models.values()],
+            fallback_categories=fallback_categories,
+        )
+
+    def with_weights(self, coef, intercept):
+        """Same feature space (terms, idf, n-gram settings, category models) with new global weights"""
+        if len(coef) != self.n_features:
+            raise ValueError(f"Expected {self.n_features} coefficients, got {len(coef)}")
+        return type(self)(
+            terms=self.term_keys,
+            idf=self.idf,
+            coef=coef,
+            intercept=intercept,
+            classes=self.classes,
+            ngram_range=self.ngram_range,
+            token_pattern=self.token_pattern,
+            stop_words=self.stop_words,
+            categories=self.categories,
+            category_coef=self.category_coef,
+            category_intercepts=self.category_intercepts,
+            category_coef_scale=self.category_coef_scale,
+            fallback_categories=self.fallback_categories,
+        )
+
+    def prune(self, threshold):
+        """Copy without the terms whose global and per-category coefficients are all below ``threshold``
+
+        Pruned n-grams are treated like any out-of-vocabulary n-gram, so they
+        also drop out of the l2 norm of the review's tf-idf vector.
+        """
+        if self.vectorizer == "hashing":
+            raise ValueError("Hashed models cannot be pruned: a feature's index is its hash")
+        magnitude = np.abs(self.dense_coef())
+        if self.categories:
+            magnitude = np.maximum(magnitude, np.abs(self.dense_category_coef()).max(axis=1))
+        keep = np.flatnonzero(magnitude >= threshold)
+        return type(self)(
+            terms=self.term_keys[keep],
+            idf=self.idf[keep] if self.idf is not None else None,
+            coef=self.coef[keep],
+            intercept=self.intercept,
+            classes=self.classes,
+            ngram_range=self.ngram_range,
+            token_pattern=self.token_pattern,
+            stop_words=self.stop_words,
+            categories=self.categories,
+            category_coef=self.category_coef[keep] if self.categories else None,
+            category_intercepts=self.category_intercepts,
+            coef_scale=self.coef_scale,
+            category_coef_scale=self.category_coef_scale,
+            fallback_categories=self.fallback_categories,
+        )
+
+    # ---- SERIALIZATION ----
+    def save(self, path, coef_dtype="float32", activate=True, training=None):
+        """Write a new version into the artifact directory ``path`` and make it current
+
+        ``coef_dtype`` "float16" or "int8" (one scale per array) makes the
+        coefficient arrays two or four times smaller, at some precision.
+        With ``activate=False`` the version is written but not pointed to;
+        ``activate_version`` publishes it later. ``training`` (JSON-able, e.g.
+        how the held-out split was drawn) is kept in the manifest for
+        ``read_manifest``. Returns the version directory.
+        """
+        coef, coef_scale = _quantize(self.dense_coef(), coef_dtype)
+        hashed = self.vectorizer == "hashing"
+        if coef_dtype != "float32":
+            format_version = QUANTIZED_FORMAT_VERSION
+        else:
+            format_version = HASHED_FORMAT_VERSION if hashed else FORMAT_VERSION
+        manifest = {
+            "format_version": format_version,
+            "vectorizer": self.vectorizer,
+            "n_features": self.n_features,
+            "intercept": self.intercept,
+            "classes": self.classes,
+            "ngram_range": list(self.ngram_range),
+            "token_pattern": self.token_pattern,
+            "categories": self.categories,
+            "fallback_categories": self.fallback_categories,
+            "category_intercepts": self.category_intercepts.tolist(),
+            "coef_dtype": coef_dtype,
+            "coef_scale": coef_scale,
+        }
+        if training is not None:
+            manifest["training"] = training
+        arrays = {
+            "stop_words": _pack_strings(sorted(self.stop_words)),
+            "coef": coef,
+        }
+        if not hashed:
+            arrays["terms"] = _pack_strings(self.terms)
+            arrays["term_keys"] = self.term_keys
+            arrays["idf"] = self.idf if self.idf is not None else np.ones(self.n_features, dtype=np.float32)
+        if self.categories:
+            arrays[CATEGORY_COEF_FILE], manifest["category_coef_scale"] = _quantize(
+                self.dense_category_coef(), coef_dtype)
+
+        path = os.path.abspath(path)
+        os.makedirs(path, exist_ok=True)
+        version = f"{VERSION_PREFIX}{time.time_ns()}-{os.getpid()}"
+        version_path = os.path.join(path, version)
+        os.makedirs(version_path)
+        for name, array in arrays.items():
+            np.save(os.path.join(version_path, f"{name}.npy"), array, allow_pickle=False)
+        # Manifest goes last: a directory without one is never a valid artifact
+        with open(os.path.join(version_path, MANIFEST_FILE), "w") as f:
+            json.dump(manifest, f, indent=2)
+        if activate:
+            activate_version(path, version)
+        return version_path
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Open an artifact directory (or one version of it); arrays are memory-mapped read-only by default"""
+        path = current_version(path)
+        manifest = read_manifest(path)
+        if manifest["format_version"] not in SUPPORTED_FORMAT_VERSIONS:
+            raise ValueError(f"Unsupported compiled model format: {manifest['format_version']}")
+        vectorizer = manifest.get("vectorizer", CompiledModel.vectorizer)
+        model_classes = {model_cls.vectorizer: model_cls for model_cls in (CompiledModel, HashedCompiledModel)}
+        if vectorizer not in model_classes:
+            raise ValueError(f"Unsupported compiled model vectorizer: {vectorizer}")
+        hashed = vectorizer == HashedCompiledModel.vectorizer
+
+        mmap_mode = 'r' if mmap else None
+        arrays = {}
+        for name in (*ARRAY_FILES, "term_keys", CATEGORY_COEF_FILE):
+            array_path = os.path.join(path, f"{name}.npy")
+            # Hashed artifacts have no terms/idf; older ones have no term_keys
+            if name in ("stop_words", "coef") or os.path.exists(array_path):
+                arrays[name] = np.load(array_path, mmap_mode=mmap_mode, allow_pickle=False)
+        if not hashed and "idf" not in arrays:
+            raise ValueError(f"Corrupt compiled model at {path}: idf.npy is missing")
+        categories = manifest.get("categories", [])
+        compiled = model_classes[vectorizer](
+            # Artifacts written before term_keys.npy existed get it built in memory
+            terms=(arrays["term_keys"] if "term_keys" in arrays
+                   else _unpack_strings(arrays["terms"]) if not hashed else []),
+            idf=None if hashed else arrays["idf"],
+            coef=arrays["coef"],
+            coef_scale=manifest.get("coef_scale", 1.0),
+            intercept=manifest["intercept"],
+            classes=manifest["classes"],
+            ngram_range=manifest["ngram_range"],
+            token_pattern=manifest["token_pattern"],
+            stop_words=_unpack_strings(arrays["stop_words"]),
+            categories=categories,
+            category_coef=arrays.get(CATEGORY_COEF_FILE),
+            category_coef_scale=manifest.get("category_coef_scale", 1.0),
+            category_intercepts=manifest.get("category_intercepts", []),
+            fallback_categories=manifest.get("fallback_categories", []),
+        )
+        if compiled.n_features != manifest["n_features"]:
+            raise ValueError(f"Corrupt compiled model at {path}: feature count mismatch")
+        return compiled
+
+    # ---- SCORING ----
+    def ngrams(self, text):
+        """Word n-grams of ``text``, generated exactly like TfidfVectorizer does"""
+        tokens = [w for w in self._token_re.findall(text.lower()) if w not in self.stop_words]
+        min_n, max_n = self.ngram_range
+        n_tokens = len(tokens)
+        for n in range(min_n, min(max_n, n_tokens) + 1):
+            if n == 1:
+                yield from tokens
+            else:
+                for i in range(n_tokens - n + 1):
+                    yield ' '.join(tokens[i:i + n])
+
+    def term_counts(self, text):
+        """Map vocabulary index -> count for the n-grams in ``text``"""
+        return self.count_terms(self.ngrams(text))
+
+    def feature_index(self, gram):
+        """Feature index of one n-gram, or None if the model does not use it"""
+        indices = self._lookup([gram])
+        return int(indices[0]) if len(indices) else None
+
+    def _lookup(self, grams):
+        """Vocabulary indices of the ``grams`` that are in it, by binary search over ``term_keys``"""
+        keys = self.term_keys
+        width = keys.dtype.itemsize
+        encoded = [gram.encode('utf-8') for gram in grams]
+        # Longer n-grams cannot be in the vocabulary (and would be truncated)
+        probes = np.array([e for e in encoded if len(e) <= width], dtype=keys.dtype)
+        if not len(probes) or not len(keys):
+            return np.empty(0, dtype=np.intp)
+        positions = np.minimum(np.searchsorted(keys, probes), len(keys) - 1)
+        return positions[keys[positions] == probes]
+
+    def count_terms(self, grams):
+        """Map vocabulary index -> count for an iterable of n-grams"""
+        counts = {}
+        for i in self._lookup(grams).tolist():
+            counts[i] = counts.get(i, 0) + 1
+        return counts
+
+    def decision_function(self, text):
+        """Linear score of a cleaned review: coef . tfidf(text) + intercept"""
+        return self.decision_from_counts(self.term_counts(text))
+
+    def decision_from_counts(self, counts):
+        """Linear score from ``term_counts``; tf-idf weighting and l2 norm are folded in"""
+        if not counts:
+            return self.intercept
+        indices, values = self.tfidf_vector(counts)
+        return float(values @ self.coef[indices]) * self.coef_scale + self.intercept
+
+    def predict_proba(self, text):
+        """Probability of ``classes[1]`` for a cleaned review"""
+        return _sigmoid(self.decision_function(text))
+
+    def predict(self, text):
+        """Return (label, confidence) for a cleaned review"""
+        return self.predict_counts(self.term_counts(text))
+
+    def predict_counts(self, counts):
+        """Return (label, confidence) from ``term_counts``"""
+        p = _sigmoid(self.decision_from_counts(counts))
+        if p > 0.5:
+            return self.classes[1], p
+        return self.classes[0], 1.0 - p
+
+    def tfidf_vector(self, counts):
+        """(feature indices, l2-normalized tf-idf values) arrays from ``term_counts``"""
+        indices = np.fromiter(counts, dtype=np.intp, count=len(counts))
+        values = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+        if self.idf is not None:
+            values *= self.idf[indices]
+        norm = math.sqrt(values @ values)
+        if norm:
+            values /= norm
+        return indices, values
+
+    @property
+    def all_categories(self):
+        """Every category ``predict_categories`` scores: its own models first, then the fallbacks"""
+        return self.categories + self.fallback_categories
+
+    def predict_categories(self, text, categories=None):
+        """Return [(category, label, confidence)] for ``categories`` (default: all) of a cleaned review
+
+        One sparse x dense product: the review's tf-idf values times the rows
+        of the stacked coefficient matrix for the n-grams it contains.
+        Fallback categories get the global model's score.
+        """
+        if not self.all_categories:
+            raise ValueError("This model has no per-category models")
+        if categories is None:
+            categories = self.all_categories
+        columns = []
+        for category in categories:
+            if category not in self._category_index and category not in self.fallback_categories:
+                raise ValueError(f"Unknown category: {category}")
+            columns.append(self._category_index.get(category))
+        trained = [j for j in columns if j is not None]
+        indices, values = self.tfidf_vector(self.term_counts(text))
+        scores = iter(())
+        if trained:
+            rows = self.category_coef[indices] if trained == list(range(len(self.categories))) else \
+                self.category_coef[np.ix_(indices, trained)]
+            scores = iter(((values @ rows) * self.category_coef_scale + self.category_intercepts[trained]).tolist())
+        if len(trained) < len(columns):
+            global_score = float(values @ self.coef[indices]) * self.coef_scale + self.intercept
+        results = []
+        for category, j in zip(categories, columns):
+            p = _sigmoid(next(scores) if j is not None else global_score)
+            if p > 0.5:
+                results.append((category, self.classes[1], p))
+            else:
+                results.append((category, self.classes[0], 1.0 - p))
+        return results
+
+    def explain(self, text, top_k=10):
+        """Return (label, confidence, top ``top_k`` (n-gram, contribution) pairs) for a cleaned review
+
+        A contribution is the n-gram's normalized tf-idf value times its
+        coefficient, so all of them plus the intercept add up to
+        ``decision_function(text)``; positive ones push towards ``classes[1]``.
+        """
+        grams = list(self.ngrams(text))
+        counts = self.count_terms(grams)
+        label, confidence = self.predict_counts(counts)
+        if not counts:
+            return label, confidence, []
+        indices, values = self.tfidf_vector(counts)
+        contributions = values * self.coef[indices] * self.coef_scale
+        top = np.argsort(-np.abs(contributions), kind='stable')[:top_k]
+        names = self.feature_names(indices[top], grams)
+        return label, confidence, list(zip(names, contributions[top].tolist()))
+
+    def feature_names(self, indices, grams):
+        """The n-gram behind each feature index (``grams`` are the review's own n-grams)"""
+        return [self.term_keys[i].decode('utf-8') for i in indices]
+
+    @property
+    def n_features(self):
+        return len(self.coef)
+
+
+class HashedCompiledModel(CompiledModel):
+    """Compiled HashingVectorizer model: n-grams are hashed, not looked up"""
+    vectorizer = "hashing"
+    # Memoized n-gram -> index entries; review vocabularies are heavily skewed
+    hash_cache_size = 1 << 18
+
+    def __init__(self, terms, idf, coef, intercept, classes, **settings):
+        if len(terms):
+            raise ValueError("A hashed model has no vocabulary")
+        super().__init__([], idf, coef, intercept, classes, **settings)
+        self._feature_index = functools.lru_cache(maxsize=self.hash_cache_size)(self._hash_index)
+
+    def _hash_index(self, gram):
+        n_features = len(self.coef)
+        h = murmurhash3_32(gram.encode('utf-8'))
+        if h == -2147483648:
+            # abs(-2**31) overflows int32; sklearn maps it like this
+            return (2147483647 - (n_features - 1)) % n_features
+        return abs(h) % n_features
+
+    def feature_index(self, gram):
+        return self._feature_index(gram)
+
+    def count_terms(self, grams):
+        """Map hashed feature index -> count, as HashingVectorizer(alternate_sign=False)"""
+        feature_index = self._feature_index
+        counts = {}
+        for gram in grams:
+            i = feature_index(gram)
+            counts[i] = counts.get(i, 0) + 1
+        return counts
+
+    def feature_names(self, indices, grams):
+        """First n-gram of the review hashed to each index"""
+        names = {}
+        for gram in grams:
+            names.setdefault(self._feature_index(gram), gram)
+        return [names[i] for i in indices.tolist()]
+
+
+def current_version(path):
+    """Directory of the version ``path/CURRENT`` names, or ``path`` itself for unversioned artifacts"""
+    try:
+        with open(os.path.join(path, CURRENT_FILE)) as f:
+            return os.path.join(path, f.read().strip())
+    except FileNotFoundError:
+        return path
+
+
+def read_manifest(path):
+    """The manifest of the artifact (or artifact version) at ``path``"""
+    with open(os.path.join(current_version(path), MANIFEST_FILE)) as f:
+        return json.load(f)
+
+
+def activate_version(path, version):
+    """Point ``path/CURRENT`` at ``version`` with a single ``os.replace``
+
+    The version it replaces is kept, since a reader may have just resolved
+    the old pointer; anything older is removed.
+    """
+    path = os.path.abspath(path)
+    pointer = os.path.join(path, CURRENT_FILE)
+    previous = os.path.basename(current_version(path))
+    with open(pointer + ".tmp", "w") as f:
+        f.write(version)
+    os.replace(pointer + ".tmp", pointer)
+
+    if previous == os.path.basename(path):
+        # The unversioned files in ``path`` were current: they are the kept version
+        return
+    # Mapped files cannot be deleted on Windows; they go on a later save
+    for name in os.listdir(path):
+        entry = os.path.join(path, name)
+        if name.startswith(VERSION_PREFIX) and os.path.isdir(entry):
+            if name < previous and name != version:
+                shutil.rmtree(entry, ignore_errors=True)
+        elif name == MANIFEST_FILE or name.endswith(".npy"):
+            try:
+                os.remove(entry)
+            except OSError:
+                pass
+
+
+def compile_pickles(model_path, vectorizer_path, output_path=None, category_models_path=None):
+    """Convert the pickled model and vectorizer (and per-category models) into a compiled artifact"""
+    import pickle
+
+    with open(model_path, "rb") as f:
+        model = pickle.load(f)
+    with open(vectorizer_path, "rb") as f:
+        vectorizer = pickle.load(f)
+    category_models = None
+    if category_models_path is not None:
+        with open(category_models_path, "rb") as f:
+            category_models = pickle.load(f)
+
+    compiled = CompiledModel.from_sklearn(vectorizer, model, category_models)
+    if output_path is not None:
+        compiled.save(output_path)
+    return compiled
+
+
+def artifact_path(model_dir):
+    """Directory of the compiled artifact ``load_model(model_dir)`` loads, or None if it would use the pickles
+
+    ``model_dir`` may also be one version of an artifact (a directory with a
+    manifest), like the ones online updates publish.
+    """
+    if os.path.isfile(os.path.join(model_dir, MANIFEST_FILE)):
+        return model_dir
+    path = os.path.join(model_dir, "compiled")
+    return current_version(path) if os.path.isdir(path) else None
+
+
+def load_model(model_dir):
+    """Load ``model_dir``'s compiled artifact, or compile the pickles in ``model_dir`` if there is none
+
+    Saves never remove ``model_dir/compiled``, so an incomplete one is an
+    error rather than a reason to serve the pickles instead.
+    """
+    path = artifact_path(model_dir)
+    if path is not None:
+        return CompiledModel.load(path)
+    category_models_path = os.path.join(model_dir, "category_models.pkl")
+    return compile_pickles(
+        os.path.join(model_dir, "fake_review_model.pkl"),
+        os.path.join(model_dir, "vectorizer.pkl"),
+        category_models_path=category_models_path if os.path.exists(category_models_path) else None,
+    )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4:
+        print("Usage: python -m serving.compiled MODEL_PKL VECTORIZER_PKL OUTPUT_DIR")
+        sys.exit(1)
+    compiled = compile_pickles(*sys.argv[1:])
+    print(f"✅ Compiled model with {compiled.n_features} features saved to {sys.argv[3]}")
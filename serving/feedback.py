@@ -0,0 +1,253 @@
+"""Moderator feedback and online updates of the served model.
+
+``FeedbackLog`` appends confirmed labels to a local JSON Lines file, one
+record per line, and never rewrites it. ``OnlineUpdater`` tails that log on
+a background thread: once ``min_batch`` new records are waiting it takes a
+few mini-batch SGD steps on the logistic loss, over the active model's
+frozen feature space (same vocabulary and idf, or the same hashing space),
+and publishes the new weights as a fresh compiled artifact in ``output_dir``.
+Each update is written as a new version of that artifact, loaded and swapped
+in by ``ModelRegistry.publish`` (so in-flight requests and inference workers
+switch versions like on any other reload), and only then made the
+artifact's current version; weights that are not published are deleted and
+never served by a restart or a file watch. Publishing does not move
+the registry's ``model_dir``, and it is skipped if the active model was
+replaced while the update ran (the records are then applied again, onto the
+new model, next time).
+
+The updater keeps float64 master weights between updates and records how far
+into the log it got in every version it publishes (``feedback_state.json``
+next to the manifest). On start it reads that state from the active model's
+own artifact, so a restart serving a published version (whatever
+``output_dir`` is then) resumes after the records already in its weights,
+while a restart on the base model replays the whole log onto it.
+"""
+import json
+import logging
+import math
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+
+from preprocessing import clean_text
+from serving.compiled import activate_version, artifact_path
+from serving.pipeline import label_name
+from serving.registry import load_version
+
+logger = logging.getLogger(__name__)
+
+FEEDBACK_LABELS = {label_name(value): value for value in (0, 1)}
+STATE_FILE = "feedback_state.json"
+
+
+class FeedbackLog:
+    """Append-only JSON Lines file of {"ts", "review", "label", "version"} records"""
+
+    def __init__(self, path):
+        self.path = path
+        self.appended = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def append(self, review, label, version=None):
+        record = {"ts": time.time(), "review": review, "label": label, "version": version}
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            # One write per record on an O_APPEND file: lines never interleave
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+            self.appended += 1
+        return record
+
+    def read_from(self, offset, max_records=None):
+        """Return (records, new offset) for the complete lines after byte ``offset``"""
+        if not os.path.exists(self.path):
+            return [], offset
+        records = []
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Still being written; picked up next time
+                    break
+                offset += len(line)
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    logger.warning(f"⚠️ Skipping a corrupt feedback line at byte {offset - len(line)}")
+                    continue
+                if max_records is not None and len(records) >= max_records:
+                    break
+        return records, offset
+
+    def size(self):
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+
+class OnlineUpdater:
+    def __init__(self, registry, log, output_dir, min_batch=32, batch_size=32, epochs=1,
+                 learning_rate=0.5, alpha=1e-4, interval=30.0):
+        self.registry = registry
+        self.log = log
+        self.output_dir = output_dir
+        self.min_batch = min_batch
+        self.batch_size = batch_size
+        self.epochs = epochs
+        self.learning_rate = learning_rate
+        self.alpha = alpha
+        self.interval = interval
+        self.offset = 0
+        self.applied = 0
+        self.skipped = 0
+        self.updates = 0
+        self.last_update = None
+        self.last_loss = None
+        self._coef = None
+        self._intercept = None
+        self._version = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._resume()
+
+    def _resume(self):
+        """Continue after the last record applied to the active model, if it came from this log"""
+        active = self.registry.active
+        path = artifact_path(active.source) if active is not None else None
+        if path is None:
+            return
+        try:
+            with open(os.path.join(path, STATE_FILE)) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        if (state.get("version") == active.model.fingerprint
+                and state.get("log") == os.path.abspath(self.log.path)):
+            self.offset = state["offset"]
+            self.applied = state.get("applied", 0)
+            self.updates = state.get("updates", 0)
+
+    # ---- BACKGROUND THREAD ----
+    def start(self):
+        if self._thread is not None:
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="online-updater", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.update()
+            except Exception as e:
+                logger.error(f"❌ Online update failed: {e}", exc_info=True)
+
+    # ---- UPDATES ----
+    def pending_bytes(self):
+        return max(self.log.size() - self.offset, 0)
+
+    def update(self, force=False):
+        """Apply the feedback logged since the last update; returns the published version or None"""
+        with self._lock:
+            records, offset = self.log.read_from(self.offset)
+            if not records or (len(records) < self.min_batch and not force):
+                return None
+            active = self.registry.active
+            model = active.model
+            if self._version != model.fingerprint:
+                # Someone else (a reload, a promotion) replaced the model: start from its weights
+                self._coef = model.dense_coef().astype(np.float64)
+                self._intercept = model.intercept
+            examples = self._vectorize(model, records)
+            if examples:
+                self.last_loss = self._sgd(examples)
+
+            new = model.with_weights(self._coef, self._intercept)
+            # Written as a new version but only made current once the registry took it
+            artifact_dir = os.path.join(self.output_dir, "compiled")
+            version_path = new.save(artifact_dir, activate=False)
+            # The log position travels with the weights that include it
+            self._write_state(version_path, new.fingerprint, offset,
+                              self.applied + len(examples), self.updates + 1)
+            _, published = self.registry.publish(load_version(version_path, self.registry.loader),
+                                                 model.fingerprint)
+            if published is None:
+                # Reloaded meanwhile: drop these weights, the next update starts from the new model
+                shutil.rmtree(version_path, ignore_errors=True)
+                self._version = None
+                logger.warning(f"⚠️ Active model changed during an online update; not publishing {new.fingerprint}")
+                return None
+            activate_version(artifact_dir, os.path.basename(version_path))
+            self.offset = offset
+            self.skipped += len(records) - len(examples)
+            self.applied += len(examples)
+            self.updates += 1
+            self._version = published.model.fingerprint
+            self.last_update = time.time()
+            logger.info(f"🧠 Online update {self.updates}: {len(examples)} feedback reviews, "
+                        f"{model.fingerprint} -> {self._version}")
+            return self._version
+
+    def _vectorize(self, model, records):
+        """(feature indices, tf-idf values, target) for every usable record"""
+        examples = []
+        positive = model.classes[1]
+        for record in records:
+            cleaned = clean_text(record.get("review"))
+            if not cleaned or record.get("label") not in model.classes:
+                continue
+            indices, values = model.tfidf_vector(model.term_counts(cleaned))
+            examples.append((indices, values, 1.0 if record["label"] == positive else 0.0))
+        return examples
+
+    def _sgd(self, examples):
+        """Mini-batch gradient steps on the L2-regularized log loss; returns the mean loss seen"""
+        coef = self._coef
+        rng = np.random.default_rng(self.updates)
+        losses = []
+        for _ in range(self.epochs):
+            order = rng.permutation(len(examples))
+            for start in range(0, len(order), self.batch_size):
+                batch = [examples[i] for i in order[start:start + self.batch_size]]
+                grad = np.zeros_like(coef)
+                grad_intercept = 0.0
+                for indices, values, target in batch:
+                    p = 1.0 / (1.0 + math.exp(-(values @ coef[indices] + self._intercept)))
+                    np.add.at(grad, indices, (p - target) * values)
+                    grad_intercept += p - target
+                    losses.append(-math.log(max(p if target else 1.0 - p, 1e-12)))
+                n = len(batch)
+                coef -= self.learning_rate * (grad / n + self.alpha * coef)
+                self._intercept -= self.learning_rate * grad_intercept / n
+        return float(np.mean(losses))
+
+    def _write_state(self, version_path, version, offset, applied, updates):
+        state = {"offset": offset, "version": version, "applied": applied,
+                 "updates": updates, "log": os.path.abspath(self.log.path)}
+        with open(os.path.join(version_path, STATE_FILE), "w") as f:
+            json.dump(state, f, indent=2)
+
+    def stats(self):
+        return {
+            "log": self.log.path,
+            "appended": self.log.appended,
+            "applied": self.applied,
+            "skipped": self.skipped,
+            "updates": self.updates,
+            "pending_bytes": self.pending_bytes(),
+            "last_update": self.last_update,
+            "last_loss": self.last_loss,
+            "model_dir": self.output_dir,
+            "running": self._thread is not None,
+        }
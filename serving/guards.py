@@ -0,0 +1,117 @@
+"""Input size guards that run before any review text is copied.
+
+Cleaning a review lowercases it, runs two regexes over it and splits it into
+tokens, so a multi-megabyte review costs several full-size copies and
+hundreds of milliseconds before it can even be rejected. ``InputGuard`` looks
+only at ``len(review)`` (constant time for a Python string): reviews that are
+too short to ever pass cleaning are rejected outright, and reviews longer than
+``max_review_chars`` are cut at a word boundary (or rejected with
+``truncate=False``), so cleaning and n-gram building only ever see a bounded
+prefix. ``BodySizeLimitMiddleware`` bounds the request body itself.
+"""
+import json
+
+from starlette.exceptions import HTTPException
+
+from serving.pipeline import INVALID_REVIEW
+
+MIN_REVIEW_CHARS = 10
+
+
+class InputGuard:
+    def __init__(self, max_review_chars=5000, truncate=True, min_chars=MIN_REVIEW_CHARS):
+        self.max_review_chars = max_review_chars
+        self.truncate = truncate
+        self.min_chars = min_chars
+
+    def check(self, review):
+        """Return (text to score, error, reason); ``reason`` is None for untouched reviews
+
+        ``text`` is the review itself or its truncated prefix, ``error`` is
+        set when the review must not be scored at all.
+        """
+        if not isinstance(review, str):
+            return review, None, None
+        n_chars = len(review)
+        if n_chars < self.min_chars:
+            # The cleaner rejects these too, after copying them
+            return None, INVALID_REVIEW, "too_short"
+        if n_chars <= self.max_review_chars:
+            return review, None, None
+        if not self.truncate:
+            return None, f"Review too long: {n_chars} characters, the limit is {self.max_review_chars}.", "too_long"
+        limit = self.max_review_chars
+        # Do not split the last word in half
+        cut = review.rfind(' ', max(limit - 64, 0), limit)
+        return review[:cut if cut > 0 else limit], None, "truncated"
+
+    def preview(self, review, chars=100):
+        """Bounded echo of a rejected review for the response"""
+        if isinstance(review, str) and len(review) > chars:
+            return review[:chars] + "..."
+        return review
+
+
+class BodySizeLimitMiddleware:
+    """ASGI middleware answering 413 to request bodies over ``max_bytes``
+
+    A declared Content-Length is checked before the body is read; chunked
+    bodies are counted as they arrive. Paths in ``exempt`` (streaming
+    endpoints that bound their own lines) are passed through.
+    """
+
+    def __init__(self, app, max_bytes, exempt=()):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.exempt = frozenset(exempt)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exempt:
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope["headers"]:
+            if name == b"content-length" and value.isdigit() and int(value) > self.max_bytes:
+                await self._reject(send)
+                return
+
+        received = 0
+        started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise _BodyTooLarge(413, self._detail())
+            return message
+
+        async def send_wrapper(message):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, send_wrapper)
+        except _BodyTooLarge:
+            if started:
+                raise
+            await self._reject(send)
+
+    def _detail(self):
+        return f"Request body too large, the limit is {self.max_bytes} bytes"
+
+    async def _reject(self, send):
+        body = json.dumps({"detail": self._detail()}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+class _BodyTooLarge(HTTPException):
+    """Raised from ``receive``; FastAPI turns it into the 413 response itself"""
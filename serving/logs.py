@@ -0,0 +1,83 @@
+"""Non-blocking logging for the request path.
+
+``setup_logging`` routes every record through a ``QueueHandler`` into an
+in-process queue. A ``QueueListener`` thread formats the records and writes
+them to stderr, so a request thread only pays for building the record and a
+queue put, never for formatting or a blocking write. With ``json_format``
+each line is a JSON object that includes any ``extra={...}`` fields.
+
+``LogSampler`` decides whether a per-request line is logged at all, so busy
+servers can keep e.g. 1% of them (``LOG_SAMPLE_RATE=0.01``).
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+
+# Attributes every LogRecord has; anything else came from ``extra``
+_RECORD_FIELDS = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _InProcessQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # The stock handler formats the record in the calling thread so it
+        # can be pickled; the queue never leaves this process, so formatting
+        # is left to the listener thread
+        return record
+
+
+def setup_logging(level=logging.INFO, json_format=False, stream=None):
+    """Send all logging through a background writer thread; returns the started listener"""
+    writer = logging.StreamHandler(stream)
+    if json_format:
+        writer.setFormatter(JsonFormatter())
+    else:
+        writer.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+
+    # Neither format uses the caller's file/line, so skip the stack walk
+    # every record would otherwise pay for (see "Optimization" in the logging HOWTO)
+    logging._srcfile = None
+
+    records = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(_InProcessQueueHandler(records))
+    root.setLevel(level)
+
+    listener = logging.handlers.QueueListener(records, writer, respect_handler_level=True)
+    listener.start()
+    # Flush whatever is still queued when the interpreter exits
+    atexit.register(listener.stop)
+    return listener
+
+
+class LogSampler:
+    """Callable returning True for roughly ``rate`` of calls (0 never, 1 always)"""
+
+    def __init__(self, rate=1.0, rng=random.random):
+        self.rate = min(max(float(rate), 0.0), 1.0)
+        self._rng = rng
+
+    def __call__(self):
+        if self.rate >= 1.0:
+            return True
+        return self.rate > 0.0 and self._rng() < self.rate
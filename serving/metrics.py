@@ -0,0 +1,241 @@
+"""Prometheus text-format metrics for the predict pipeline.
+
+A small dependency-free registry of counters and histograms rendered in the
+Prometheus exposition format (version 0.0.4). ``PipelineMetrics`` holds the
+metrics recorded on the request path: per-stage latency (cleaning,
+tokenization, vectorization, scoring), input length, and prediction class
+and confidence. Inference worker processes record into their own
+``PipelineMetrics`` and ship ``snapshot()``s back to be ``merge()``d.
+"""
+import bisect
+import threading
+import time
+
+LATENCY_BUCKETS = (
+    1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3,
+    1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+LENGTH_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 65536)
+CONFIDENCE_BUCKETS = (0.55, 0.6, 0.65, 0.7, 0.75, 0.8, 0.85, 0.9, 0.95, 0.99, 1.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, labels=()):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels=()):
+        return self._values.get(labels, 0)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._values)
+
+    def merge(self, snapshot):
+        with self._lock:
+            for labels, amount in snapshot.items():
+                self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = []
+        for labels, value in sorted(self.snapshot().items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, documentation, buckets=LATENCY_BUCKETS, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self.labelnames = tuple(labelnames)
+        # labels -> [per-bucket counts (last one is +Inf), sum]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, labels=()):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][i] += 1
+            state[1] += value
+
+    def count(self, labels=()):
+        state = self._values.get(labels)
+        return sum(state[0]) if state else 0
+
+    def snapshot(self):
+        with self._lock:
+            return {labels: (list(counts), total) for labels, (counts, total) in self._values.items()}
+
+    def merge(self, snapshot):
+        with self._lock:
+            for labels, (counts, total) in snapshot.items():
+                state = self._values.get(labels)
+                if state is None:
+                    state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+                state[0] = [a + b for a, b in zip(state[0], counts)]
+                state[1] += total
+
+    def render(self):
+        lines = []
+        bounds = self.buckets + (float("inf"),)
+        for labels, (counts, total) in sorted(self.snapshot().items()):
+            cumulative = 0
+            for bound, n in zip(bounds, counts):
+                cumulative += n
+                le = _format_labels(self.labelnames, labels, [("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            suffix = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{suffix} {_format_value(total)}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, buckets=LATENCY_BUCKETS, labelnames=()):
+        return self._register(Histogram(name, documentation, buckets, labelnames))
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def add_collector(self, collect):
+        """Register ``collect() -> [(name, kind, documentation, value)]``, called on render"""
+        self._collectors.append(collect)
+
+    def snapshot(self):
+        """Picklable copy of every metric's values, for ``merge`` in another process"""
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    def merge(self, snapshot):
+        for name, values in snapshot.items():
+            self._metrics[name].merge(values)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        for collect in self._collectors:
+            for name, kind, documentation, value in collect():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class PipelineMetrics(MetricsRegistry):
+    """The metrics recorded while cleaning and scoring reviews"""
+
+    def __init__(self):
+        super().__init__()
+        self.stage_seconds = self.histogram(
+            "review_stage_duration_seconds", "Time spent per review in each pipeline stage",
+            labelnames=("stage",))
+        self.input_chars = self.histogram(
+            "review_input_chars", "Length of raw reviews in characters, before the input guard", LENGTH_BUCKETS)
+        self.input_ngrams = self.histogram(
+            "review_input_ngrams", "Word n-grams per scored review", LENGTH_BUCKETS)
+        self.predictions = self.counter(
+            "review_predictions_total", "Scored reviews by predicted class", ("prediction",))
+        self.invalid = self.counter(
+            "review_invalid_total", "Reviews rejected as too short or code")
+        self.confidence = self.histogram(
+            "review_prediction_confidence", "Confidence of the predicted class",
+            CONFIDENCE_BUCKETS, ("prediction",))
+
+    def observe_stage(self, stage, seconds):
+        self.stage_seconds.observe(seconds, (stage,))
+
+    def observe_prediction(self, prediction, confidence):
+        self.predictions.inc(labels=(prediction,))
+        self.confidence.observe(confidence, (prediction,))
+
+
+def stats_collector(prefix, stats_fn, counters=(), gauges=()):
+    """Expose numeric fields of a ``stats()`` dict, e.g. ``PredictionCache.stats``"""
+    def collect():
+        stats = stats_fn()
+        samples = [(f"{prefix}_{field}_total", "counter", f"{prefix} {field}", stats[field])
+                   for field in counters]
+        samples += [(f"{prefix}_{field}", "gauge", f"{prefix} {field}", stats[field])
+                    for field in gauges]
+        return samples
+    return collect
+
+
+class MetricsMiddleware:
+    """ASGI middleware counting requests and timing them per route"""
+
+    def __init__(self, app, registry):
+        self.app = app
+        self.requests = registry.counter(
+            "http_requests_total", "HTTP requests by route and status code", ("path", "status"))
+        self.latency = registry.histogram(
+            "http_request_duration_seconds", "HTTP request latency by route", labelnames=("path",))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Label with the route template, not the raw path, to bound cardinality
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            self.requests.inc(labels=(path, str(status)))
+            self.latency.observe(time.perf_counter() - start, (path,))
@@ -0,0 +1,231 @@
+"""MinHash LSH index of recently scored reviews.
+
+Fake reviews are often posted as templated near-copies. ``NearDuplicateIndex``
+keeps a MinHash signature of every scored review's word shingles and buckets
+it by LSH band, so a new review finds its near-duplicates by looking up
+``bands`` dictionary keys instead of comparing against every stored review.
+With the defaults (64 hashes in 16 bands of 4) reviews whose shingle sets have
+a Jaccard similarity around 0.5 or more become candidates, and candidates are
+then checked against ``threshold`` using the estimated similarity.
+
+Each match joins the cluster of its closest earlier review, so templated
+reviews share a ``cluster_id``, and a review is flagged as a near-duplicate
+of a known fake when one of its matches was predicted fake. Memory is bounded
+by ``max_entries``: the least recently matched review is evicted first. The
+index can be written to and reloaded from a ``.npz`` snapshot.
+
+Signatures only depend on ``MinHasher``'s settings, so the scoring pipeline
+(including inference worker processes) computes them from the review it has
+just cleaned and ``observe_signature`` indexes them without cleaning again.
+"""
+import json
+import os
+import threading
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+SNAPSHOT_VERSION = 1
+
+
+def shingles(cleaned, k=3):
+    """Word ``k``-grams of a cleaned review; shorter reviews are one shingle"""
+    words = cleaned.split()
+    if len(words) <= k:
+        return [' '.join(words)]
+    return [' '.join(words[i:i + k]) for i in range(len(words) - k + 1)]
+
+
+class MinHasher:
+    """MinHash signatures of cleaned reviews; small and picklable, for worker processes"""
+
+    def __init__(self, num_perm=64, shingle_size=3, seed=1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        # Multiply-shift hashes: the top 32 bits of (a * x + b) mod 2**64, a odd
+        rng = np.random.default_rng(seed)
+        self._a = (rng.integers(0, 1 << 63, num_perm, dtype=np.uint64) << np.uint64(1) | np.uint64(1))[:, None]
+        self._b = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64)[:, None]
+
+    def signature(self, cleaned):
+        """MinHash signature (uint32 array of ``num_perm``) of a cleaned review"""
+        hashes = np.array([zlib.crc32(s.encode('utf-8')) for s in shingles(cleaned, self.shingle_size)],
+                          dtype=np.uint64)
+        values = self._a * hashes
+        values += self._b
+        values >>= np.uint64(32)
+        return values.min(axis=1).astype(np.uint32)
+
+
+class NearDuplicateIndex:
+    def __init__(self, max_entries=20000, num_perm=64, bands=16, threshold=0.6,
+                 shingle_size=3, max_bucket_size=32, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.max_entries = max_entries
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        # A template seen thousands of times needs only a few representatives
+        # per bucket, and this keeps lookups bounded
+        self.max_bucket_size = max_bucket_size
+        self.seed = seed
+        self.hasher = MinHasher(num_perm, shingle_size, seed)
+
+        self._lock = threading.Lock()
+        # entry id -> [signature, cluster id, predicted fake], least recently matched first
+        self._entries = OrderedDict()
+        self._buckets = [{} for _ in range(bands)]
+        self._cluster_sizes = {}
+        self._next_id = 0
+        self._next_cluster = 0
+        self.lookups = 0
+        self.matches = 0
+        self.fake_matches = 0
+        self.evictions = 0
+
+    # ---- SIGNATURES ----
+    def signature(self, cleaned):
+        """MinHash signature (uint32 array of ``num_perm``) of a cleaned review"""
+        return self.hasher.signature(cleaned)
+
+    def _band_keys(self, signature):
+        rows = self.rows
+        return [signature[i * rows:(i + 1) * rows].tobytes() for i in range(self.bands)]
+
+    # ---- LOOKUP AND INSERT ----
+    def observe(self, cleaned, fake):
+        """Look up a scored review, then add it; returns (cluster_id, similarity, near_fake)
+
+        ``similarity`` is the estimated Jaccard similarity to the closest
+        earlier review (0.0 if there was none above ``threshold``) and
+        ``near_fake`` says whether any match was predicted fake.
+        """
+        return self.observe_signature(self.signature(cleaned), fake)
+
+    def observe_signature(self, signature, fake):
+        """``observe`` for a review whose signature (from ``hasher``) is already known"""
+        keys = self._band_keys(signature)
+        with self._lock:
+            self.lookups += 1
+            best, similarity, near_fake = self._query(signature, keys)
+            if best is None:
+                cluster = self._next_cluster
+                self._next_cluster += 1
+            else:
+                self.matches += 1
+                self.fake_matches += near_fake
+                self._entries.move_to_end(best)
+                cluster = self._entries[best][1]
+            if similarity == 1.0:
+                # Same shingles as a stored review: remember the label, keep one copy
+                self._entries[best][2] |= fake
+            else:
+                self._insert(signature, keys, cluster, fake)
+            return cluster, similarity, bool(near_fake)
+
+    def query(self, cleaned):
+        """Like ``observe`` but without adding the review; returns (cluster_id or None, similarity, near_fake)"""
+        signature = self.signature(cleaned)
+        with self._lock:
+            best, similarity, near_fake = self._query(signature, self._band_keys(signature))
+            cluster = None if best is None else self._entries[best][1]
+            return cluster, similarity, near_fake
+
+    def _query(self, signature, keys):
+        # Caller holds the lock
+        candidates = set()
+        for bucket, key in zip(self._buckets, keys):
+            ids = bucket.get(key)
+            if ids:
+                candidates.update(ids)
+        if not candidates:
+            return None, 0.0, False
+        candidates = list(candidates)
+        entries = [self._entries[entry_id] for entry_id in candidates]
+        similarities = (np.stack([e[0] for e in entries]) == signature).mean(axis=1)
+        matched = np.flatnonzero(similarities >= self.threshold)
+        if not len(matched):
+            return None, 0.0, False
+        top = matched[similarities[matched].argmax()]
+        near_fake = any(entries[i][2] for i in matched)
+        return candidates[top], float(similarities[top]), near_fake
+
+    def _insert(self, signature, keys, cluster, fake):
+        # Caller holds the lock
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = [signature, cluster, fake]
+        self._cluster_sizes[cluster] = self._cluster_sizes.get(cluster, 0) + 1
+        for bucket, key in zip(self._buckets, keys):
+            ids = bucket.setdefault(key, [])
+            if len(ids) < self.max_bucket_size:
+                ids.append(entry_id)
+        while len(self._entries) > self.max_entries:
+            self._evict()
+
+    def _evict(self):
+        entry_id, (signature, cluster, _) = self._entries.popitem(last=False)
+        for bucket, key in zip(self._buckets, self._band_keys(signature)):
+            ids = bucket.get(key)
+            if ids and entry_id in ids:
+                ids.remove(entry_id)
+                if not ids:
+                    del bucket[key]
+        self._cluster_sizes[cluster] -= 1
+        if not self._cluster_sizes[cluster]:
+            del self._cluster_sizes[cluster]
+        self.evictions += 1
+
+    # ---- SNAPSHOTS ----
+    def settings(self):
+        return {"num_perm": self.num_perm, "bands": self.bands, "threshold": self.threshold,
+                "shingle_size": self.shingle_size, "max_bucket_size": self.max_bucket_size,
+                "seed": self.seed}
+
+    def save(self, path):
+        """Write the index to ``path`` (.npz); the file is replaced atomically"""
+        with self._lock:
+            entries = list(self._entries.values())
+            meta = {"version": SNAPSHOT_VERSION, "next_cluster": self._next_cluster, **self.settings()}
+        signatures = (np.stack([e[0] for e in entries]) if entries
+                      else np.empty((0, self.num_perm), dtype=np.uint32))
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, signatures=signatures,
+                     clusters=np.array([e[1] for e in entries], dtype=np.int64),
+                     fakes=np.array([e[2] for e in entries], dtype=bool),
+                     meta=np.array(json.dumps(meta)))
+        os.replace(tmp_path, path)
+        return len(entries)
+
+    @classmethod
+    def load(cls, path, max_entries=20000, threshold=None):
+        """Rebuild an index from a snapshot written by ``save``"""
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta.pop("version") != SNAPSHOT_VERSION:
+                raise ValueError(f"Unsupported near-duplicate snapshot: {path}")
+            next_cluster = meta.pop("next_cluster")
+            if threshold is not None:
+                meta["threshold"] = threshold
+            index = cls(max_entries=max_entries, **meta)
+            # Oldest first, so eviction order survives the round trip
+            for signature, cluster, fake in zip(data["signatures"], data["clusters"], data["fakes"]):
+                index._insert(signature, index._band_keys(signature), int(cluster), bool(fake))
+        index._next_cluster = next_cluster
+        return index
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "clusters": len(self._cluster_sizes),
+                "lookups": self.lookups,
+                "matches": self.matches,
+                "fake_matches": self.fake_matches,
+                "evictions": self.evictions,
+            }
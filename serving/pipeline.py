@@ -0,0 +1,127 @@
+"""Request-path scoring shared by the API endpoints and the benchmarks."""
+import time
+
+from preprocessing import clean_text
+
+INVALID_REVIEW = "Invalid review. Too short or contains code patterns."
+# Internal result field: the near-duplicate signature, removed before responding
+SIGNATURE_FIELD = "_signature"
+
+
+def label_name(pred):
+    return "Fake Review" if pred == 1 else "Real Review"
+
+
+def score_cleaned(cleaned, scorer, cache=None, metrics=None):
+    """Return (label, confidence) for a cleaned review, using ``cache`` if given"""
+    if cache is not None:
+        cached = cache.get(cleaned, scorer.fingerprint)
+        if cached is not None:
+            return cached
+
+    if metrics is None:
+        result = scorer.predict(cleaned)
+    else:
+        result = _score_timed(cleaned, scorer, metrics)
+
+    if cache is not None:
+        cache.put(cleaned, scorer.fingerprint, result)
+    return result
+
+
+def _score_timed(cleaned, scorer, metrics):
+    """``scorer.predict`` split into stages, each recorded in ``metrics``"""
+    start = time.perf_counter()
+    grams = list(scorer.ngrams(cleaned))
+    tokenized = time.perf_counter()
+    counts = scorer.count_terms(grams)
+    vectorized = time.perf_counter()
+    result = scorer.predict_counts(counts)
+    scored = time.perf_counter()
+
+    metrics.observe_stage("tokenization", tokenized - start)
+    metrics.observe_stage("vectorization", vectorized - tokenized)
+    metrics.observe_stage("scoring", scored - vectorized)
+    metrics.input_ngrams.observe(len(grams))
+    return result
+
+
+def predict_reviews(reviews, scorer, cache=None, metrics=None, hasher=None):
+    """Clean and score raw reviews; invalid ones get an inline error
+
+    With ``hasher`` (a ``MinHasher``) every scored result also carries the
+    signature of its cleaned text under ``SIGNATURE_FIELD``.
+    """
+    results = []
+    for review in reviews:
+        if metrics is None:
+            cleaned = clean_text(review)
+        else:
+            start = time.perf_counter()
+            cleaned = clean_text(review)
+            metrics.observe_stage("cleaning", time.perf_counter() - start)
+
+        if not cleaned:
+            if metrics is not None:
+                metrics.invalid.inc()
+            results.append({"input": review, "error": INVALID_REVIEW})
+            continue
+
+        pred, confidence = score_cleaned(cleaned, scorer, cache, metrics)
+        prediction = label_name(pred)
+        if metrics is not None:
+            metrics.observe_prediction(prediction, confidence)
+        results.append({
+            "input": review,
+            "prediction": prediction,
+            "confidence": float(confidence),
+        })
+        if hasher is not None:
+            results[-1][SIGNATURE_FIELD] = hasher.signature(cleaned)
+    return results
+
+
+def explain_reviews(reviews, scorer, top_k=10):
+    """Like ``predict_reviews``, plus the ``top_k`` n-grams that drove each prediction"""
+    positive = label_name(scorer.classes[1])
+    negative = label_name(scorer.classes[0])
+    results = []
+    for review in reviews:
+        cleaned = clean_text(review)
+        if not cleaned:
+            results.append({"input": review, "error": INVALID_REVIEW})
+            continue
+
+        pred, confidence, contributions = scorer.explain(cleaned, top_k)
+        results.append({
+            "input": review,
+            "prediction": label_name(pred),
+            "confidence": float(confidence),
+            "intercept": scorer.intercept,
+            "contributions": [
+                {"ngram": gram, "weight": weight, "towards": positive if weight > 0 else negative}
+                for gram, weight in contributions
+            ],
+        })
+    return results
+
+
+def category_reviews(reviews, scorer, categories=None):
+    """Score each review with the per-category models (default: all of them)
+
+    Categories without a model of their own are marked ``"fallback": True``.
+    """
+    results = []
+    for review in reviews:
+        cleaned = clean_text(review)
+        if not cleaned:
+            results.append({"input": review, "error": INVALID_REVIEW})
+            continue
+
+        scores = {}
+        for category, pred, confidence in scorer.predict_categories(cleaned, categories):
+            scores[category] = {"prediction": label_name(pred), "confidence": float(confidence)}
+            if category in scorer.fallback_categories:
+                scores[category]["fallback"] = True
+        results.append({"input": review, "categories": scores})
+    return results
@@ -0,0 +1,170 @@
+"""Process-pool inference: clean and score reviews on all cores.
+
+Cleaning and scoring are pure Python and hold the GIL, so one server process
+scores on one core however many requests are in flight. ``InferencePool``
+starts ``size`` worker processes that each load the model once (the compiled
+artifact is memory-mapped, so its pages are shared) and then score whole
+batches of raw reviews sent to them by the API process. With ``metrics``,
+each batch also records a fresh ``PipelineMetrics`` in the worker and sends
+its snapshot back to be merged into ``metrics`` in the API process.
+Every batch also returns the worker's prediction cache counters, which
+``cache_stats`` adds up across workers.
+
+Batches may name the model version they expect as ``(model_dir,
+fingerprint)``; a worker holding a different version reloads ``model_dir``
+before scoring, so workers follow hot reloads in the API process.
+
+With a ``hasher`` (``serving.near_duplicates.MinHasher``) workers also return
+each scored review's near-duplicate signature, so the API process never
+cleans a review itself.
+
+``score_shadow`` scores with a second (shadow) version that each worker keeps
+next to its active one, without the prediction cache, so comparing a shadow
+model does not compete with the API process for its GIL either.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from serving.cache import PredictionCache
+from serving.compiled import load_model
+from serving.metrics import PipelineMetrics
+from serving.pipeline import predict_reviews
+
+# Per-process state, set by _init_worker
+_scorer = None
+_cache = None
+_hasher = None
+_startup_barrier = None
+_shadow = None
+
+# Prediction cache counters added up across workers
+CACHE_COUNTERS = ("size", "hits", "misses", "evictions", "expirations", "invalidations")
+
+
+def _init_worker(model_dir, cache_size, cache_ttl, startup_barrier, hasher=None):
+    global _scorer, _cache, _hasher, _startup_barrier
+    _scorer = load_model(model_dir)
+    _cache = PredictionCache(max_entries=cache_size, ttl_seconds=cache_ttl)
+    _hasher = hasher
+    _startup_barrier = startup_barrier
+
+
+def _warm_up(timeout):
+    # Holding every warm-up task until all workers have one guarantees that
+    # each worker process has started and loaded the model
+    _startup_barrier.wait(timeout)
+    return os.getpid(), _scorer.fingerprint
+
+
+def _use_version(version):
+    global _scorer
+    if version is None:
+        return
+    model_dir, fingerprint = version
+    if fingerprint != _scorer.fingerprint:
+        _scorer = load_model(model_dir)
+
+
+def _score_batch(reviews, version=None, with_metrics=False):
+    """(results, metrics snapshot or None, (pid, cache stats)) for one batch"""
+    _use_version(version)
+    metrics = PipelineMetrics() if with_metrics else None
+    results = predict_reviews(reviews, _scorer, _cache, metrics, _hasher)
+    return results, metrics.snapshot() if with_metrics else None, (os.getpid(), _cache.stats())
+
+
+def _score_shadow(reviews, version):
+    global _shadow
+    model_dir, fingerprint = version
+    if _shadow is None or _shadow.fingerprint != fingerprint:
+        _shadow = _scorer if _scorer.fingerprint == fingerprint else load_model(model_dir)
+    return predict_reviews(reviews, _shadow)
+
+
+class InferencePool:
+    def __init__(self, model_dir, size=None, cache_size=10000, cache_ttl=3600.0,
+                 start_method="spawn", metrics=None, hasher=None):
+        self.model_dir = model_dir
+        self.size = size or os.cpu_count() or 1
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.metrics = metrics
+        context = multiprocessing.get_context(start_method)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.size,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(model_dir, cache_size, cache_ttl, context.Barrier(self.size), hasher),
+        )
+        self.worker_pids = []
+        self.fingerprint = None
+        self._cache_stats = {}
+
+    def start(self, timeout=120.0):
+        """Start every worker and wait until each one has loaded the model"""
+        results = list(self._executor.map(_warm_up, [timeout] * self.size))
+        self.worker_pids = sorted(pid for pid, _ in results)
+        self.fingerprint = results[0][1]
+        return self
+
+    def _submit(self, reviews, version):
+        return self._executor.submit(_score_batch, reviews, version, self.metrics is not None)
+
+    def _result(self, future):
+        results, snapshot, (pid, cache_stats) = future.result()
+        if snapshot is not None:
+            self.metrics.merge(snapshot)
+        self._cache_stats[pid] = cache_stats
+        return results
+
+    def cache_stats(self):
+        """The workers' prediction caches added up, each as of its last batch"""
+        workers = sorted(self._cache_stats.items())
+        totals = {field: sum(stats[field] for _, stats in workers) for field in CACHE_COUNTERS}
+        lookups = totals["hits"] + totals["misses"]
+        versions = {stats["model_version"] for _, stats in workers}
+        return {
+            "enabled": self.cache_size > 0,
+            **totals,
+            "max_entries": self.cache_size * self.size,
+            "ttl_seconds": self.cache_ttl,
+            "hit_rate": totals["hits"] / lookups if lookups else 0.0,
+            "model_version": versions.pop() if len(versions) == 1 else None,
+            "workers": [{"pid": pid, **stats} for pid, stats in workers],
+        }
+
+    def score_batch(self, reviews, version=None):
+        """Score one batch on a single worker (blocks the calling thread)"""
+        return self._result(self._submit(list(reviews), version))
+
+    def score_many(self, reviews, chunk_size=256, version=None):
+        """Split a large list of reviews across the workers, keeping input order"""
+        reviews = list(reviews)
+        futures = [
+            self._submit(reviews[i:i + chunk_size], version)
+            for i in range(0, len(reviews), chunk_size)
+        ]
+        results = []
+        for future in futures:
+            results.extend(self._result(future))
+        return results
+
+    def score_shadow(self, reviews, version, chunk_size=256):
+        """Score with the shadow ``version`` (model_dir, fingerprint) on the workers, keeping input order"""
+        reviews = list(reviews)
+        futures = [
+            self._executor.submit(_score_shadow, reviews[i:i + chunk_size], version)
+            for i in range(0, len(reviews), chunk_size)
+        ]
+        return [result for future in futures for result in future.result()]
+
+    def close(self, wait=True):
+        """Stop accepting work; with ``wait`` let in-flight batches finish first"""
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
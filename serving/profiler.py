@@ -0,0 +1,42 @@
+"""On-demand sampling profiler for the API process.
+
+``sample_stacks`` wakes up every ``interval`` seconds and records the Python
+stack of every other thread, so it costs nothing until it is asked for a
+profile. ``render_collapsed`` prints the result as collapsed stacks, one
+``outer;inner;leaf count`` line per distinct stack, which flamegraph.pl and
+speedscope read directly.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def sample_stacks(seconds=5.0, interval=0.005):
+    """Return (Counter of collapsed stack -> samples, number of sampling rounds)"""
+    own_thread = threading.get_ident()
+    stacks = Counter()
+    rounds = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_thread:
+                continue
+            names = []
+            while frame is not None:
+                names.append(_frame_name(frame))
+                frame = frame.f_back
+            stacks[";".join(reversed(names))] += 1
+        rounds += 1
+        time.sleep(interval)
+    return stacks, rounds
+
+
+def render_collapsed(stacks):
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
@@ -0,0 +1,216 @@
+"""Hot-swappable model versions for the API.
+
+``ModelRegistry.active`` is an immutable ``LoadedModel``. ``reload`` loads a
+new artifact off the request path and publishes it with a single attribute
+assignment, so requests never wait on a load: each batch reads ``active``
+once and scores with whatever version it got. ``watch`` polls the
+artifact's ``CURRENT`` pointer (swapped with ``os.replace`` by
+``CompiledModel.save`` once a version is fully written) and reloads when it
+changes.
+
+An optional ``shadow`` version scores a copy of live traffic through
+``ShadowScorer``, which records its latency and how often it agrees with the
+active version without slowing down responses. A background thread hands
+each batch to its ``score`` function: in-process by default, or on the
+inference workers (``InferencePool.score_shadow``) when there are any.
+"""
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from serving.compiled import CURRENT_FILE, MANIFEST_FILE, load_model
+from serving.pipeline import predict_reviews
+
+logger = logging.getLogger(__name__)
+
+LoadedModel = namedtuple("LoadedModel", "model source loaded_at load_ms")
+
+
+def load_version(model_dir, loader=load_model):
+    start = time.perf_counter()
+    model = loader(model_dir)
+    return LoadedModel(model, os.path.abspath(model_dir), time.time(), (time.perf_counter() - start) * 1e3)
+
+
+def describe(version):
+    if version is None:
+        return None
+    return {
+        "version": version.model.fingerprint,
+        "source": version.source,
+        "n_features": version.model.n_features,
+        "loaded_at": version.loaded_at,
+        "load_ms": round(version.load_ms, 2),
+    }
+
+
+def artifact_signature(model_dir):
+    """Identity of the artifact files in ``model_dir``; changes whenever they are replaced"""
+    candidates = [os.path.join(model_dir, "compiled", CURRENT_FILE),
+                  os.path.join(model_dir, "compiled", MANIFEST_FILE),
+                  os.path.join(model_dir, "fake_review_model.pkl")]
+    for path in candidates:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        return path, stat.st_ino, stat.st_mtime_ns, stat.st_size
+    return None
+
+
+class ModelRegistry:
+    def __init__(self, model_dir, loader=load_model):
+        self.model_dir = model_dir
+        self.loader = loader
+        self.active = None
+        self.shadow = None
+        self.reloads = 0
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._stop_watching = threading.Event()
+
+    def reload(self, model_dir=None):
+        """Load ``model_dir`` (default: the current one) and make it active; returns (old, new)"""
+        with self._lock:
+            model_dir = model_dir or self.model_dir
+            new = load_version(model_dir, self.loader)
+            old = self.active
+            self.model_dir = model_dir
+            if old is not None and old.model.fingerprint == new.model.fingerprint:
+                return old, old
+            # The swap: requests already holding ``old`` finish with it
+            self.active = new
+            self.reloads += 1
+            return old, new
+
+    def publish(self, version, expected_fingerprint):
+        """Make an already loaded ``version`` active if the active one is still ``expected_fingerprint``
+
+        Unlike ``reload`` this keeps ``model_dir``, so readiness, a plain
+        reload and the file watch still follow the base artifact. Returns
+        (old, new), or (old, None) if another reload got in first.
+        """
+        with self._lock:
+            old = self.active
+            if (old.model.fingerprint if old is not None else None) != expected_fingerprint:
+                return old, None
+            self.active = version
+            self.reloads += 1
+            return old, version
+
+    def set_shadow(self, model_dir):
+        """Load ``model_dir`` as the shadow version"""
+        with self._lock:
+            self.shadow = load_version(model_dir, self.loader)
+            return self.shadow
+
+    def clear_shadow(self):
+        self.shadow = None
+
+    def promote_shadow(self):
+        """Make the shadow version active and drop the shadow"""
+        with self._lock:
+            if self.shadow is None:
+                raise ValueError("No shadow model loaded")
+            old, self.active, self.shadow = self.active, self.shadow, None
+            self.model_dir = self.active.source
+            self.reloads += 1
+            return old, self.active
+
+    # ---- FILE WATCH ----
+    def watch(self, interval=2.0):
+        """Reload in a background thread whenever the artifact in ``model_dir`` is replaced"""
+        if self._watcher is not None:
+            return
+        self._stop_watching.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(interval,),
+                                         name="model-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        if self._watcher is not None:
+            self._stop_watching.set()
+            self._watcher.join()
+            self._watcher = None
+
+    def _watch(self, interval):
+        last = artifact_signature(self.model_dir)
+        while not self._stop_watching.wait(interval):
+            signature = artifact_signature(self.model_dir)
+            if signature is None or signature == last:
+                continue
+            try:
+                old, new = self.reload()
+            except Exception as e:
+                # A half-copied artifact; try again on the next change
+                logger.error(f"❌ Model reload from {self.model_dir} failed: {e}")
+            else:
+                if new is not old:
+                    logger.info(f"🔄 Model reloaded: {old.model.fingerprint if old else None} "
+                                f"-> {new.model.fingerprint} ({new.load_ms:.1f} ms)")
+            last = signature
+
+    def describe(self):
+        return {
+            "active": describe(self.active),
+            "shadow": describe(self.shadow),
+            "model_dir": self.model_dir,
+            "reloads": self.reloads,
+            "watching": self._watcher is not None,
+        }
+
+
+class ShadowScorer:
+    """Scores copies of live batches with the shadow model on one background thread.
+
+    At most ``max_pending`` batches wait at a time; beyond that batches are
+    dropped (and counted) rather than queued, so a slow shadow model can
+    never build up memory or delay the active one.
+    """
+
+    def __init__(self, version_latency, agreement, max_pending=8, score=None):
+        self.version_latency = version_latency
+        self.agreement = agreement
+        self.max_pending = max_pending
+        # score(reviews, shadow) -> results like predict_reviews
+        self.score = score or (lambda reviews, shadow: predict_reviews(reviews, shadow.model))
+        self.pending = 0
+        self.scored = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+
+    def submit(self, reviews, active_results, shadow):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.dropped += 1
+                return
+            self.pending += 1
+        self._executor.submit(self._compare, list(reviews), active_results, shadow)
+
+    def _compare(self, reviews, active_results, shadow):
+        try:
+            start = time.perf_counter()
+            results = self.score(reviews, shadow)
+            elapsed = time.perf_counter() - start
+            self.version_latency.observe(elapsed / len(reviews), (shadow.model.fingerprint, "shadow"))
+            for active, result in zip(active_results, results):
+                if "error" in active or "error" in result:
+                    continue
+                same = active["prediction"] == result["prediction"]
+                self.agreement.inc(labels=("agree" if same else "disagree",))
+            self.scored += len(reviews)
+        except Exception as e:
+            logger.error(f"❌ Shadow scoring failed: {e}")
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    def stats(self):
+        return {"pending": self.pending, "scored": self.scored, "dropped": self.dropped}
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
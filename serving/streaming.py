@@ -0,0 +1,87 @@
+"""NDJSON helpers for streaming review scoring.
+
+Each input line is either a JSON string (the review) or an object with a
+``review`` string and an optional ``id`` that is echoed back. Every non-blank
+input line produces exactly one output object carrying its 1-based ``line``
+number, so results can be joined back to the input even when some lines are
+malformed. Lines longer than the reader's ``max_line_bytes`` are skipped
+without being buffered and come back as a "line too long" error.
+"""
+import json
+
+LINE_TOO_LONG = "Line too long"
+
+
+def parse_line(line):
+    """Return (review, extra fields) for one NDJSON line; raises ValueError otherwise"""
+    record = json.loads(line)
+    if isinstance(record, str):
+        return record, {}
+    if isinstance(record, dict) and isinstance(record.get("review"), str):
+        return record["review"], ({"id": record["id"]} if "id" in record else {})
+    raise ValueError('expected a JSON string or an object with a "review" string')
+
+
+def score_lines(lines, predict_many, first_line=1):
+    """Score a chunk of NDJSON lines with ``predict_many``; one result per non-blank line"""
+    results = []
+    pending = []
+    for offset, line in enumerate(lines):
+        if line is None:
+            results.append({"line": first_line + offset, "error": LINE_TOO_LONG})
+            continue
+        if not line.strip():
+            continue
+        meta = {"line": first_line + offset}
+        try:
+            review, extra = parse_line(line)
+        except ValueError as e:
+            results.append({**meta, "error": f"Malformed line: {e}"})
+            continue
+        meta.update(extra)
+        results.append(meta)
+        pending.append((meta, review))
+
+    if pending:
+        scored = predict_many([review for _, review in pending])
+        for (meta, _), result in zip(pending, scored):
+            meta.update(result)
+    return results
+
+
+def dumps(result):
+    return json.dumps(result, ensure_ascii=False) + "\n"
+
+
+async def aiter_lines(chunks, max_line_bytes=None):
+    """Split an async iterator of byte chunks into decoded text lines
+
+    A line over ``max_line_bytes`` is dropped as it arrives and yielded as
+    None, so one huge line never sits in memory.
+    """
+    buffer = b""
+    oversized = False
+    async for chunk in chunks:
+        *lines, rest = chunk.split(b"\n")
+        for piece in lines:
+            if oversized:
+                # End of the line being skipped
+                oversized = False
+                yield None
+                continue
+            line = buffer + piece
+            buffer = b""
+            if max_line_bytes is not None and len(line) > max_line_bytes:
+                yield None
+            else:
+                yield line.decode("utf-8", errors="replace")
+        if oversized:
+            continue
+        buffer += rest
+        if max_line_bytes is not None and len(buffer) > max_line_bytes:
+            buffer = b""
+            oversized = True
+    if oversized:
+        yield None
+    elif buffer:
+        yield buffer.decode("utf-8", errors="replace")
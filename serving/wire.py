@@ -0,0 +1,112 @@
+"""Response encodings for the prediction endpoints.
+
+Batch and stream responses are encoded here rather than through FastAPI's
+``jsonable_encoder``, which walks every result dict before ``json.dumps``:
+
+  application/json       orjson when it is installed, compact json.dumps otherwise
+  application/msgpack    MessagePack (``Accept: application/msgpack``); a stream is a
+                         sequence of concatenated MessagePack maps, one per result
+                         (read it with ``msgpack.Unpacker``)
+
+``lean_result`` drops everything but the label, confidence and the fields needed to
+join results back to their input, so the review text is not echoed back.
+Large bodies are gzipped when the client accepts it (``maybe_gzip``).
+
+Accept and Accept-Encoding are parsed with their q-values: ``q=0`` refuses an
+encoding, and MessagePack is only chosen when it is named with at least the
+q-value of JSON.
+"""
+import gzip
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON = "application/json"
+NDJSON = "application/x-ndjson"
+MSGPACK = "application/msgpack"
+MSGPACK_TYPES = (MSGPACK, "application/x-msgpack")
+LEAN_FIELDS = ("line", "id", "prediction", "confidence", "categories", "error")
+
+
+def lean_result(result):
+    """Only the label and confidence (or per-category scores) or error, and the line/id of a stream result"""
+    return {field: result[field] for field in LEAN_FIELDS if field in result}
+
+
+def parse_qvalues(header):
+    """Map each lowercased token of an Accept or Accept-Encoding header to its q-value"""
+    values = {}
+    for part in (header or "").split(","):
+        token, *params = part.split(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = min(max(float(value), 0.0), 1.0)
+                except ValueError:
+                    q = 0.0
+        values[token] = max(q, values.get(token, 0.0))
+    return values
+
+
+def wants_msgpack(accept):
+    """Whether an Accept header prefers MessagePack to JSON (and it is installed)"""
+    if msgpack is None or not accept:
+        return False
+    types = parse_qvalues(accept)
+    msgpack_q = max(types.get(t, 0.0) for t in MSGPACK_TYPES)
+    # Wildcards only ever stand for JSON, the default
+    json_q = max(types.get(t, 0.0) for t in (JSON, NDJSON, "application/*", "*/*"))
+    return msgpack_q > 0 and msgpack_q >= json_q
+
+
+def accepts_gzip(accept_encoding):
+    """Whether an Accept-Encoding header allows gzip (explicitly, or through ``*``)"""
+    codings = parse_qvalues(accept_encoding)
+    q = codings.get("gzip", codings.get("x-gzip", codings.get("*", 0.0)))
+    return q > 0
+
+
+def dumps_json(obj):
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps_msgpack(obj):
+    return msgpack.packb(obj, use_bin_type=True)
+
+
+def encode(obj, accept=None):
+    """Return (body, media type) for ``obj`` in the format ``accept`` asks for"""
+    if wants_msgpack(accept):
+        return dumps_msgpack(obj), MSGPACK
+    return dumps_json(obj), JSON
+
+
+def encode_stream_chunk(results, msgpack_format=False):
+    """One stream chunk: NDJSON lines, or concatenated MessagePack maps"""
+    if msgpack_format:
+        return b"".join(map(dumps_msgpack, results))
+    return b"".join(dumps_json(result) + b"\n" for result in results)
+
+
+def maybe_gzip(body, accept_encoding, min_bytes, level=1):
+    """Return (body, headers), gzipped if the client accepts it and ``body`` is at least ``min_bytes``"""
+    if min_bytes <= 0:
+        return body, {}
+    if len(body) < min_bytes or not accepts_gzip(accept_encoding):
+        return body, {"Vary": "Accept-Encoding"}
+    return gzip.compress(body, compresslevel=level), {"Content-Encoding": "gzip", "Vary": "Accept-Encoding"}
@@ -0,0 +1,48 @@
+"""Shared fixtures: a small labelled review corpus written as the training CSV."""
+import os
+import random
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FAKE_PHRASES = [
+    "Best product ever!!! Amazing, perfect, love it",
+    "Absolutely wonderful... five stars, highly recommend to everyone",
+    "Great great great, exactly as described & works perfectly :)",
+    "Gonna buy another one, wanna get the blue too!",
+]
+REAL_PHRASES = [
+    "The zipper broke after two weeks; the seller wouldn't refund it.",
+    "Fits a bit small, ordered a size up. Fabric feels thin but okay for $15.",
+    "Battery lasts about a day.\tCharging takes 3 hours, which is slow.",
+    "The café's crème brûlée torch works, though the naïve manual is useless.",
+]
+CATEGORIES = ["Books", "Home", "Toys"]
+
+
+def make_reviews(n, seed=0):
+    """``n`` (review, "CG"/"OR" label, category) rows mixing fake and real sounding phrases"""
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        fake = rng.random() < 0.5
+        phrases = FAKE_PHRASES if fake else REAL_PHRASES
+        # Some overlap so neither class is perfectly separable
+        words = [rng.choice(phrases) for _ in range(rng.choice([1, 2, 3]))]
+        if rng.random() < 0.3:
+            words.append(rng.choice(REAL_PHRASES if fake else FAKE_PHRASES))
+        rows.append((" ".join(words), "CG" if fake else "OR", rng.choice(CATEGORIES)))
+    return rows
+
+
+@pytest.fixture(scope="session")
+def training_csv(tmp_path_factory):
+    path = tmp_path_factory.mktemp("data") / "reviews.csv"
+    rows = make_reviews(600)
+    # Reviews the training path drops, or that the cleaner empties
+    rows += [("Short one", "CG", "Books"), ("def main(): print('code')", "OR", "Home"), ("", "CG", "Toys")]
+    pd.DataFrame(rows, columns=["text_", "label", "category"]).to_csv(path, index=False)
+    return str(path)
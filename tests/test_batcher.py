@@ -0,0 +1,81 @@
+"""MicroBatcher flush triggers, error propagation and shutdown."""
+import asyncio
+import time
+
+import pytest
+
+from serving import MicroBatcher
+
+
+class Recorder:
+    """process_batch that doubles each item and remembers the batches it saw"""
+
+    def __init__(self, error=None):
+        self.batches = []
+        self.error = error
+
+    def __call__(self, items):
+        self.batches.append(list(items))
+        if self.error is not None:
+            raise self.error
+        return [item * 2 for item in items]
+
+
+async def submit_all(batcher, items, timeout=5.0):
+    submissions = asyncio.gather(*(batcher.submit(item) for item in items), return_exceptions=True)
+    try:
+        return await asyncio.wait_for(submissions, timeout)
+    finally:
+        await batcher.close()
+
+
+def test_flushes_when_batch_is_full():
+    process = Recorder()
+    # A wait far longer than the test timeout: only a full batch can flush
+    batcher = MicroBatcher(process, max_batch_size=4, max_wait_ms=60_000)
+    results = asyncio.run(submit_all(batcher, range(8)))
+    assert results == [item * 2 for item in range(8)]
+    assert process.batches == [[0, 1, 2, 3], [4, 5, 6, 7]]
+    assert batcher.stats()["mean_batch_size"] == 4.0
+
+
+def test_flushes_after_max_wait():
+    process = Recorder()
+    batcher = MicroBatcher(process, max_batch_size=100, max_wait_ms=50)
+    started = time.perf_counter()
+    results = asyncio.run(submit_all(batcher, range(3)))
+    assert results == [0, 2, 4]
+    assert process.batches == [[0, 1, 2]]
+    assert 0.04 <= time.perf_counter() - started < 5.0
+
+
+def test_error_reaches_every_waiter():
+    error = ValueError("model exploded")
+    process = Recorder(error)
+    batcher = MicroBatcher(process, max_batch_size=3, max_wait_ms=60_000)
+    results = asyncio.run(submit_all(batcher, range(3)))
+    assert results == [error, error, error]
+    assert len(process.batches) == 1
+
+
+def test_close_fails_pending_submissions():
+    process = Recorder()
+    batcher = MicroBatcher(process, max_batch_size=100, max_wait_ms=60_000)
+
+    async def run():
+        tasks = [asyncio.ensure_future(batcher.submit(item)) for item in range(3)]
+        await asyncio.sleep(0.05)  # queued, and the worker is waiting to fill the batch
+        await batcher.close()
+        return await asyncio.wait_for(asyncio.gather(*tasks, return_exceptions=True), 5.0)
+
+    results = asyncio.run(run())
+    assert len(results) == 3
+    for result in results:
+        assert isinstance(result, RuntimeError) and "shut down" in str(result)
+    assert process.batches == []
+    assert batcher.stats()["queued"] == 0
+
+
+def test_rejects_empty_batches():
+    with pytest.raises(ValueError):
+        MicroBatcher(Recorder(), max_batch_size=0)
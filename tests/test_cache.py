@@ -0,0 +1,55 @@
+"""PredictionCache eviction, expiry and model-version invalidation."""
+from serving import PredictionCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_evicts_least_recently_used():
+    cache = PredictionCache(max_entries=2)
+    cache.put("a", "v1", 1)
+    cache.put("b", "v1", 2)
+    assert cache.get("a", "v1") == 1  # "b" is now the oldest
+    cache.put("c", "v1", 3)
+    assert cache.get("b", "v1") is None
+    assert cache.get("a", "v1") == 1 and cache.get("c", "v1") == 3
+    stats = cache.stats()
+    assert stats["size"] == 2 and stats["evictions"] == 1
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = PredictionCache(ttl_seconds=10.0, clock=clock)
+    cache.put("a", "v1", 1)
+    clock.now = 9.9
+    assert cache.get("a", "v1") == 1
+    clock.now = 10.0
+    assert cache.get("a", "v1") is None
+    # Refreshed by a new put, not by reads
+    cache.put("a", "v1", 2)
+    clock.now = 19.9
+    assert cache.get("a", "v1") == 2
+    stats = cache.stats()
+    assert stats["expirations"] == 1 and stats["size"] == 1
+
+
+def test_new_model_fingerprint_invalidates():
+    cache = PredictionCache()
+    cache.put("a", "v1", 1)
+    cache.put("b", "v1", 2)
+    assert cache.get("a", "v2") is None
+    assert cache.get("b", "v1") is None  # switching back does not resurrect old entries
+    stats = cache.stats()
+    assert stats["invalidations"] == 1 and stats["size"] == 0
+
+
+def test_disabled_cache_stores_nothing():
+    cache = PredictionCache(max_entries=0)
+    cache.put("a", "v1", 1)
+    assert cache.get("a", "v1") is None
+    assert cache.stats()["size"] == 0
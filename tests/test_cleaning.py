@@ -0,0 +1,66 @@
+"""The fast cleaner against the NLTK reference, and training vs serving features."""
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+
+from preprocessing import clean_text, fast_clean_text
+from preprocessing.dataset import preprocess_dataset
+from serving import CompiledModel
+
+pytest.importorskip("nltk")
+from benchmarks.bench_clean import SAMPLE_REVIEWS, build_corpus, nltk_clean_text  # noqa: E402
+
+CASES = {
+    "punctuation": "Wow!!! This—is—great... Don't buy: it's awful; (truly) bad?! e-mail @ foo.bar 10%",
+    "quotes": "quotes “smart” ‘single’ and «guillemets», dash–en and—em",
+    "contractions": "Gonna wanna gotta lemme gimme, I cannot say y'all won't",
+    "accents": "The café's crème brûlée maker — naïve me expected less",
+    "non_latin": "Straße groß ÄÖÜ Ñandú señor, Ελληνικά κείμενα, 日本語のレビューです とても良い",
+    "emoji": "emoji 😀😀 great product 👍 love it",
+    "compatibility": "ﬁne ﬂower ligatures, ２０２３ full-width digits, İstanbul ǅ",
+    "invisible": "zero​width space and nbsp and combining é here",
+    "whitespace": "tabs\tand\nnewlines\r\nmixed   spaces here",
+    "underscores_digits": "snake_case under_scores 1st 2nd 3rd 12345 1.5kg",
+    "code_def": "def main(): print('this is code, not a review')",
+    "code_import": "import os; this should be filtered as code",
+    "code_for": "for loop words in this review",
+    "code_if": "if only it had worked better",
+    "code_py": "run script.py to see",
+    "short": "Short one",
+    "short_padded": "   tiny      ",
+    "ten_chars": "exactly10!",
+    "empty": "",
+    "none": None,
+    "not_text": 42,
+}
+
+
+@pytest.mark.parametrize("text", CASES.values(), ids=CASES.keys())
+def test_fast_cleaner_matches_nltk(text):
+    assert fast_clean_text(text) == nltk_clean_text(text)
+
+
+def test_fast_cleaner_matches_nltk_on_corpus():
+    for text in SAMPLE_REVIEWS + build_corpus(300):
+        assert fast_clean_text(text) == nltk_clean_text(text), text
+
+
+def test_training_and_serving_tfidf_match(training_csv):
+    """Features train_model fits on equal the ones the API scores a raw review with"""
+    # Training path: chunked, multi-process cleaning, then the train_model vectorizer
+    df = preprocess_dataset(training_csv, chunksize=100, processes=2)
+    vectorizer = TfidfVectorizer(ngram_range=(1, 2), max_features=5000, stop_words='english')
+    X_train = vectorizer.fit_transform(df['clean_text'])
+    model = LogisticRegression(solver='liblinear').fit(X_train, df['label'])
+
+    # Serving path: clean each raw review on its own, then the compiled scorer's tf-idf
+    compiled = CompiledModel.from_sklearn(vectorizer, model)
+    served = [clean_text(review) for review in df['text_']]
+    np.testing.assert_allclose(vectorizer.transform(served).toarray(), X_train.toarray(), atol=1e-12)
+    for row, cleaned in enumerate(served):
+        expected = X_train[row].toarray().ravel()
+        indices, values = compiled.tfidf_vector(compiled.term_counts(cleaned))
+        actual = np.zeros(compiled.n_features)
+        actual[indices] = values
+        np.testing.assert_allclose(actual, expected, atol=1e-6)
@@ -0,0 +1,185 @@
+"""Compiled scorer parity with the sklearn pipelines it is compiled from."""
+import copy
+import os
+
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.linear_model import SGDClassifier
+
+from conftest import make_reviews
+from preprocessing import clean_text
+from preprocessing.dataset import preprocess_dataset
+from serving import CompiledModel
+from serving.compiled import (CURRENT_FILE, MANIFEST_FILE, HashedCompiledModel, activate_version,
+                              current_version, load_model)
+from train_model import new_classifier, train_category_models
+
+ATOL = 1e-6
+
+
+@pytest.fixture(scope="module")
+def corpus(training_csv):
+    return preprocess_dataset(training_csv, extra_columns=("category",))
+
+
+@pytest.fixture(scope="module")
+def texts():
+    """Unseen cleaned reviews, plus ones with few or no vocabulary terms"""
+    reviews = [review for review, _, _ in make_reviews(200, seed=1)]
+    reviews += ["Completely unrelated vocabulary: quantum zebra xylophone",
+                "Broke broke broke broke broke broke, refund please"]
+    return [cleaned for cleaned in map(clean_text, reviews) if cleaned]
+
+
+@pytest.fixture(scope="module")
+def tfidf_pipeline(corpus):
+    # Same settings as train_model.train_model
+    vectorizer = TfidfVectorizer(ngram_range=(1, 2), max_features=5000, stop_words='english')
+    X = vectorizer.fit_transform(corpus['clean_text'])
+    y = corpus['label'].to_numpy()
+    model = new_classifier(0.5).fit(X, y)
+    category_models = train_category_models(X, y, corpus['category'].to_numpy(), min_reviews=50)
+    return vectorizer, model, category_models
+
+
+@pytest.fixture(scope="module")
+def hashed_pipeline(corpus):
+    # Same settings as train_model.train_streaming, in a smaller hashing space
+    vectorizer = HashingVectorizer(ngram_range=(1, 2), n_features=2 ** 12, alternate_sign=False,
+                                   stop_words='english')
+    model = SGDClassifier(loss='log_loss', alpha=1e-5, random_state=42)
+    model.fit(vectorizer.transform(corpus['clean_text']), corpus['label'].to_numpy())
+    return vectorizer, model
+
+
+def compile_model(vectorizer, model, category_models=None, saved=False, tmp_path=None):
+    compiled = CompiledModel.from_sklearn(vectorizer, model, category_models)
+    if not saved:
+        return compiled
+    compiled.save(tmp_path / "compiled")
+    return CompiledModel.load(tmp_path / "compiled")
+
+
+@pytest.mark.parametrize("saved", [False, True], ids=["in_memory", "memory_mapped"])
+def test_tfidf_parity(tfidf_pipeline, texts, saved, tmp_path):
+    vectorizer, model, _ = tfidf_pipeline
+    compiled = compile_model(vectorizer, model, saved=saved, tmp_path=tmp_path)
+    expected = model.predict_proba(vectorizer.transform(texts))[:, 1]
+    actual = [compiled.predict_proba(text) for text in texts]
+    np.testing.assert_allclose(actual, expected, atol=ATOL)
+
+
+@pytest.mark.parametrize("saved", [False, True], ids=["in_memory", "memory_mapped"])
+def test_category_parity(tfidf_pipeline, texts, saved, tmp_path):
+    vectorizer, model, category_models = tfidf_pipeline
+    assert len(category_models) > 1
+    compiled = compile_model(vectorizer, model, category_models, saved=saved, tmp_path=tmp_path)
+    X = vectorizer.transform(texts)
+    every = [dict((c, (label, p)) for c, label, p in compiled.predict_categories(text)) for text in texts]
+    for category, category_model in category_models.items():
+        expected = category_model.predict_proba(X)[:, 1]
+        # Confidence is of the predicted label; turn it back into P(classes[1])
+        actual = [p if label == compiled.classes[1] else 1.0 - p for label, p in (r[category] for r in every)]
+        np.testing.assert_allclose(actual, expected, atol=ATOL)
+        subset = [compiled.predict_categories(text, [category])[0] for text in texts]
+        np.testing.assert_allclose([p if label == compiled.classes[1] else 1.0 - p for _, label, p in subset],
+                                   expected, atol=ATOL)
+
+
+@pytest.mark.parametrize("saved", [False, True], ids=["in_memory", "memory_mapped"])
+def test_hashed_parity(hashed_pipeline, texts, saved, tmp_path):
+    vectorizer, model = hashed_pipeline
+    compiled = compile_model(vectorizer, model, saved=saved, tmp_path=tmp_path)
+    assert isinstance(compiled, HashedCompiledModel)
+    expected = model.predict_proba(vectorizer.transform(texts))[:, 1]
+    actual = [compiled.predict_proba(text) for text in texts]
+    np.testing.assert_allclose(actual, expected, atol=ATOL)
+
+
+def test_save_swaps_versions_atomically(tfidf_pipeline, hashed_pipeline, tmp_path):
+    path = tmp_path / "compiled"
+    first = compile_model(*tfidf_pipeline[:2])
+    second = compile_model(*hashed_pipeline)
+    first.save(path)
+    assert CompiledModel.load(path).fingerprint == first.fingerprint
+
+    # Written but not current until activated
+    pending = second.save(path, activate=False)
+    assert CompiledModel.load(path).fingerprint == first.fingerprint
+    activate_version(path, os.path.basename(pending))
+    assert CompiledModel.load(path).fingerprint == second.fingerprint
+
+    # The replaced version stays for readers that resolved it; older ones go
+    first.save(path)
+    versions = sorted(p.name for p in path.iterdir() if p.is_dir())
+    assert versions == [os.path.basename(pending), os.path.basename(current_version(path))]
+
+
+def test_save_replaces_unversioned_artifact(tfidf_pipeline, hashed_pipeline, tmp_path):
+    path = tmp_path / "compiled"
+    legacy = compile_model(*tfidf_pipeline[:2])
+    legacy.save(path)
+    # Lay the version out like artifacts written before versioned saves
+    version = current_version(path)
+    for name in os.listdir(version):
+        os.rename(os.path.join(version, name), path / name)
+    os.rmdir(version)
+    os.remove(path / CURRENT_FILE)
+    assert CompiledModel.load(path).fingerprint == legacy.fingerprint
+
+    model = compile_model(*hashed_pipeline)
+    model.save(path)
+    assert CompiledModel.load(path).fingerprint == model.fingerprint
+    model.save(path)
+    assert not list(path.glob("*.npy")) and not (path / MANIFEST_FILE).exists()
+
+
+def test_load_model_never_falls_back_from_a_compiled_dir(tmp_path):
+    (tmp_path / "compiled").mkdir()
+    with pytest.raises(FileNotFoundError, match="manifest"):
+        load_model(str(tmp_path))
+
+
+@pytest.mark.parametrize("saved", [False, True], ids=["in_memory", "memory_mapped"])
+def test_skipped_categories_fall_back_to_global(tfidf_pipeline, texts, saved, tmp_path):
+    vectorizer, model, category_models = tfidf_pipeline
+    compiled = compile_model(vectorizer, model, {**category_models, "Rare": None}, saved=saved, tmp_path=tmp_path)
+    assert compiled.all_categories == [*category_models, "Rare"]
+    expected = model.predict_proba(vectorizer.transform(texts))[:, 1]
+    for categories in (None, ["Rare"], ["Rare", next(iter(category_models))]):
+        rare = [dict((c, (label, p)) for c, label, p in compiled.predict_categories(text, categories))["Rare"]
+                for text in texts]
+        np.testing.assert_allclose([p if label == compiled.classes[1] else 1.0 - p for label, p in rare],
+                                   expected, atol=ATOL)
+    with pytest.raises(ValueError, match="Unknown category"):
+        compiled.predict_categories(texts[0], ["Missing"])
+
+
+def sklearn_coef(compiled, vectorizer):
+    """The compiled (possibly dequantized) coefficients in the tf-idf ``vectorizer``'s feature order"""
+    coef = np.asarray(compiled.dense_coef(), dtype=np.float64)
+    order = [vectorizer.vocabulary_[key.decode('utf-8')] for key in compiled.term_keys]
+    reordered = np.zeros(len(vectorizer.vocabulary_))
+    reordered[order] = coef
+    return reordered
+
+
+@pytest.mark.parametrize("mode", ["tfidf", "hashed", "quantized"])
+def test_explain_adds_up_to_decision_function(tfidf_pipeline, hashed_pipeline, texts, mode, tmp_path):
+    vectorizer, model = hashed_pipeline if mode == "hashed" else tfidf_pipeline[:2]
+    compiled = compile_model(vectorizer, model)
+    if mode == "quantized":
+        compiled.save(tmp_path / "compiled", coef_dtype="int8")
+        compiled = CompiledModel.load(tmp_path / "compiled")
+        assert compiled.coef.dtype == np.int8
+        # sklearn scoring with the dequantized weights the compiled model holds
+        model = copy.deepcopy(model)
+        model.coef_ = sklearn_coef(compiled, vectorizer)[np.newaxis, :]
+    sample = texts[:25] + texts[-2:]
+    expected = model.decision_function(vectorizer.transform(sample))
+    for text, score in zip(sample, expected):
+        label, _, contributions = compiled.explain(text, top_k=compiled.n_features)
+        assert label == compiled.predict(text)[0]
+        assert sum(weight for _, weight in contributions) + compiled.intercept == pytest.approx(score, abs=ATOL)
+        assert compiled.decision_function(text) == pytest.approx(score, abs=ATOL)
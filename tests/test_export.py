@@ -0,0 +1,35 @@
+"""export_model.py scores exports on the reviews train_model.py really held out."""
+from types import SimpleNamespace
+
+import numpy as np
+
+from export_model import held_out_reviews, recorded_holdout
+from preprocessing.dataset import preprocess_dataset
+from serving.compiled import load_model, read_manifest
+from train_model import TFIDF_HOLDOUT, train_streaming
+
+
+def test_streaming_holdout_is_recorded_and_redrawn(training_csv, tmp_path):
+    model_dir = str(tmp_path / "model")
+    train_streaming(training_csv, model_dir, chunk_size=128, cache_dir=None, n_features=2 ** 10,
+                    test_size=0.25, max_test_rows=60, seed=7)
+    holdout = recorded_holdout(model_dir, load_model(model_dir))
+    assert holdout == read_manifest(f"{model_dir}/compiled")["training"]["holdout"]
+    assert holdout == {"method": "row_mask", "test_size": 0.25, "seed": 7, "max_test_rows": 60}
+
+    # The rows the learner's per-row mask held out, over the whole cleaned corpus
+    corpus = preprocess_dataset(training_csv)
+    held_out = np.random.default_rng(7).random(len(corpus)) < 0.25
+    expected = corpus[held_out].head(60)
+
+    # Redrawn with other chunk sizes, with and without the corpus cache
+    for cache_dir in (None, str(tmp_path / "cache")):
+        texts, labels = held_out_reviews(holdout, training_csv, cache_dir=cache_dir)
+        assert texts == expected['clean_text'].tolist()
+        np.testing.assert_array_equal(labels, expected['label'].to_numpy())
+
+
+def test_unrecorded_holdout_is_only_assumed_for_tfidf(tmp_path):
+    # Artifacts from before the split was recorded
+    assert recorded_holdout(str(tmp_path), SimpleNamespace(vectorizer="tfidf")) == TFIDF_HOLDOUT
+    assert recorded_holdout(str(tmp_path), SimpleNamespace(vectorizer="hashing")) is None
@@ -0,0 +1,90 @@
+"""Online updates from the feedback log: publishing and resuming."""
+import os
+
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from conftest import make_reviews
+from preprocessing import clean_text
+from serving import CompiledModel
+from serving.compiled import CURRENT_FILE, current_version
+from serving.feedback import FEEDBACK_LABELS, FeedbackLog, OnlineUpdater
+from serving.registry import ModelRegistry
+from train_model import new_classifier
+
+
+@pytest.fixture(scope="module")
+def base_model(tmp_path_factory):
+    """A small TF-IDF model saved as ``<tmp>/model/compiled``"""
+    rows = make_reviews(300, seed=2)
+    texts = [clean_text(review) for review, _, _ in rows]
+    vectorizer = TfidfVectorizer(ngram_range=(1, 2), stop_words='english')
+    X = vectorizer.fit_transform(texts)
+    model = new_classifier(0.5).fit(X, [1 if label == "CG" else 0 for _, label, _ in rows])
+    model_dir = tmp_path_factory.mktemp("base") / "model"
+    CompiledModel.from_sklearn(vectorizer, model).save(model_dir / "compiled")
+    return str(model_dir)
+
+
+def log_feedback(log, n, seed=3):
+    for review, label, _ in make_reviews(n, seed=seed):
+        log.append(review, FEEDBACK_LABELS["Fake Review" if label == "CG" else "Real Review"])
+
+
+def start(model_dir, log, output_dir):
+    registry = ModelRegistry(model_dir)
+    registry.reload()
+    return registry, OnlineUpdater(registry, log, output_dir, min_batch=1)
+
+
+class RefusingRegistry(ModelRegistry):
+    """A registry that another reload always beats to the swap"""
+
+    def publish(self, version, expected_fingerprint):
+        return self.active, None
+
+
+def test_unpublished_update_is_never_made_current(base_model, tmp_path):
+    log = FeedbackLog(str(tmp_path / "feedback.jsonl"))
+    output_dir = str(tmp_path / "online")
+    registry, updater = start(base_model, log, output_dir)
+    log_feedback(log, 20)
+    published = updater.update()
+    artifact_dir = os.path.join(output_dir, "compiled")
+    current = current_version(artifact_dir)
+
+    refusing = RefusingRegistry(base_model)
+    refusing.active = registry.active
+    updater.registry = refusing
+    log_feedback(log, 20, seed=4)
+    assert updater.update() is None
+    # The refused weights are gone, and a restart would load the published ones
+    assert current_version(artifact_dir) == current
+    assert sorted(os.listdir(artifact_dir)) == sorted([CURRENT_FILE, os.path.basename(current)])
+    assert CompiledModel.load(artifact_dir).fingerprint == published
+
+
+def test_restart_on_published_artifact_applies_nothing_twice(base_model, tmp_path):
+    log = FeedbackLog(str(tmp_path / "feedback.jsonl"))
+    # main.py's default FEEDBACK_MODEL_DIR is MODEL_DIR + "-online"
+    online_dir = base_model + "-online"
+    registry, updater = start(base_model, log, online_dir)
+    log_feedback(log, 30)
+    published = updater.update()
+    assert updater.applied == 30 and updater.pending_bytes() == 0
+
+    # Restart with MODEL_DIR set to the published artifact
+    registry, restarted = start(online_dir, log, online_dir + "-online")
+    assert registry.active.model.fingerprint == published
+    assert (restarted.offset, restarted.applied, restarted.updates) == (updater.offset, 30, 1)
+    assert restarted.update(force=True) is None
+    assert registry.active.model.fingerprint == published
+
+    # Only the records logged since are applied, and the count carries on
+    log_feedback(log, 5, seed=5)
+    assert restarted.update() is not None
+    assert restarted.applied == 35 and restarted.pending_bytes() == 0
+
+    # A restart on the base model replays the whole log onto it
+    _, replaying = start(base_model, log, online_dir)
+    assert replaying.offset == 0 and replaying.pending_bytes() == log.size()
@@ -0,0 +1,120 @@
+"""Input guards: review length, request body size and NDJSON line size."""
+import asyncio
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from serving.guards import BodySizeLimitMiddleware, InputGuard
+from serving.pipeline import INVALID_REVIEW
+from serving.streaming import aiter_lines
+
+MAX_BYTES = 1000
+
+
+def test_long_review_is_cut_at_a_word_boundary():
+    guard = InputGuard(max_review_chars=100)
+    review = "great value " * 20
+    text, error, reason = guard.check(review)
+    assert (error, reason) == (None, "truncated")
+    assert len(text) <= 100 and review.startswith(text)
+    assert review[len(text)] == " "
+    assert text.split()[-1] in ("great", "value")
+
+
+def test_long_review_without_spaces_is_cut_at_the_limit():
+    text, _, reason = InputGuard(max_review_chars=100).check("x" * 500)
+    assert (text, reason) == ("x" * 100, "truncated")
+
+
+def test_long_review_rejected_without_truncation():
+    text, error, reason = InputGuard(max_review_chars=100, truncate=False).check("word " * 50)
+    assert text is None and reason == "too_long" and "250 characters" in error
+
+
+@pytest.mark.parametrize("review", ["", "   ", "too short"])
+def test_short_or_empty_review_is_rejected(review):
+    assert InputGuard().check(review) == (None, INVALID_REVIEW, "too_short")
+
+
+def test_review_within_limits_is_untouched():
+    review = "Fits well and the fabric is thick"
+    assert InputGuard(max_review_chars=100).check(review) == (review, None, None)
+
+
+def test_raw_length_is_recorded_before_truncation(monkeypatch):
+    import main
+    from serving.metrics import PipelineMetrics
+
+    metrics = PipelineMetrics()
+    monkeypatch.setattr(main, "pipeline_metrics", metrics)
+    monkeypatch.setattr(main, "input_guard", InputGuard(max_review_chars=100))
+    results, pending = main.guard_reviews(["word " * 50, "too short"])
+    assert [truncated for _, _, truncated in pending] == [True] and results[1]["error"] == INVALID_REVIEW
+    ((counts, total),) = metrics.input_chars.snapshot().values()
+    assert sum(counts) == 2 and total == 250 + 9
+
+
+@pytest.fixture(scope="module")
+def client():
+    app = FastAPI()
+
+    @app.post("/echo")
+    async def echo(request: Request):
+        return {"bytes": len(await request.body())}
+
+    @app.post("/stream")
+    async def stream(request: Request):
+        return {"bytes": len(await request.body())}
+
+    app.add_middleware(BodySizeLimitMiddleware, max_bytes=MAX_BYTES, exempt=("/stream",))
+    return TestClient(app)
+
+
+def chunked(total, size=100):
+    """A generator body: sent with Transfer-Encoding: chunked and no Content-Length"""
+    for start in range(0, total, size):
+        yield b"x" * min(size, total - start)
+
+
+def test_body_within_limit_passes(client):
+    assert client.post("/echo", content=b"x" * MAX_BYTES).json() == {"bytes": MAX_BYTES}
+    assert client.post("/echo", content=chunked(MAX_BYTES)).json() == {"bytes": MAX_BYTES}
+
+
+def test_oversized_content_length_gets_413(client):
+    response = client.post("/echo", content=b"x" * (MAX_BYTES + 1))
+    assert response.status_code == 413
+    assert str(MAX_BYTES) in response.json()["detail"]
+
+
+def test_oversized_chunked_body_gets_413(client):
+    response = client.post("/echo", content=chunked(MAX_BYTES * 5))
+    assert "content-length" not in response.request.headers
+    assert response.status_code == 413
+
+
+def test_exempt_path_is_not_limited(client):
+    assert client.post("/stream", content=chunked(MAX_BYTES * 5)).json() == {"bytes": MAX_BYTES * 5}
+
+
+def read_lines(chunks, max_line_bytes=None):
+    async def source():
+        for chunk in chunks:
+            yield chunk
+
+    async def collect():
+        return [line async for line in aiter_lines(source(), max_line_bytes)]
+
+    return asyncio.run(collect())
+
+
+def test_oversized_ndjson_line_is_dropped():
+    big = b'"' + b"y" * 50 + b'"'
+    lines = read_lines([b'"first"\n' + big[:20], big[20:40], big[40:] + b'\n"last"\n'], max_line_bytes=30)
+    assert lines == ['"first"', None, '"last"']
+
+
+def test_oversized_final_line_without_newline_is_dropped():
+    assert read_lines([b'"ok"\n', b"z" * 40], max_line_bytes=30) == ['"ok"', None]
+    assert read_lines([b'"ok"\n' + b"z" * 40 + b"\n"], max_line_bytes=30) == ['"ok"', None]
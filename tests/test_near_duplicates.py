@@ -0,0 +1,64 @@
+"""NearDuplicateIndex matching, eviction and snapshot round trip."""
+import numpy as np
+
+from serving.near_duplicates import NearDuplicateIndex
+
+TEMPLATE = ("absolutely love this {} it arrived quickly works perfectly every single day and "
+            "the quality is far better than anything else i have bought online this year so i "
+            "would recommend it to all my friends and family without hesitation")
+UNRELATED = [
+    "zipper broke after two weeks and the seller refused to refund me",
+    "fits bit small ordered size up fabric feels thin okay price",
+    "battery lasts about day charging takes three hours slow",
+]
+
+
+def test_matches_templated_reviews_only():
+    index = NearDuplicateIndex(threshold=0.6)
+    cluster, similarity, near_fake = index.observe(TEMPLATE.format("blender"), fake=True)
+    assert similarity == 0.0 and not near_fake
+
+    for product in ("toaster", "kettle", "mixer"):
+        matched, similarity, near_fake = index.observe(TEMPLATE.format(product), fake=False)
+        assert matched == cluster and similarity >= 0.6 and near_fake
+
+    for text in UNRELATED:
+        matched, similarity, near_fake = index.query(text)
+        assert matched is None and similarity == 0.0 and not near_fake
+    assert index.stats()["clusters"] == 1
+
+
+def test_evicts_least_recently_matched():
+    index = NearDuplicateIndex(max_entries=2)
+    template, _, _ = index.observe(TEMPLATE.format("blender"), fake=False)
+    other, _, _ = index.observe(UNRELATED[0], fake=False)
+    # Matching the template makes the unrelated review the oldest entry
+    index.observe(TEMPLATE.format("toaster"), fake=False)
+    assert index.query(UNRELATED[0])[0] is None
+    assert index.query(TEMPLATE.format("kettle"))[0] == template
+    stats = index.stats()
+    assert stats["size"] == 2 and stats["evictions"] == 1
+
+
+def test_snapshot_round_trip(tmp_path):
+    index = NearDuplicateIndex(max_entries=50, threshold=0.7, seed=7)
+    for i, product in enumerate(("blender", "toaster", "kettle")):
+        index.observe(TEMPLATE.format(product), fake=i == 0)
+    for text in UNRELATED:
+        index.observe(text, fake=True)
+
+    path = str(tmp_path / "index.npz")
+    assert index.save(path) == 6
+    loaded = NearDuplicateIndex.load(path, max_entries=50)
+    assert loaded.settings() == index.settings()
+
+    again = str(tmp_path / "again.npz")
+    loaded.save(again)
+    with np.load(path) as saved, np.load(again) as reloaded:
+        for name in ("signatures", "clusters", "fakes"):
+            np.testing.assert_array_equal(reloaded[name], saved[name])
+    for text in [TEMPLATE.format("mixer")] + UNRELATED:
+        assert loaded.query(text) == index.query(text)
+    # Cluster ids carry on where the saved index stopped
+    fresh = "completely different words about garden hoses and sprinklers"
+    assert loaded.observe(fresh, fake=False)[0] == index.observe(fresh, fake=False)[0]
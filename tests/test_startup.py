@@ -0,0 +1,62 @@
+"""Startup: importing the API has no side effects, and model lookup matches load_model."""
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import make_reviews
+from preprocessing import clean_text
+from serving import CompiledModel
+from serving.compiled import load_model
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_import_installs_no_logging_and_opens_no_files(tmp_path):
+    feedback_log = tmp_path / "feedback" / "log.jsonl"
+    code = ("import logging, main; "
+            "assert not logging.getLogger().handlers, logging.getLogger().handlers; "
+            "assert main.feedback_log is None")
+    env = {**os.environ, "FEEDBACK_LOG": str(feedback_log), "MODEL_DIR": str(tmp_path / "model")}
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, check=True)
+    assert not feedback_log.parent.exists()
+
+
+@pytest.fixture(scope="module")
+def main_module():
+    import main
+    return main
+
+
+@pytest.fixture(scope="module")
+def compiled():
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from train_model import new_classifier
+
+    rows = make_reviews(100, seed=4)
+    vectorizer = TfidfVectorizer(stop_words='english')
+    X = vectorizer.fit_transform([clean_text(review) for review, _, _ in rows])
+    return CompiledModel.from_sklearn(vectorizer, new_classifier(0.5).fit(X, [label for _, label, _ in rows]))
+
+
+def test_resources_found_where_load_model_looks(main_module, compiled, tmp_path):
+    version = compiled.save(tmp_path / "compiled")
+    assert main_module.check_local_resources(str(tmp_path)) == version
+    assert load_model(str(tmp_path)).fingerprint == compiled.fingerprint
+
+
+def test_incomplete_compiled_dir_fails_like_load_model(main_module, tmp_path):
+    (tmp_path / "compiled").mkdir()
+    # Pickles next to it are not a fallback for a broken artifact
+    for name in ("fake_review_model.pkl", "vectorizer.pkl"):
+        (tmp_path / name).write_bytes(b"")
+    with pytest.raises(RuntimeError, match="Incomplete compiled model"):
+        main_module.check_local_resources(str(tmp_path))
+    with pytest.raises(FileNotFoundError):
+        load_model(str(tmp_path))
+
+
+def test_missing_model_fails(main_module, tmp_path):
+    with pytest.raises(RuntimeError, match="missing"):
+        main_module.check_local_resources(str(tmp_path))
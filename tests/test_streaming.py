@@ -0,0 +1,73 @@
+"""NDJSON streaming: line splitting across chunks and per-line results."""
+import asyncio
+import json
+
+from serving.streaming import LINE_TOO_LONG, aiter_lines, score_lines
+
+
+def fake_predict_many(reviews):
+    return [{"prediction": "Fake" if "!" in review else "Real", "chars": len(review)} for review in reviews]
+
+
+def read_lines(chunks, max_line_bytes=None):
+    async def source():
+        for chunk in chunks:
+            yield chunk
+
+    async def collect():
+        return [line async for line in aiter_lines(source(), max_line_bytes)]
+
+    return asyncio.run(collect())
+
+
+def test_ids_and_line_numbers_are_carried_through():
+    lines = ['"plain review"', json.dumps({"id": "a-1", "review": "Great!"}),
+             "", json.dumps({"id": 7, "review": "fine", "other": "ignored"})]
+    calls = []
+
+    def predict_many(reviews):
+        calls.append(reviews)
+        return fake_predict_many(reviews)
+
+    assert score_lines(lines, predict_many, first_line=11) == [
+        {"line": 11, "prediction": "Real", "chars": 12},
+        {"line": 12, "id": "a-1", "prediction": "Fake", "chars": 6},
+        {"line": 14, "id": 7, "prediction": "Real", "chars": 4},
+    ]
+    # One batched call for the whole chunk
+    assert calls == [["plain review", "Great!", "fine"]]
+
+
+def test_malformed_lines_get_their_own_error():
+    lines = ['{"review": "ok"', '{"id": 1}', "42", '"good one"', None]
+    results = score_lines(lines, fake_predict_many)
+    assert [r["line"] for r in results] == [1, 2, 3, 4, 5]
+    assert all(r["error"].startswith("Malformed line") for r in results[:3])
+    assert results[3] == {"line": 4, "prediction": "Real", "chars": 8}
+    assert results[4] == {"line": 5, "error": LINE_TOO_LONG}
+
+
+def test_malformed_chunk_skips_the_model():
+    def predict_many(reviews):
+        raise AssertionError("nothing to score")
+
+    assert score_lines(["not json", "  "], predict_many) == [
+        {"line": 1, "error": "Malformed line: Expecting value: line 1 column 1 (char 0)"}]
+
+
+def test_lines_split_across_chunks():
+    payload = ('"first"\n{"id": "x", "review": "café ünïcode"}\n"third"\n"no newline at end"').encode("utf-8")
+    expected = ['"first"', '{"id": "x", "review": "café ünïcode"}', '"third"', '"no newline at end"']
+    # Every chunk size, including ones cutting multi-byte characters and the newlines themselves
+    for size in range(1, len(payload) + 1):
+        chunks = [payload[i:i + size] for i in range(0, len(payload), size)]
+        assert read_lines(chunks) == expected, size
+
+
+def test_split_lines_score_like_whole_ones():
+    records = [{"id": i, "review": f"review number {i}" + "!" * (i % 2)} for i in range(20)]
+    payload = "".join(json.dumps(r) + "\n" for r in records).encode("utf-8")
+    chunks = [payload[i:i + 13] for i in range(0, len(payload), 13)]
+    results = score_lines(read_lines(chunks), fake_predict_many)
+    assert [r["id"] for r in results] == list(range(20))
+    assert [r["prediction"] for r in results] == ["Fake" if i % 2 else "Real" for i in range(20)]
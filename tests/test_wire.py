@@ -0,0 +1,49 @@
+"""Accept and Accept-Encoding negotiation of the prediction endpoints."""
+import pytest
+
+from serving import wire
+
+BODY = b'{"results": []}' * 100
+
+
+@pytest.mark.parametrize("accept_encoding, gzipped", [
+    ("gzip", True),
+    ("gzip, deflate, br", True),
+    ("br;q=1.0, gzip;q=0.8", True),
+    ("GZIP;Q=0.5", True),
+    ("*", True),
+    ("x-gzip", True),
+    ("gzip;q=0", False),
+    ("gzip;q=0.0, deflate", False),
+    ("*, gzip;q=0", False),
+    ("*;q=0", False),
+    ("deflate, br", False),
+    ("gzipped", False),
+    ("", False),
+    (None, False),
+])
+def test_gzip_respects_qvalues(accept_encoding, gzipped):
+    body, headers = wire.maybe_gzip(BODY, accept_encoding, min_bytes=100)
+    assert (headers.get("Content-Encoding") == "gzip") is gzipped
+    assert (body != BODY) is gzipped
+
+
+@pytest.mark.parametrize("accept, msgpack", [
+    ("application/msgpack", True),
+    ("application/x-msgpack", True),
+    ("application/msgpack, */*", True),
+    ("application/json;q=0.5, application/msgpack", True),
+    ("application/msgpack;q=0", False),
+    ("application/msgpack;q=0, application/json", False),
+    ("application/json, application/msgpack;q=0.9", False),
+    ("application/msgpack;q=0.5, */*", False),
+    ("application/json", False),
+    ("*/*", False),
+    ("application/msgpackx", False),
+    ("", False),
+    (None, False),
+])
+def test_msgpack_respects_qvalues(accept, msgpack):
+    if wire.msgpack is None:
+        pytest.skip("msgpack is not installed")
+    assert wire.wants_msgpack(accept) is msgpack
@@ -1,95 +1,268 @@
-import pandas as pd
+"""Train the fake review classifier.
+
+Two learners:
+
+  tfidf  (default) TfidfVectorizer + liblinear LogisticRegression, fitted in
+         memory on the whole cleaned dataset
+  sgd    HashingVectorizer + SGDClassifier(loss='log_loss').partial_fit,
+         streamed over the CSV chunk by chunk, so memory is bounded by the
+         chunk size (plus a capped held-out set) rather than the dataset
+
+With ``--category-column category`` the tfidf learner also fits one
+LogisticRegression per product category on the same tf-idf features; they are
+stacked into the compiled artifact next to the global model.
+
+The CSV is read in chunks and cleaned on ``--processes`` cores either way.
+The cleaned corpus is cached under ``--cache-dir`` (see preprocessing.corpus),
+so later runs on the same data skip cleaning. Both learners save the pickles
+and the compiled artifact the API serves.
+
+    python train_model.py --data data/fake_review.csv --processes 8
+    python train_model.py --data reviews.csv --learner sgd --chunk-size 200000 --epochs 2
+    python train_model.py --data data/fake_review.csv --category-column category
+"""
+import argparse
 import os
 import pickle
-import re
-import nltk
+
+import numpy as np
 from sklearn.model_selection import train_test_split
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import classification_report
-
-# Download required resources
-nltk.download('stopwords')
-nltk.download('punkt')
-
-# Unified cleaning function
-def clean_text(text):
-    if not isinstance(text, str) or len(text.strip()) < 10:
-        return ""
-    
-    # Filter code-like patterns
-    if re.search(r'\b(import|def|function|class|return|\.py|print|for |if )\b', text):
-        return ""
-    
-    text = text.lower()
-    text = re.sub(r'[^\w\s]', '', text)  # Remove punctuation
-    words = nltk.word_tokenize(text)
-    
-    stop_words = set(nltk.corpus.stopwords.words('english'))
-    words = [word for word in words if word not in stop_words and len(word) > 2]
-    
-    return ' '.join(words)
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.metrics import classification_report, f1_score
 
-def preprocess_dataset(path):
-    # Read dataset
-    df = pd.read_csv(path)
-    
-    # Handle label mapping
-    df['label'] = df['label'].map({'CG': 1, 'OR': 0})
-    df = df.dropna(subset=['label'])
-    
-    # Clean text
-    df['clean_text'] = df['text_'].apply(clean_text)
-    df = df[df['clean_text'].str.len() > 10]  # Remove short reviews
-    
-    return df
+from preprocessing.corpus import DEFAULT_CACHE_DIR, corpus_frame, iter_corpus_batches, open_corpus
+from preprocessing.dataset import iter_preprocessed_chunks, preprocess_dataset
+from serving import CompiledModel
+
+DEFAULT_DATA_PATH = os.path.join("data", "fake_review.csv")
+CLASSES = np.array([0, 1])
+# The tfidf learner's evaluation split, recorded in the compiled manifest
+TFIDF_HOLDOUT = {"method": "train_test_split", "test_size": 0.2, "random_state": 42}
 
-def train_model():
-    # Windows path with raw string
-    df = preprocess_dataset(r"C:\Users\aiman\OneDrive\Desktop\fake_review_detector\data\fake_review.csv")
+def export_compiled_model(vectorizer, model, path, category_models=None, training=None):
+    """Export the array-backed artifact the API scores requests with"""
+    compiled = CompiledModel.from_sklearn(vectorizer, model, category_models)
+    compiled.save(path, training=training)
+    print(f"📦 Compiled model with {compiled.n_features} features, {len(compiled.categories)} category models "
+          f"and {len(compiled.fallback_categories)} categories on the global model exported to {path}")
+    return compiled
+
+def save_model(vectorizer, model, output_dir="model", category_models=None, holdout=None):
+    """Write the pickles and the compiled artifact to ``output_dir``
+
+    ``holdout`` records how the evaluation split was drawn, so that
+    export_model.py can score exports on the same reviews.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, "fake_review_model.pkl"), "wb") as f:
+        pickle.dump(model, f)
+    with open(os.path.join(output_dir, "vectorizer.pkl"), "wb") as f:
+        pickle.dump(vectorizer, f)
+    if category_models:
+        with open(os.path.join(output_dir, "category_models.pkl"), "wb") as f:
+            pickle.dump(category_models, f)
+    export_compiled_model(vectorizer, model, os.path.join(output_dir, "compiled"), category_models,
+                          training={"holdout": holdout} if holdout else None)
+
+def load_training_frame(data_path, text_column="text_", chunk_size=100_000, processes=1,
+                        cache_dir=DEFAULT_CACHE_DIR, extra_columns=()):
+    """Cleaned corpus as a DataFrame, from the corpus cache unless ``cache_dir`` is None"""
+    if cache_dir is None:
+        return preprocess_dataset(data_path, text_column, chunksize=chunk_size, processes=processes,
+                                  extra_columns=extra_columns)
+    return corpus_frame(open_corpus(data_path, text_column, cache_dir, chunk_size, processes,
+                                    extra_columns=extra_columns))
+
+def training_batches(data_path, text_column="text_", chunk_size=100_000, processes=1,
+                     cache_dir=DEFAULT_CACHE_DIR):
+    """Return a function yielding (texts, labels) arrays over the cleaned corpus, in file order"""
+    if cache_dir is not None:
+        table = open_corpus(data_path, text_column, cache_dir, chunk_size, processes)
+        return lambda: iter_corpus_batches(table, chunk_size)
+
+    def batches():
+        for chunk in iter_preprocessed_chunks(data_path, text_column, chunk_size, processes):
+            yield chunk['clean_text'].to_numpy(), chunk['label'].to_numpy(dtype=np.int64)
+    return batches
+
+def split_batches(batches, test_size, seed):
+    """Yield (texts, labels, held-out mask) for each batch of ``batches()``
+
+    The mask is drawn row by row from one generator, so which rows are held
+    out depends on the seed and the row order, not on the chunk size.
+    """
+    rng = np.random.default_rng(seed)
+    for texts, labels in batches():
+        yield texts, labels, rng.random(len(texts)) < test_size
+
+def new_classifier(C):
+    return LogisticRegression(
+        max_iter=1000,
+        class_weight='balanced',
+        C=C,
+        solver='liblinear',
+        random_state=42
+    )
+
+def train_category_models(X, y, categories, C=0.5, min_reviews=100):
+    """One classifier per category, fitted on that category's rows of the shared features"""
+    models = {}
+    for category in sorted(set(categories)):
+        rows = np.flatnonzero(categories == category)
+        if len(rows) < min_reviews or len(np.unique(y[rows])) < 2:
+            print(f"⚠️ Skipping category {category!r}: {len(rows)} reviews, needs {min_reviews} of both classes")
+            continue
+        models[category] = new_classifier(C).fit(X[rows], y[rows])
+    return models
+
+def report_category_models(category_models, model, X, y, categories):
+    """Held-out F1 of each category model next to the global model's on the same reviews"""
+    print(f"\n{'category':>24} {'reviews':>8} {'global F1':>10} {'category F1':>12}")
+    for category, category_model in category_models.items():
+        rows = np.flatnonzero(categories == category)
+        if not len(rows):
+            continue
+        print(f"{category:>24} {len(rows):>8} {f1_score(y[rows], model.predict(X[rows])):10.4f} "
+              f"{f1_score(y[rows], category_model.predict(X[rows])):12.4f}")
+
+def train_model(data_path=DEFAULT_DATA_PATH, output_dir="model", text_column="text_",
+                chunk_size=100_000, processes=1, cache_dir=DEFAULT_CACHE_DIR,
+                ngram_range=(1, 2), max_features=5000, C=0.5,
+                category_column=None, min_category_reviews=100):
+    extra_columns = (category_column,) if category_column else ()
+    df = load_training_frame(data_path, text_column, chunk_size, processes, cache_dir, extra_columns)
     
     # Check class distribution
     print(f"Class distribution:\n{df['label'].value_counts()}")
     
     # Split data
     X = df['clean_text']
-    y = df['label']
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42
+    y = df['label'].to_numpy()
+    categories = df[category_column].to_numpy() if category_column else np.zeros(len(df))
+    holdout = dict(TFIDF_HOLDOUT)
+    X_train, X_test, y_train, y_test, categories_train, categories_test = train_test_split(
+        X, y, categories, test_size=holdout["test_size"], random_state=holdout["random_state"]
     )
     
     # Vectorization
     vectorizer = TfidfVectorizer(
-        ngram_range=(1, 2),
-        max_features=5000,
+        ngram_range=ngram_range,
+        max_features=max_features,
         stop_words='english'
     )
     X_train_vect = vectorizer.fit_transform(X_train)
     X_test_vect = vectorizer.transform(X_test)
     
     # Train model
-    model = LogisticRegression(
-        max_iter=1000,
-        class_weight='balanced',
-        C=0.5,
-        solver='liblinear',
-        random_state=42
-    )
+    model = new_classifier(C)
     model.fit(X_train_vect, y_train)
     
+    # Per-category models on the same features
+    category_models = {}
+    fallback_categories = {}
+    if category_column:
+        category_models = train_category_models(X_train_vect, y_train, categories_train, C,
+                                                min_category_reviews)
+        # Skipped categories are still exported, to be served by the global model
+        fallback_categories = {c: None for c in sorted(set(categories_train)) if c not in category_models}
+    
     # Evaluate
     y_pred = model.predict(X_test_vect)
     print("\nClassification Report:")
     print(classification_report(y_test, y_pred))
+    if category_models:
+        report_category_models(category_models, model, X_test_vect, y_test, categories_test)
     
     # Save artifacts
-    os.makedirs("model", exist_ok=True)
-    with open("model/fake_review_model.pkl", "wb") as f:
-        pickle.dump(model, f)
-    with open("model/vectorizer.pkl", "wb") as f:
-        pickle.dump(vectorizer, f)
-        
+    save_model(vectorizer, model, output_dir, {**category_models, **fallback_categories}, holdout)
     print("✅ Model trained and saved successfully")
+    return vectorizer, model
+
+def balanced_weights(y):
+    """Per-row weights like class_weight='balanced', computed within one chunk"""
+    counts = np.bincount(y, minlength=len(CLASSES))
+    weights = len(y) / (len(CLASSES) * np.maximum(counts, 1))
+    return weights[y]
+
+def train_streaming(data_path=DEFAULT_DATA_PATH, output_dir="model", text_column="text_",
+                    chunk_size=100_000, processes=1, cache_dir=DEFAULT_CACHE_DIR,
+                    n_features=2 ** 20, alpha=1e-5,
+                    epochs=1, test_size=0.2, max_test_rows=200_000, seed=42):
+    """Fit HashingVectorizer + SGDClassifier one chunk at a time"""
+    # Stateless, so no fitting pass over the data is needed
+    vectorizer = HashingVectorizer(
+        ngram_range=(1, 2),
+        n_features=n_features,
+        alternate_sign=False,
+        stop_words='english'
+    )
+    model = SGDClassifier(loss='log_loss', alpha=alpha, random_state=seed)
+
+    batches = training_batches(data_path, text_column, chunk_size, processes, cache_dir)
+    test_texts, test_labels = [], []
+    holdout = {"method": "row_mask", "test_size": test_size, "seed": seed, "max_test_rows": max_test_rows}
+    for epoch in range(1, epochs + 1):
+        # Same seed every epoch, so every epoch holds out the same rows
+        n_train = 0
+        for texts, labels, held_out in split_batches(batches, test_size, seed):
+            if epoch == 1:
+                room = max_test_rows - len(test_texts)
+                test_texts.extend(texts[held_out][:room])
+                test_labels.extend(labels[held_out][:room])
+
+            train = ~held_out
+            if train.any():
+                model.partial_fit(vectorizer.transform(texts[train]), labels[train],
+                                  classes=CLASSES, sample_weight=balanced_weights(labels[train]))
+                n_train += int(train.sum())
+            print(f"📚 Epoch {epoch}: trained on {n_train:,} reviews")
+
+    # Evaluate
+    if test_texts:
+        y_pred = model.predict(vectorizer.transform(test_texts))
+        print(f"\nClassification Report ({len(test_texts):,} held-out reviews):")
+        print(classification_report(test_labels, y_pred))
+
+    save_model(vectorizer, model, output_dir, holdout=holdout)
+    print("✅ Streaming model trained and saved successfully")
+    return vectorizer, model
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", default=DEFAULT_DATA_PATH, help="Labelled review CSV")
+    parser.add_argument("--text-column", default="text_")
+    parser.add_argument("--output-dir", default="model")
+    parser.add_argument("--learner", choices=["tfidf", "sgd"], default="tfidf")
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="CSV rows read and cleaned at a time")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1, help="Cleaning processes")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Where cleaned corpora are cached")
+    parser.add_argument("--no-cache", action="store_true", help="Clean the CSV on every run")
+    tfidf = parser.add_argument_group("tfidf learner")
+    tfidf.add_argument("--ngram-max", type=int, default=2, help="Longest word n-gram")
+    tfidf.add_argument("--max-features", type=int, default=5000)
+    tfidf.add_argument("--C", type=float, default=0.5)
+    tfidf.add_argument("--category-column", help="Also train one model per value of this column, e.g. category")
+    tfidf.add_argument("--min-category-reviews", type=int, default=100,
+                       help="Categories with fewer training reviews (or only one class) are served by the global model")
+    sgd = parser.add_argument_group("sgd learner")
+    sgd.add_argument("--n-features", type=int, default=2 ** 20, help="Hashing space size")
+    sgd.add_argument("--alpha", type=float, default=1e-5)
+    sgd.add_argument("--epochs", type=int, default=1)
+    sgd.add_argument("--test-size", type=float, default=0.2)
+    sgd.add_argument("--max-test-rows", type=int, default=200_000, help="Cap on held-out reviews kept in memory")
+    args = parser.parse_args(argv)
+
+    common = dict(data_path=args.data, output_dir=args.output_dir, text_column=args.text_column,
+                  chunk_size=args.chunk_size, processes=args.processes,
+                  cache_dir=None if args.no_cache else args.cache_dir)
+    if args.learner == "sgd":
+        train_streaming(n_features=args.n_features, alpha=args.alpha, epochs=args.epochs,
+                        test_size=args.test_size, max_test_rows=args.max_test_rows, **common)
+    else:
+        train_model(ngram_range=(1, args.ngram_max), max_features=args.max_features, C=args.C,
+                    category_column=args.category_column, min_category_reviews=args.min_category_reviews,
+                    **common)
 
 if __name__ == "__main__":
-    train_model()
\ No newline at end of file
+    main()